@@ -1,11 +1,30 @@
 # ================================
 # app/api/deps.py
 # ================================
-from app.database import SessionLocal
+import hmac
+from typing import Optional
+from fastapi import Header, HTTPException
+from app.core.config import settings
+from app.database import AsyncSessionLocal, SessionLocal
+from app.utils.responses import create_error_response
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def verify_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """Endpoint admin membutuhkan header X-Admin-Token; nonaktif (503) bila ADMIN_TOKEN tidak diset"""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(
+            status_code=503,
+            detail=create_error_response(503, "Admin endpoints are disabled: ADMIN_TOKEN is not set")
+        )
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token.encode(), settings.ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail=create_error_response(401, "Invalid admin token"))
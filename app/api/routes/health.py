@@ -3,6 +3,8 @@
 # ================================
 from fastapi import APIRouter
 from datetime import datetime
+from app.core.db_pool import pool_stats
+from app.database import async_engine, async_pool_metrics, engine, pool_metrics
 from app.utils.responses import create_success_response
 
 router = APIRouter()
@@ -12,4 +14,12 @@ async def health_check():
     return create_success_response({
         "status": "healthy", 
         "timestamp": datetime.utcnow()
-    })
\ No newline at end of file
+    })
+
+@router.get("/db-pool")
+async def db_pool_stats():
+    """Metrik connection pool per engine (async: route /properties, sync: endpoint lain) di worker ini"""
+    return create_success_response({
+        "async": pool_stats(async_engine, async_pool_metrics),
+        "sync": pool_stats(engine, pool_metrics)
+    })
@@ -1,12 +1,33 @@
 # ================================
 # app/api/routes/predict.py 
 # ================================
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, File, Query, UploadFile
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from pydantic import ValidationError
 import logging
 from app.utils.responses import create_success_response, create_error_response
+from app.core.config import settings
 from app.core.ml_models import MLModelManager
-from app.schemas import PropertyFeatures
-from app.utils.responses import format_currency
+from app.core.memory import process_memory
+from app.core.inference import inference_executor, predict_records, predict_columns, InferenceQueueFullError
+from app.core.columnar import CATEGORICAL_COLUMNS, ColumnarPayloadError, validate_columns
+from app.core.bulk_scoring import (
+    OUTPUT_MEDIA_TYPES, detect_format, iter_chunks, stream_scores
+)
+from app.api.deps import get_async_db, verify_admin_token
+from app.core.artifacts import ArtifactPathError, registry_artifact_dir
+from app.core.comparables import build_index, comparables_index, find_comparables
+from app.models.property import PropertyModel
+from app.schemas import (
+    PropertyFeatures, PropertyFeaturesBatch, PropertyFeaturesColumnar, ModelReloadRequest, SensitivityRequest
+)
+from app.core.sensitivity import SensitivityError, count_rows, run_sensitivity
+from app.utils.responses import format_currency, property_to_response
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
@@ -27,23 +48,305 @@ async def predict_property_price(features: PropertyFeatures):
         if not model_manager.is_loaded():
             raise HTTPException(status_code=503, detail="ML models not loaded yet")
         
-        # Preprocess data
-        preprocessed_data = model_manager.preprocess_data(features.dict())
+        # Versi model diambil sekali agar seluruh request memakai versi yang sama
+        model_version = model_manager.model_version
         
-        # Predict
-        predicted_price = model_manager.predict(preprocessed_data)
+        # Preprocess & predict: cache, lalu micro-batch di inference pool
+        predicted_price = await model_manager.predict_async(features.dict(), model_version)
         
         # Format response
         response_data = {
             "prediksi_harga": predicted_price,
-            "prediksi_harga_formatted": format_currency(predicted_price)
+            "prediksi_harga_formatted": format_currency(predicted_price),
+            "model_version": model_version
         }
         
         return create_success_response(data=response_data)
         
+    except HTTPException:
+        raise
+    except InferenceQueueFullError as e:
+        raise HTTPException(status_code=503, detail=create_error_response(503, str(e)))
     except Exception as e:
         logger.error(f"Error during prediction: {str(e)}")
-        return create_error_response(message=f"Error during prediction: {str(e)}")
+        return create_error_response(500, f"Error during prediction: {str(e)}")
+
+@router.post("/batch", response_model=dict, summary="Prediksi Harga Properti (Batch)")
+async def predict_property_price_batch(batch: PropertyFeaturesBatch):
+    """
+    Prediksi harga untuk banyak properti sekaligus.
+    
+    - **items**: Daftar data properti dengan format yang sama seperti `POST /predict/`
+    
+    Setiap item divalidasi secara terpisah; item yang tidak valid dilaporkan
+    per index tanpa menggagalkan item lainnya. Item yang valid diproses dalam
+    satu kali encoding, scaling, dan `model.predict` (item yang sudah ada di
+    cache prediksi tidak diproses ulang).
+    """
+    if not model_manager.is_loaded():
+        raise HTTPException(status_code=503, detail=create_error_response(503, "ML models not loaded yet"))
+    
+    if len(batch.items) > settings.PREDICT_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=create_error_response(413, f"Batch size exceeds limit of {settings.PREDICT_BATCH_MAX_SIZE} items")
+        )
+    
+    model_version = model_manager.model_version
+    results = [None] * len(batch.items)
+    valid_indices = []
+    valid_records = []
+    
+    # Validasi per item
+    for index, item in enumerate(batch.items):
+        try:
+            valid_records.append(PropertyFeatures(**item).dict())
+            valid_indices.append(index)
+        except ValidationError as e:
+            results[index] = {
+                "index": index,
+                "status": "error",
+                "error": [
+                    {"field": ".".join(str(loc) for loc in err["loc"]), "message": err["msg"]}
+                    for err in e.errors()
+                ]
+            }
+    
+    # Prediksi seluruh item valid dalam satu batch
+    if valid_records:
+        try:
+            predicted_prices = await inference_executor.run(predict_records, valid_records, model_version)
+        except InferenceQueueFullError as e:
+            raise HTTPException(status_code=503, detail=create_error_response(503, str(e)))
+        except Exception as e:
+            logger.error(f"Error during batch prediction: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail=create_error_response(500, "Error during batch prediction", {"exception": str(e)})
+            )
+        
+        for index, predicted_price in zip(valid_indices, predicted_prices):
+            results[index] = {
+                "index": index,
+                "status": "success",
+                "prediksi_harga": predicted_price,
+                "prediksi_harga_formatted": format_currency(predicted_price)
+            }
+    
+    return create_success_response(data={
+        "model_version": model_version,
+        "total": len(results),
+        "success_count": len(valid_indices),
+        "error_count": len(results) - len(valid_indices),
+        "results": results
+    })
+
+@router.post("/columnar", response_model=dict, summary="Prediksi Harga Properti (Columnar)")
+async def predict_property_price_columnar(payload: PropertyFeaturesColumnar):
+    """
+    Prediksi banyak properti dengan payload columnar: satu array per nama fitur.
+    
+    - **columns**: `{"f_taman": [1, 0, ...], ..., "kabupaten": [...], "s_sertifikat": [...]}`
+    
+    Validasi rentang dan kategori dilakukan per kolom secara vektor tanpa
+    membuat objek `PropertyFeatures` per baris; baris yang tidak valid
+    dilaporkan per index. Hasil `predictions` berurutan sesuai baris
+    (null untuk baris yang tidak valid).
+    """
+    if not model_manager.is_loaded():
+        raise HTTPException(status_code=503, detail=create_error_response(503, "ML models not loaded yet"))
+    
+    lengths = {len(values) for values in payload.columns.values()}
+    if lengths and max(lengths) > settings.PREDICT_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=create_error_response(413, f"Batch size exceeds limit of {settings.PREDICT_BATCH_MAX_SIZE} items")
+        )
+    
+    try:
+        batch = validate_columns(payload.columns, model_manager.feature_columns[:-2])
+    except ColumnarPayloadError as e:
+        raise HTTPException(status_code=422, detail=create_error_response(422, str(e)))
+    
+    model_version = model_manager.model_version
+    predictions = [None] * len(batch)
+    
+    valid = batch.valid
+    if valid.any():
+        try:
+            predicted_prices = await inference_executor.run(
+                predict_columns, batch.numeric[valid], batch.kabupaten[valid], batch.sertifikat[valid], model_version
+            )
+        except InferenceQueueFullError as e:
+            raise HTTPException(status_code=503, detail=create_error_response(503, str(e)))
+        except Exception as e:
+            logger.error(f"Error during columnar prediction: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail=create_error_response(500, "Error during columnar prediction", {"exception": str(e)})
+            )
+        
+        for index, predicted_price in zip(valid.nonzero()[0].tolist(), predicted_prices):
+            predictions[index] = predicted_price
+    
+    return create_success_response(data={
+        "model_version": model_version,
+        "total": len(batch),
+        "success_count": int(valid.sum()),
+        "error_count": len(batch) - int(valid.sum()),
+        "predictions": predictions,
+        "errors": [{"index": index, "error": batch.errors[index]} for index in sorted(batch.errors)]
+    })
+
+@router.post("/upload", summary="Prediksi Harga dari File CSV/Parquet")
+async def predict_property_price_upload(
+    file: UploadFile = File(..., description="File CSV/Parquet dengan kolom PropertyFeatures"),
+    output_format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="Format output (ndjson|csv)"),
+    chunk_size: int = Query(settings.BULK_SCORING_CHUNK_SIZE, ge=1, le=settings.PREDICT_BATCH_MAX_SIZE,
+                            description="Jumlah baris per chunk"),
+    id_column: Optional[str] = Query(None, description="Kolom yang disalin ke output sebagai id")
+):
+    """
+    Bulk scoring file besar dengan layout kolom `PropertyFeatures`.
+    
+    File dibaca per chunk (memori sebanding dengan ukuran chunk), setiap chunk
+    divalidasi per kolom dan diprediksi sebagai satu batch, lalu hasilnya
+    langsung di-stream sebagai NDJSON atau CSV sementara chunk berikutnya
+    diproses. Satu baris output per baris input (`row` = index baris data).
+    """
+    if not model_manager.is_loaded():
+        raise HTTPException(status_code=503, detail=create_error_response(503, "ML models not loaded yet"))
+    
+    input_format = detect_format(file.filename, file.content_type)
+    chunks = iter_chunks(file.file, input_format, chunk_size)
+    
+    # Chunk pertama dibaca sebelum streaming agar kesalahan format masih bisa dikembalikan sebagai 4xx
+    try:
+        first_chunk = await run_in_threadpool(next, chunks, None)
+    except Exception as e:
+        await file.close()
+        raise HTTPException(
+            status_code=422,
+            detail=create_error_response(422, f"Unable to read {input_format} file", {"exception": str(e)})
+        )
+    
+    expected = set(model_manager.feature_columns[:-2]) | set(CATEGORICAL_COLUMNS)
+    missing = sorted(expected - set(first_chunk.columns)) if first_chunk is not None else []
+    if first_chunk is None or missing or (id_column and id_column not in first_chunk.columns):
+        await file.close()
+        message = (
+            "File contains no rows" if first_chunk is None
+            else f"Missing columns: {', '.join(missing)}" if missing
+            else f"id_column not found: {id_column}"
+        )
+        raise HTTPException(status_code=422, detail=create_error_response(422, message))
+    
+    return StreamingResponse(
+        stream_scores(
+            chunks, first_chunk, model_manager.feature_columns[:-2], model_manager.model_version,
+            output_format, id_column, on_close=file.close
+        ),
+        media_type=OUTPUT_MEDIA_TYPES[output_format],
+        headers={"X-Model-Version": model_manager.model_version or ""}
+    )
+
+@router.post("/sensitivity", response_model=dict, summary="Analisis Sensitivitas (What-if)")
+async def predict_sensitivity(request: SensitivityRequest):
+    """
+    Kurva respons prediksi harga terhadap perubahan fitur.
+    
+    - **base**: Data properti dasar (format `POST /predict/`)
+    - **sweeps**: Fitur yang divariasikan, dengan `values` eksplisit atau grid `start`/`stop`/`steps`
+    - **toggles**: Flag fasilitas `f_*` yang di-toggle satu per satu (`["all"]` untuk semua)
+    
+    Seluruh perturbasi dihitung dalam satu matriks dan satu kali `model.predict`.
+    """
+    if not model_manager.is_loaded():
+        raise HTTPException(status_code=503, detail=create_error_response(503, "ML models not loaded yet"))
+    
+    sweeps = [sweep.dict() for sweep in request.sweeps]
+    try:
+        total_rows = count_rows(sweeps, request.toggles, model_manager.feature_columns)
+    except SensitivityError as e:
+        raise HTTPException(status_code=422, detail=create_error_response(422, str(e)))
+    
+    if total_rows > settings.PREDICT_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=create_error_response(413, f"Sensitivity matrix exceeds limit of {settings.PREDICT_BATCH_MAX_SIZE} rows")
+        )
+    
+    try:
+        result = await inference_executor.run(
+            run_sensitivity, request.base.dict(), sweeps, request.toggles, model_manager.model_version
+        )
+    except SensitivityError as e:
+        raise HTTPException(status_code=422, detail=create_error_response(422, str(e)))
+    except InferenceQueueFullError as e:
+        raise HTTPException(status_code=503, detail=create_error_response(503, str(e)))
+    except Exception as e:
+        logger.error(f"Error during sensitivity analysis: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=create_error_response(500, "Error during sensitivity analysis", {"exception": str(e)})
+        )
+    
+    result["base_prediction_formatted"] = format_currency(result["base_prediction"])
+    return create_success_response(data=result)
+
+@router.post("/comparables", response_model=dict, summary="Listing Pembanding (Nearest Neighbor)")
+async def predict_comparables(
+    features: PropertyFeatures,
+    background_tasks: BackgroundTasks,
+    k: int = Query(5, ge=1, le=settings.COMPARABLES_MAX_K, description="Jumlah listing pembanding"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Cari `k` listing paling mirip dengan data properti yang diberikan.
+    
+    Kemiripan adalah jarak euclidean di ruang fitur StandardScaler model.
+    Pencarian memakai index in-memory (dibangun saat startup dan diperbarui
+    setiap create/update/delete), bukan scan tabel; hanya `k` listing hasil
+    yang dibaca dari database berdasarkan primary key.
+    """
+    if not settings.COMPARABLES_ENABLED:
+        raise HTTPException(status_code=404, detail=create_error_response(404, "Comparables index is disabled"))
+    if not model_manager.is_loaded():
+        raise HTTPException(status_code=503, detail=create_error_response(503, "ML models not loaded yet"))
+    if not comparables_index.ready:
+        raise HTTPException(status_code=503, detail=create_error_response(503, "Comparables index is not ready yet"))
+    
+    try:
+        model_version, neighbors = await run_in_threadpool(find_comparables, features.dict(), k)
+    except RuntimeError as e:
+        # Versi model index sudah keluar dari registry: bangun ulang dengan model aktif
+        background_tasks.add_task(build_index)
+        raise HTTPException(status_code=503, detail=create_error_response(503, "Comparables index is being rebuilt", {"exception": str(e)}))
+    except Exception as e:
+        logger.error(f"Error during comparables search: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=create_error_response(500, "Error during comparables search", {"exception": str(e)})
+        )
+    
+    ids = [property_id for property_id, _ in neighbors]
+    properties = {
+        p.id: p for p in (await db.scalars(
+            select(PropertyModel).options(selectinload(PropertyModel.valuation)).where(PropertyModel.id.in_(ids))
+        )).all()
+    } if ids else {}
+    
+    comparables = [
+        {"distance": distance, "property": property_to_response(properties[property_id]).dict()}
+        for property_id, distance in neighbors if property_id in properties
+    ]
+    
+    return create_success_response(data={
+        "model_version": model_version,
+        "k": k,
+        "index_size": len(comparables_index),
+        "comparables": comparables
+    })
 
 @router.get("/model-info", summary="Informasi Model")
 async def get_model_info():
@@ -53,14 +356,53 @@ async def get_model_info():
     try:
         model_info = {
             "model_loaded": model_manager.is_loaded(),
+            "model_version": model_manager.model_version,
+            "model_versions": model_manager.get_versions(),
             "available_kabupaten": model_manager.get_available_kabupaten(),
             "available_sertifikat": model_manager.get_available_sertifikat(),
             "total_features": 39,
-            "model_source": "stevencmichael/Capstone_Project_SM079-LAI"
+            "model_source": model_manager.model_source,
+            "prediction_cache": model_manager.get_cache_stats(),
+            "inference_pool": inference_executor.stats(),
+            "micro_batching": model_manager.get_micro_batch_stats(),
+            "comparables_index": comparables_index.stats(),
+            "process_memory": process_memory()
         }
         
         return create_success_response(data=model_info)
         
     except Exception as e:
         logger.error(f"Error getting model info: {str(e)}")
-        return create_error_response(message=f"Error getting model info: {str(e)}")
+        return create_error_response(500, f"Error getting model info: {str(e)}")
+
+@router.post("/admin/reload", summary="Hot Swap Model", dependencies=[Depends(verify_admin_token)])
+async def reload_model(background_tasks: BackgroundTasks, request: ModelReloadRequest = ModelReloadRequest()):
+    """
+    Load artifact set baru di background, jalankan inferensi uji, lalu ganti
+    model aktif secara atomik tanpa restart.
+    
+    Request prediksi yang sedang berjalan diselesaikan dengan versi lama.
+    Index comparables dibangun ulang di background dengan scaler versi baru.
+    `artifact_dir` dibatasi ke subdirektori `MODEL_REGISTRY_ROOT`.
+    """
+    artifact_dir = None
+    if request.artifact_dir:
+        try:
+            artifact_dir = registry_artifact_dir(request.artifact_dir)
+        except ArtifactPathError as e:
+            raise HTTPException(status_code=400, detail=create_error_response(400, str(e)))
+    
+    try:
+        bundle = await model_manager.reload_models(artifact_dir)
+        if settings.COMPARABLES_ENABLED:
+            background_tasks.add_task(build_index)
+        return create_success_response(data={
+            "message": "Model reloaded successfully",
+            **bundle.info()
+        })
+    except Exception as e:
+        logger.error(f"Error reloading model: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=create_error_response(500, "Failed to reload model", {"exception": str(e)})
+        )
@@ -293,9 +293,11 @@ async def get_property_stats(db: Session = Depends(get_db)):
 # ================================
 # app/api/routes/properties.py
 # ================================
-from fastapi import APIRouter, HTTPException, Query, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func, or_, distinct
+from fastapi import APIRouter, HTTPException, Query, Depends, BackgroundTasks, Request
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from typing import Optional, List
 from datetime import datetime
 
@@ -304,79 +306,115 @@ from app.schemas.property import (
     PropertyCreate, PropertyUpdate, PropertyResponse,
     PropertiesListResponse, PropertyStatsResponse, PaginationMeta
 )
-from app.api.deps import get_db
+from app.api.deps import get_async_db, verify_admin_token
+from app.core.config import settings
+from app.core.ml_models import MLModelManager
+from app.core.valuation import refresh_valuation_async, run_rescore, try_start_rescore
+from app.core.comparables import refresh_listing, remove_listing
+from app.core.property_counts import count_properties, invalidate_counts
+from app.core.property_ingest import INGEST_MODES, NDJSON_MEDIA_TYPES, ingest, iter_items, iter_ndjson
+from app.core.property_query import (
+    PropertyQueryError, build_property_query, normalize_filters, seek_predicate
+)
 from app.utils.responses import create_error_response, create_success_response, property_to_response
+from app.utils.pagination import InvalidCursorError, decode_cursor, encode_cursor
 
 router = APIRouter()
 
+def duplicate_source_url_error(e: IntegrityError) -> HTTPException:
+    """Pelanggaran unique key source_url_key (listing yang sama sudah ada)"""
+    return HTTPException(
+        status_code=409,
+        detail=create_error_response(409, "Property with this source_url already exists", {"exception": str(e.orig)})
+    )
+
+def select_property(property_id: int):
+    """Satu property beserta valuation-nya (relasi tidak bisa lazy load di AsyncSession)"""
+    return select(PropertyModel).options(selectinload(PropertyModel.valuation)).where(PropertyModel.id == property_id)
+
 @router.get("/", response_model=PropertiesListResponse)
 async def get_properties(
-    filter: Optional[str] = Query(None, description="Search in title or description"),
-    location_text: Optional[str] = Query(None, description="Filter by location"),
+    filter: Optional[str] = Query(None, description="Full-text search in title or description (prefix per kata)"),
+    location_text: Optional[str] = Query(None, description="Filter by location (substring)"),
+    kabupaten: Optional[str] = Query(None, description="Filter by kabupaten/kota, e.g. 'Jakarta Selatan'"),
+    kecamatan: Optional[str] = Query(None, description="Filter by kecamatan, e.g. 'Kebayoran Baru'"),
     property_type: Optional[str] = Query(None, pattern="^(House|Apartment|Other)$", description="Filter by property type"),
     bedrooms: Optional[int] = Query(None, ge=1, description="Filter by number of bedrooms"),
     bathrooms: Optional[int] = Query(None, ge=1, description="Filter by number of bathrooms"),
     min_price: Optional[float] = Query(None, ge=0, description="Minimum price filter"),
     max_price: Optional[float] = Query(None, ge=0, description="Maximum price filter"),
-    sort: Optional[str] = Query("desc", pattern="^(asc|desc)$", description="Sort by price (asc/desc)"),
+    min_predicted_price: Optional[float] = Query(None, ge=0, description="Minimum predicted price filter"),
+    max_predicted_price: Optional[float] = Query(None, ge=0, description="Maximum predicted price filter"),
+    min_price_ratio: Optional[float] = Query(None, ge=0, description="Minimum listed/predicted price ratio"),
+    max_price_ratio: Optional[float] = Query(None, ge=0, description="Maximum listed/predicted price ratio"),
+    sort_by: Optional[str] = Query("price", pattern="^(price|predicted_price|price_ratio|relevance)$", description="Sort field (relevance butuh filter)"),
+    sort: Optional[str] = Query("desc", pattern="^(asc|desc)$", description="Sort direction (asc/desc)"),
     limit: int = Query(10, ge=1, le=100, description="Number of properties per page"),
     offset: int = Query(0, ge=0, description="Starting index for pagination"),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Cursor dari meta.next_cursor (menggantikan offset)"),
+    count: Optional[str] = Query(None, pattern="^(exact|cached|estimated|none)$", description="Strategi total (default dari PROPERTIES_COUNT_STRATEGY)"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get list of properties with filtering, sorting, and pagination"""
+    """
+    Get list of properties with filtering, sorting, and pagination.
+    
+    Dengan `cursor`, halaman berikutnya dicari langsung dari posisi
+    (nilai sort, id) baris terakhir sehingga biayanya sama untuk halaman
+    berapa pun; `offset` tetap didukung.
+    """
     
     try:
-        query = db.query(PropertyModel)
-        
-        # Apply filters
-        if filter:
-            search_term = f"%{filter}%"
-            query = query.filter(
-                or_(
-                    PropertyModel.title.ilike(search_term),
-                    PropertyModel.description.ilike(search_term)
-                )
-            )
-        
-        if location_text:
-            query = query.filter(PropertyModel.location_text.ilike(f"%{location_text}%"))
-        
-        if property_type:
-            query = query.filter(PropertyModel.property_type == property_type)
-        
-        if bedrooms:
-            query = query.filter(PropertyModel.bedrooms == bedrooms)
-        
-        if bathrooms:
-            query = query.filter(PropertyModel.bathrooms == bathrooms)
-        
-        if min_price:
-            query = query.filter(PropertyModel.price_numeric >= min_price)
-        
-        if max_price:
-            query = query.filter(PropertyModel.price_numeric <= max_price)
+        filters = normalize_filters({
+            "filter": filter, "location_text": location_text, "kabupaten": kabupaten, "kecamatan": kecamatan,
+            "property_type": property_type, "bedrooms": bedrooms, "bathrooms": bathrooms,
+            "min_price": min_price, "max_price": max_price,
+            "min_predicted_price": min_predicted_price, "max_predicted_price": max_predicted_price,
+            "min_price_ratio": min_price_ratio, "max_price_ratio": max_price_ratio,
+        })
         
-        # Apply sorting
-        if sort == "asc":
-            query = query.order_by(PropertyModel.price_numeric.asc())
-        else:
-            query = query.order_by(PropertyModel.price_numeric.desc())
+        # Apply filters and sorting
+        try:
+            query, sort_column = build_property_query(db.get_bind().dialect.name, filters, sort_by, sort)
+        except PropertyQueryError as e:
+            raise HTTPException(status_code=400, detail=create_error_response(400, str(e)))
         
         # Get total count before pagination
-        total = query.count()
+        total, count_strategy = await count_properties(db, query, count or settings.PROPERTIES_COUNT_STRATEGY, filters)
         
         # Apply pagination
-        properties = query.offset(offset).limit(limit).all()
+        if cursor:
+            try:
+                last_value, last_id = decode_cursor(cursor, sort_by, sort)
+            except InvalidCursorError as e:
+                raise HTTPException(status_code=400, detail=create_error_response(400, str(e)))
+            query = query.filter(seek_predicate(sort_column, sort_by, sort, last_value, last_id))
+            offset = 0
+        else:
+            query = query.offset(offset)
+        
+        # Satu baris tambahan untuk mengetahui apakah ada halaman berikutnya;
+        # nilai kolom sort ikut diambil untuk cursor
+        result = await db.execute(query.add_columns(sort_column.label("sort_value")).limit(limit + 1))
+        rows = result.all()
+        has_next = len(rows) > limit
+        rows = rows[:limit]
         
         # Convert to response format
-        property_responses = [property_to_response(prop) for prop in properties]
+        property_responses = [property_to_response(prop) for prop, _ in rows]
+        
+        next_cursor = None
+        if has_next:
+            last, last_value = rows[-1]
+            next_cursor = encode_cursor(sort_by, sort, last_value, last.id)
         
         meta = PaginationMeta(
             total=total,
             limit=limit,
             offset=offset,
-            has_next=offset + limit < total,
-            has_prev=offset > 0
+            has_next=has_next,
+            has_prev=offset > 0 or cursor is not None,
+            next_cursor=next_cursor,
+            count_strategy=count_strategy
         )
         
         return PropertiesListResponse(
@@ -386,6 +424,8 @@ async def get_properties(
             error=None
         )
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -393,11 +433,11 @@ async def get_properties(
         )
 
 @router.get("/{property_id}")
-async def get_property(property_id: int, db: Session = Depends(get_db)):
+async def get_property(property_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get a specific property by ID"""
     
     try:
-        property_model = db.query(PropertyModel).filter(PropertyModel.id == property_id).first()
+        property_model = await db.scalar(select_property(property_id))
         
         if not property_model:
             raise HTTPException(
@@ -416,7 +456,7 @@ async def get_property(property_id: int, db: Session = Depends(get_db)):
         )
 
 @router.post("/", status_code=201)
-async def create_property(property_data: PropertyCreate, db: Session = Depends(get_db)):
+async def create_property(property_data: PropertyCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new property"""
     
     try:
@@ -448,24 +488,79 @@ async def create_property(property_data: PropertyCreate, db: Session = Depends(g
         )
         
         db.add(property_model)
-        db.commit()
-        db.refresh(property_model)
+        await db.commit()
+        await refresh_valuation_async(db, property_model)
+        refresh_listing(property_model)
+        invalidate_counts()
         
         return create_success_response(property_to_response(property_model))
     
+    except IntegrityError as e:
+        await db.rollback()
+        raise duplicate_source_url_error(e)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=500,
             detail=create_error_response(500, "Failed to create property", {"exception": str(e)})
         )
 
+@router.post("/bulk", status_code=201)
+async def bulk_create_properties(
+    request: Request,
+    mode: str = Query("insert", pattern="^(" + "|".join(INGEST_MODES) + ")$", description="insert atau upsert"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Create (or upsert) many properties at once.
+    
+    Body berupa array JSON item `PropertyCreate` (atau `{"items": [...]}`), atau
+    NDJSON (`Content-Type: application/x-ndjson`, satu item per baris) yang
+    dibaca bertahap. Item ditulis per chunk `PROPERTIES_BULK_CHUNK_SIZE` dengan
+    INSERT multi-row, satu transaksi per chunk; hasil per item berisi `id` dan
+    `action` (created/updated/unchanged) atau error tanpa menggagalkan item lain.
+    
+    Listing dikenali dari `source_url` yang dinormalisasi. `mode=insert` menolak
+    listing yang sudah ada; `mode=upsert` memperbarui listing yang kontennya
+    berubah dan melewati listing yang sama persis (untuk re-crawl berkala).
+    """
+    
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in NDJSON_MEDIA_TYPES:
+        items = iter_ndjson(request.stream())
+    else:
+        try:
+            body = await request.json()
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=create_error_response(400, "Invalid JSON body", {"exception": str(e)}))
+        if isinstance(body, dict) and isinstance(body.get("items"), list):
+            body = body["items"]
+        if not isinstance(body, list):
+            raise HTTPException(
+                status_code=422,
+                detail=create_error_response(422, "Body must be a JSON array of properties or NDJSON")
+            )
+        if len(body) > settings.PROPERTIES_BULK_MAX_ITEMS:
+            raise HTTPException(
+                status_code=413,
+                detail=create_error_response(413, f"Bulk size exceeds limit of {settings.PROPERTIES_BULK_MAX_ITEMS} items")
+            )
+        items = iter_items(body)
+    
+    try:
+        return create_success_response(await ingest(db, items, mode))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=create_error_response(500, "Failed to ingest properties", {"exception": str(e)})
+        )
+
 @router.put("/{property_id}")
-async def update_property(property_id: int, property_data: PropertyUpdate, db: Session = Depends(get_db)):
+async def update_property(property_id: int, property_data: PropertyUpdate, db: AsyncSession = Depends(get_async_db)):
     """Update an existing property"""
     
     try:
-        property_model = db.query(PropertyModel).filter(PropertyModel.id == property_id).first()
+        property_model = await db.scalar(select_property(property_id))
         
         if not property_model:
             raise HTTPException(
@@ -499,26 +594,31 @@ async def update_property(property_id: int, property_data: PropertyUpdate, db: S
         property_model.nearby_points_of_interest_text = getattr(property_data, 'nearby_points_of_interest_text', None)
         property_model.updatedAt = datetime.utcnow()
         
-        db.commit()
-        db.refresh(property_model)
+        await db.commit()
+        await refresh_valuation_async(db, property_model)
+        refresh_listing(property_model)
+        invalidate_counts()
         
         return create_success_response(property_to_response(property_model))
     
     except HTTPException:
         raise
+    except IntegrityError as e:
+        await db.rollback()
+        raise duplicate_source_url_error(e)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=500,
             detail=create_error_response(500, "Failed to update property", {"exception": str(e)})
         )
 
 @router.delete("/{property_id}")
-async def delete_property(property_id: int, db: Session = Depends(get_db)):
+async def delete_property(property_id: int, db: AsyncSession = Depends(get_async_db)):
     """Delete a property"""
     
     try:
-        property_model = db.query(PropertyModel).filter(PropertyModel.id == property_id).first()
+        property_model = await db.scalar(select_property(property_id))
         
         if not property_model:
             raise HTTPException(
@@ -526,39 +626,40 @@ async def delete_property(property_id: int, db: Session = Depends(get_db)):
                 detail=create_error_response(404, "Property not found")
             )
         
-        db.delete(property_model)
-        db.commit()
+        await db.delete(property_model)
+        await db.commit()
+        remove_listing(property_id)
+        invalidate_counts()
         
         return create_success_response({"message": "Property deleted successfully"})
     
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=500,
             detail=create_error_response(500, "Failed to delete property", {"exception": str(e)})
         )
 
 @router.get("/stats/summary", response_model=PropertyStatsResponse)
-async def get_property_stats(db: Session = Depends(get_db)):
+async def get_property_stats(db: AsyncSession = Depends(get_async_db)):
     """Get property statistics summary"""
     
     try:
-        total_properties = db.query(PropertyModel).count()
+        # Total, average price and price range in one round trip
+        total_properties, avg_price, min_price, max_price = (await db.execute(select(
+            func.count(PropertyModel.id),
+            func.avg(PropertyModel.price_numeric),
+            func.min(PropertyModel.price_numeric),
+            func.max(PropertyModel.price_numeric)
+        ))).one()
         
         # Count by property type
-        property_type_stats = db.query(
+        property_type_stats = (await db.execute(select(
             PropertyModel.property_type,
             func.count(PropertyModel.id).label('count')
-        ).group_by(PropertyModel.property_type).all()
-        
-        # Average price
-        avg_price = db.query(func.avg(PropertyModel.price_numeric)).scalar()
-        
-        # Price range  
-        min_price = db.query(func.min(PropertyModel.price_numeric)).scalar()
-        max_price = db.query(func.max(PropertyModel.price_numeric)).scalar()
+        ).group_by(PropertyModel.property_type))).all()
         
         stats_data = {
             "total_properties": total_properties,
@@ -583,15 +684,15 @@ async def get_property_stats(db: Session = Depends(get_db)):
         )
 
 @router.get("/facilities/unique")
-async def get_unique_facilities(db: Session = Depends(get_db)):
+async def get_unique_facilities(db: AsyncSession = Depends(get_async_db)):
     """Get all unique individual facilities across all properties"""
     
     try:
         # Get all facilities from all properties
-        facilities_query = db.query(PropertyModel.facilities).filter(
+        facilities_query = (await db.execute(select(PropertyModel.facilities).where(
             PropertyModel.facilities.isnot(None),
             PropertyModel.facilities != ""
-        ).all()
+        ))).all()
         
         # Extract unique individual facilities
         unique_facilities = set()
@@ -620,15 +721,15 @@ async def get_unique_facilities(db: Session = Depends(get_db)):
         )
 
 @router.get("/poi-categories/unique")
-async def get_unique_poi_categories(db: Session = Depends(get_db)):
+async def get_unique_poi_categories(db: AsyncSession = Depends(get_async_db)):
     """Get all unique categories from nearby_points_of_interest_text across all properties"""
     
     try:
         # Get all POI texts from all properties
-        poi_query = db.query(PropertyModel.nearby_points_of_interest_text).filter(
+        poi_query = (await db.execute(select(PropertyModel.nearby_points_of_interest_text).where(
             PropertyModel.nearby_points_of_interest_text.isnot(None),
             PropertyModel.nearby_points_of_interest_text != ""
-        ).all()
+        ))).all()
         
         # Extract unique categories
         unique_categories = set()
@@ -661,4 +762,24 @@ async def get_unique_poi_categories(db: Session = Depends(get_db)):
         raise HTTPException(
             status_code=500,
             detail=create_error_response(500, "Failed to get unique POI categories", {"exception": str(e)})
-        )
\ No newline at end of file
+        )
+
+@router.post("/valuations/rescore", dependencies=[Depends(verify_admin_token)])
+async def rescore_valuations(
+    background_tasks: BackgroundTasks,
+    only_stale: bool = Query(True, description="Hanya listing tanpa valuation atau dengan versi model lain")
+):
+    """Hitung ulang harga prediksi tersimpan di background (per chunk); hanya satu rescore per proses"""
+    
+    model_manager = MLModelManager()
+    if not model_manager.is_loaded():
+        raise HTTPException(status_code=503, detail=create_error_response(503, "ML models not loaded yet"))
+    if not try_start_rescore():
+        raise HTTPException(status_code=409, detail=create_error_response(409, "Valuation scoring is already running"))
+    
+    background_tasks.add_task(run_rescore, only_stale=only_stale)
+    return create_success_response({
+        "message": "Valuation scoring started",
+        "model_version": model_manager.model_version,
+        "only_stale": only_stale
+    })
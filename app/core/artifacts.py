@@ -0,0 +1,195 @@
+# ================================
+# app/core/artifacts.py
+# ================================
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import joblib
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Nama atribut di MLModelManager -> nama file artifact
+ARTIFACT_FILES = {
+    "le_kabupaten": "le_kabupaten.joblib",
+    "le_sertifikat": "le_sertifikat.joblib",
+    "scaler": "standard_scaler.joblib",
+    "model": "model.joblib",
+}
+
+# Artifact besar berbasis numpy yang dimuat dengan memory map
+MMAP_ARTIFACTS = {"model"}
+
+MANIFEST_FILENAME = "manifest.json"
+
+
+class ArtifactIntegrityError(RuntimeError):
+    """Artifact lokal tidak ada atau hash-nya tidak cocok dengan manifest"""
+
+
+class ArtifactPathError(ValueError):
+    """Direktori artifact dari request berada di luar MODEL_REGISTRY_ROOT"""
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Hitung sha256 file secara bertahap"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_manifest(artifact_dir: str) -> Dict:
+    manifest_path = os.path.join(artifact_dir, MANIFEST_FILENAME)
+    if not os.path.exists(manifest_path):
+        raise ArtifactIntegrityError(f"Manifest not found: {manifest_path}")
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def manifest_version(manifest: Dict) -> str:
+    """Versi artifact set: field `version` di manifest, atau turunan dari hash artifact"""
+    if manifest.get("version"):
+        return str(manifest["version"])
+    digest = hashlib.sha256()
+    for filename in sorted(manifest.get("artifacts", {})):
+        digest.update(f"{filename}:{manifest['artifacts'][filename]['sha256']};".encode())
+    return f"local-{digest.hexdigest()[:12]}"
+
+
+def hub_version(paths: Dict[str, str]) -> str:
+    """Versi artifact dari Hub: commit hash pada path snapshot cache HF"""
+    revision = os.path.basename(os.path.dirname(paths["model"]))
+    return f"hub-{revision[:12]}"
+
+
+def resolve_local_artifacts(artifact_dir: str, verify_hashes: bool = True) -> Dict[str, str]:
+    """Path artifact di direktori lokal, diverifikasi terhadap manifest tanpa akses jaringan"""
+    manifest = read_manifest(artifact_dir)
+    entries = manifest.get("artifacts", {})
+
+    paths = {}
+    for name, filename in ARTIFACT_FILES.items():
+        path = os.path.join(artifact_dir, filename)
+        if filename not in entries:
+            raise ArtifactIntegrityError(f"{filename} is not listed in {MANIFEST_FILENAME}")
+        if not os.path.exists(path):
+            raise ArtifactIntegrityError(f"Artifact not found: {path}")
+
+        if verify_hashes:
+            start = time.perf_counter()
+            actual = file_sha256(path)
+            expected = entries[filename]["sha256"]
+            if actual != expected:
+                raise ArtifactIntegrityError(
+                    f"Hash mismatch for {filename}: expected {expected}, got {actual}"
+                )
+            logger.info(f"Verified {filename} in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        paths[name] = path
+    return paths
+
+
+def resolve_hub_artifacts(repo_id: str) -> Dict[str, str]:
+    """Download artifact dari Hugging Face Hub (atau ambil dari cache HF)"""
+    from huggingface_hub import hf_hub_download
+
+    paths = {}
+    for name, filename in ARTIFACT_FILES.items():
+        start = time.perf_counter()
+        paths[name] = hf_hub_download(repo_id, filename)
+        logger.info(f"Resolved {filename} from {repo_id} in {(time.perf_counter() - start) * 1000:.1f} ms")
+    return paths
+
+
+def registry_artifact_dir(artifact_dir: str) -> str:
+    """
+    Path absolut direktori artifact yang diminta lewat endpoint admin.
+
+    Hanya subdirektori MODEL_REGISTRY_ROOT yang diterima (nama versi relatif
+    terhadap root, atau path absolut di dalamnya); symlink dan `..` di-resolve
+    dulu sehingga tidak bisa keluar dari root. Artifact di-unpickle dengan
+    joblib, jadi path sembarang sama dengan eksekusi kode sembarang.
+    """
+    if not settings.MODEL_REGISTRY_ROOT:
+        raise ArtifactPathError("artifact_dir is not allowed: MODEL_REGISTRY_ROOT is not set")
+    root = Path(settings.MODEL_REGISTRY_ROOT).resolve()
+    path = (root / artifact_dir).resolve()
+    if path == root or not path.is_relative_to(root):
+        raise ArtifactPathError(f"artifact_dir must be a subdirectory of {root}")
+    if not path.is_dir():
+        raise ArtifactPathError(f"Artifact directory not found: {artifact_dir}")
+    return str(path)
+
+
+def load_artifacts(paths: Dict[str, str], mmap: bool = True) -> Dict[str, Any]:
+    """Load artifact dengan joblib; artifact numpy besar memakai mmap_mode='r'"""
+    artifacts = {}
+    for name, path in paths.items():
+        start = time.perf_counter()
+        mmap_mode = "r" if mmap and name in MMAP_ARTIFACTS else None
+        artifacts[name] = joblib.load(path, mmap_mode=mmap_mode)
+        logger.info(
+            f"Loaded {os.path.basename(path)} in {(time.perf_counter() - start) * 1000:.1f} ms"
+            f"{' (mmap)' if mmap_mode else ''}"
+        )
+    return artifacts
+
+
+def load_artifact_set(artifact_dir: Optional[str] = None) -> Tuple[Dict[str, Any], str, str]:
+    """Resolve dan load satu set artifact sesuai konfigurasi; return (artifacts, version, source)"""
+    artifact_dir = artifact_dir or settings.MODEL_ARTIFACT_DIR
+    if artifact_dir:
+        logger.info(f"Loading ML models from local artifact directory {artifact_dir}...")
+        paths = resolve_local_artifacts(artifact_dir, verify_hashes=settings.MODEL_VERIFY_HASHES)
+        version = manifest_version(read_manifest(artifact_dir))
+        source = artifact_dir
+    else:
+        logger.info(f"Loading ML models from Hugging Face Hub ({settings.MODEL_REPO_ID})...")
+        paths = resolve_hub_artifacts(settings.MODEL_REPO_ID)
+        version = hub_version(paths)
+        source = settings.MODEL_REPO_ID
+    return load_artifacts(paths, mmap=settings.MODEL_MMAP), version, source
+
+
+def export_artifacts(target_dir: str, repo_id: Optional[str] = None) -> Dict:
+    """
+    Siapkan direktori artifact offline: download dari Hub, simpan ulang tanpa
+    kompresi agar bisa di-mmap, lalu tulis manifest berisi hash.
+    """
+    repo_id = repo_id or settings.MODEL_REPO_ID
+    os.makedirs(target_dir, exist_ok=True)
+    source_paths = resolve_hub_artifacts(repo_id)
+
+    entries = {}
+    for name, filename in ARTIFACT_FILES.items():
+        path = os.path.join(target_dir, filename)
+        joblib.dump(joblib.load(source_paths[name]), path)
+        entries[filename] = {"sha256": file_sha256(path), "size": os.path.getsize(path)}
+
+    manifest = {
+        "source": repo_id,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "artifacts": entries,
+    }
+    with open(os.path.join(target_dir, MANIFEST_FILENAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+if __name__ == "__main__":
+    # python -m app.core.artifacts <target_dir> [repo_id]
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) < 2:
+        print("Usage: python -m app.core.artifacts <target_dir> [repo_id]")
+        sys.exit(1)
+    export_artifacts(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
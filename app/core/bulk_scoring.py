@@ -0,0 +1,128 @@
+# ================================
+# app/core/bulk_scoring.py
+# ================================
+import csv
+import io
+import json
+import logging
+import os
+from typing import AsyncIterator, BinaryIO, Dict, Iterator, List, Optional
+
+import pandas as pd
+from starlette.concurrency import run_in_threadpool
+
+from app.core.columnar import validate_columns
+from app.core.inference import inference_executor, predict_columns
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+class BulkScoringError(ValueError):
+    """File upload tidak bisa dibaca sebagai tabel PropertyFeatures"""
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str]) -> str:
+    """Format input dari ekstensi file atau content type"""
+    extension = os.path.splitext(filename or "")[1].lower().lstrip(".")
+    if extension in ("csv", "txt"):
+        return "csv"
+    if extension in ("parquet", "pq"):
+        return "parquet"
+    if content_type and "parquet" in content_type:
+        return "parquet"
+    return "csv"
+
+
+def iter_chunks(file: BinaryIO, input_format: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Baca file per chunk sehingga memori sebanding dengan `chunk_size`, bukan ukuran file"""
+    if input_format == "parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise BulkScoringError("Parquet upload requires the pyarrow package")
+        parquet_file = pq.ParquetFile(file)
+        for record_batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield record_batch.to_pandas()
+    else:
+        reader = pd.read_csv(file, chunksize=chunk_size, skipinitialspace=True)
+        for chunk in reader:
+            yield chunk
+
+
+def _format_errors(errors: List[Dict]) -> str:
+    return "; ".join(f"{e['field']}: {e['message']}" for e in errors)
+
+
+def format_rows(rows: List[Dict], output_format: str, header: bool, id_column: Optional[str]) -> str:
+    """Serialisasi hasil satu chunk sebagai NDJSON atau CSV"""
+    if output_format == "ndjson":
+        return "".join(json.dumps(row, default=str) + "\n" for row in rows)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    id_field = ["id"] if id_column else []
+    if header:
+        writer.writerow(["row"] + id_field + ["status", "prediksi_harga", "error"])
+    for row in rows:
+        writer.writerow(
+            [row["row"]] + ([row.get("id")] if id_column else [])
+            + [row["status"], row.get("prediksi_harga", ""), _format_errors(row.get("error", []))]
+        )
+    return buffer.getvalue()
+
+
+async def score_chunk(chunk: pd.DataFrame, offset: int, numeric_columns: List[str],
+                      version: str, id_column: Optional[str] = None) -> List[Dict]:
+    """Validasi satu chunk per kolom lalu prediksi baris valid dalam satu batch"""
+    columns = {name: chunk[name].to_numpy() for name in chunk.columns}
+    batch = await run_in_threadpool(validate_columns, columns, numeric_columns, True)
+
+    predictions = {}
+    valid = batch.valid
+    if valid.any():
+        predicted = await inference_executor.run(
+            predict_columns, batch.numeric[valid], batch.kabupaten[valid], batch.sertifikat[valid], version
+        )
+        predictions = dict(zip(valid.nonzero()[0].tolist(), predicted))
+
+    ids = chunk[id_column].tolist() if id_column else None
+    rows = []
+    for index in range(len(batch)):
+        row = {"row": offset + index}
+        if ids is not None:
+            row["id"] = ids[index]
+        if index in predictions:
+            row["status"] = "success"
+            row["prediksi_harga"] = predictions[index]
+        else:
+            row["status"] = "error"
+            row["error"] = batch.errors.get(index, [])
+        rows.append(row)
+    return rows
+
+
+async def stream_scores(chunks: Iterator[pd.DataFrame], first_chunk: pd.DataFrame,
+                        numeric_columns: List[str], version: str, output_format: str,
+                        id_column: Optional[str] = None, on_close=None) -> AsyncIterator[str]:
+    """
+    Hasilkan output per chunk: chunk berikutnya baru dibaca setelah hasil
+    chunk sebelumnya dikirim ke client.
+    """
+    chunk, offset = first_chunk, 0
+    try:
+        while chunk is not None:
+            rows = await score_chunk(chunk, offset, numeric_columns, version, id_column)
+            yield format_rows(rows, output_format, header=offset == 0, id_column=id_column)
+            offset += len(chunk)
+            chunk = await run_in_threadpool(next, chunks, None)
+        logger.info(f"Bulk scoring finished: {offset} rows")
+    except Exception as e:
+        # Status HTTP sudah terkirim; laporkan kegagalan sebagai baris terakhir
+        logger.error(f"Bulk scoring failed after {offset} rows: {str(e)}")
+        failure = {"row": offset, "status": "error", "error": [{"field": "file", "message": str(e)}]}
+        yield format_rows([failure], output_format, header=offset == 0, id_column=id_column)
+    finally:
+        if on_close is not None:
+            await on_close()
@@ -0,0 +1,157 @@
+# ================================
+# app/core/columnar.py
+# ================================
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+CATEGORICAL_COLUMNS = ("kabupaten", "s_sertifikat")
+
+
+class ColumnarPayloadError(ValueError):
+    """Struktur payload columnar tidak valid (kolom hilang, panjang berbeda, dll)"""
+
+
+@lru_cache(maxsize=1)
+def field_constraints() -> Dict[str, Tuple[bool, Dict[str, float]]]:
+    """
+    Batasan per kolom numerik diambil dari `PropertyFeatures` sehingga
+    validasi columnar selalu sama dengan validasi per record:
+    nama -> (harus integer, {ge/gt/le/lt: nilai}).
+    """
+    from app.schemas.property import PropertyFeatures
+
+    constraints = {}
+    for name, field in PropertyFeatures.model_fields.items():
+        if name in CATEGORICAL_COLUMNS:
+            continue
+        bounds = {}
+        for item in field.metadata:
+            for key in ("ge", "gt", "le", "lt"):
+                if getattr(item, key, None) is not None:
+                    bounds[key] = getattr(item, key)
+        constraints[name] = (field.annotation is int, bounds)
+    return constraints
+
+
+class ColumnarBatch:
+    """Hasil validasi payload columnar; hanya baris `valid` yang boleh diprediksi"""
+
+    def __init__(self, numeric: np.ndarray, kabupaten: np.ndarray, sertifikat: np.ndarray,
+                 valid: np.ndarray, errors: Dict[int, List[Dict]]):
+        self.numeric = numeric
+        self.kabupaten = kabupaten
+        self.sertifikat = sertifikat
+        self.valid = valid
+        self.errors = errors
+
+    def __len__(self) -> int:
+        return self.valid.shape[0]
+
+
+def _add_errors(errors: Dict[int, List[Dict]], mask: np.ndarray, field: str, message: str):
+    for index in np.flatnonzero(mask).tolist():
+        errors.setdefault(index, []).append({"field": field, "message": message})
+
+
+def _numeric_column(values: List[Any], name: str, is_int: bool, bounds: Dict[str, float],
+                    errors: Dict[int, List[Dict]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Konversi satu kolom ke float64 dan cek tipe/rentang secara vektor"""
+    try:
+        # Jalur cepat: seluruh kolom berupa angka
+        column = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        column = None
+    if column is None or column.ndim != 1:
+        # Nilai campuran atau bersarang (list/dict) menjadi NaN per baris
+        series = pd.Series([None if isinstance(value, (list, tuple, dict, set)) else value for value in values],
+                           dtype=object)
+        column = pd.to_numeric(series, errors="coerce").to_numpy(dtype=np.float64)
+
+    invalid = ~np.isfinite(column)
+    _add_errors(errors, invalid, name, "Input should be a valid number")
+
+    checked = ~invalid
+    if is_int:
+        not_int = checked & (column != np.floor(np.where(checked, column, 0)))
+        _add_errors(errors, not_int, name, "Input should be a valid integer")
+        invalid |= not_int
+        checked &= ~not_int
+
+    for key, limit in bounds.items():
+        if key == "ge":
+            bad, message = column < limit, f"Input should be greater than or equal to {limit}"
+        elif key == "gt":
+            bad, message = column <= limit, f"Input should be greater than {limit}"
+        elif key == "le":
+            bad, message = column > limit, f"Input should be less than or equal to {limit}"
+        else:
+            bad, message = column >= limit, f"Input should be less than {limit}"
+        bad &= checked
+        _add_errors(errors, bad, name, message)
+        invalid |= bad
+
+    return column, invalid
+
+
+def _category_column(values: List[Any], name: str, allowed: frozenset,
+                     errors: Dict[int, List[Dict]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Cek kategori per nilai unik (lower, seperti validator PropertyFeatures)"""
+    column = np.empty(len(values), dtype=object)
+    # Nilai non-string (mis. list/dict yang tidak hashable) tidak valid; jadikan None sebelum factorize
+    column[:] = [value if isinstance(value, str) else None for value in values]
+    codes, uniques = pd.factorize(column, use_na_sentinel=False)
+    unique_ok = np.array(
+        [isinstance(value, str) and value.lower() in allowed for value in uniques] + [False], dtype=bool
+    )
+    invalid = ~unique_ok[codes]
+    _add_errors(
+        errors, invalid, name, f"{name} harus salah satu dari: {', '.join(sorted(allowed))}"
+    )
+    return column, invalid
+
+
+def validate_columns(columns: Dict[str, List[Any]], numeric_columns: List[str],
+                     allow_extra: bool = False) -> ColumnarBatch:
+    """
+    Validasi payload columnar dan susun matriks numerik (urutan `numeric_columns`).
+
+    Kesalahan struktur melempar `ColumnarPayloadError`; nilai yang tidak valid
+    dilaporkan per index baris tanpa menggagalkan baris lain. Dengan
+    `allow_extra`, kolom lain (mis. id dari file upload) diabaikan.
+    """
+    from app.schemas.property import ALLOWED_KABUPATEN, ALLOWED_SERTIFIKAT
+
+    expected = set(numeric_columns) | set(CATEGORICAL_COLUMNS)
+    missing = sorted(expected - set(columns))
+    if missing:
+        raise ColumnarPayloadError(f"Missing columns: {', '.join(missing)}")
+    unknown = sorted(set(columns) - expected)
+    if unknown and not allow_extra:
+        raise ColumnarPayloadError(f"Unknown columns: {', '.join(unknown)}")
+
+    lengths = {len(columns[name]) for name in expected}
+    if len(lengths) != 1:
+        raise ColumnarPayloadError("All columns must have the same length")
+    n = lengths.pop()
+    if n == 0:
+        raise ColumnarPayloadError("Columns must not be empty")
+
+    constraints = field_constraints()
+    errors: Dict[int, List[Dict]] = {}
+    invalid = np.zeros(n, dtype=bool)
+    numeric = np.empty((n, len(numeric_columns)), dtype=np.float64)
+
+    for i, name in enumerate(numeric_columns):
+        is_int, bounds = constraints[name]
+        numeric[:, i], column_invalid = _numeric_column(columns[name], name, is_int, bounds, errors)
+        invalid |= column_invalid
+
+    kabupaten, column_invalid = _category_column(columns["kabupaten"], "kabupaten", ALLOWED_KABUPATEN, errors)
+    invalid |= column_invalid
+    sertifikat, column_invalid = _category_column(columns["s_sertifikat"], "s_sertifikat", ALLOWED_SERTIFIKAT, errors)
+    invalid |= column_invalid
+
+    return ColumnarBatch(numeric, kabupaten, sertifikat, ~invalid, errors)
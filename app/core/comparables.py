@@ -0,0 +1,307 @@
+# ================================
+# app/core/comparables.py
+# ================================
+import logging
+import threading
+import time
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.feature_extraction import SOURCE_COLUMNS, ListingFeatureExtractor
+from app.core.ml_models import MLModelManager
+
+logger = logging.getLogger(__name__)
+
+
+class ComparablesIndex:
+    """
+    Index nearest neighbor in-memory atas fitur listing yang sudah di-scale
+    dengan StandardScaler model.
+
+    Vektor disimpan dalam satu matriks float32 kontigu (kapasitas tumbuh dua
+    kali lipat) beserta norma kuadratnya, sehingga pencarian adalah brute force
+    per blok: ||x||² - 2·X·q + ||q||² lalu argpartition top-k. Upsert dan
+    remove bersifat inkremental (hapus = tukar dengan baris terakhir).
+
+    Selama rebuild penuh, perubahan listing dicatat di log pending; log
+    tersebut diputar ulang ke array baru (dengan versi model baru) sebelum
+    array diganti, sehingga perubahan selama rebuild tidak hilang.
+    """
+
+    def __init__(self, n_features: int, block_size: int = 65536):
+        self.n_features = n_features
+        self.block_size = block_size
+        self.version: Optional[str] = None
+        self.built_at: Optional[float] = None
+        self._lock = threading.RLock()
+        # id -> row kolom SOURCE_COLUMNS (upsert) atau None (delete); None bila tidak sedang rebuild
+        self._pending: Optional[Dict[int, Optional[SimpleNamespace]]] = None
+        self._reset(0)
+
+    def _reset(self, capacity: int):
+        capacity = max(capacity, 1024)
+        self._ids = np.empty(capacity, dtype=np.int64)
+        self._vectors = np.empty((capacity, self.n_features), dtype=np.float32)
+        self._sq_norms = np.empty(capacity, dtype=np.float32)
+        self._positions: Dict[int, int] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def ready(self) -> bool:
+        return self.version is not None
+
+    def _grow(self, needed: int):
+        capacity = self._ids.shape[0]
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        self._ids = np.resize(self._ids, capacity)
+        self._sq_norms = np.resize(self._sq_norms, capacity)
+        vectors = np.empty((capacity, self.n_features), dtype=np.float32)
+        vectors[:self._size] = self._vectors[:self._size]
+        self._vectors = vectors
+
+    def begin_rebuild(self):
+        """Mulai mencatat perubahan listing untuk diputar ulang oleh `replace`"""
+        with self._lock:
+            self._pending = {}
+
+    def abort_rebuild(self):
+        """Rebuild gagal: berhenti mencatat, index lama tetap dipakai"""
+        with self._lock:
+            self._pending = None
+
+    def track(self, rows: Sequence = (), removed_ids: Sequence[int] = ()):
+        """Catat listing yang berubah/dihapus bila rebuild sedang berjalan"""
+        with self._lock:
+            if self._pending is None:
+                return
+            for row in rows:
+                # Salin kolom sekarang: instance ORM bisa expired/detached saat diputar ulang
+                self._pending[int(row.id)] = SimpleNamespace(**{c: getattr(row, c) for c in SOURCE_COLUMNS})
+            for property_id in removed_ids:
+                self._pending[int(property_id)] = None
+
+    def replace(self, ids: np.ndarray, vectors: np.ndarray, version: str,
+                vectorize: Optional[Callable[[List], Tuple[np.ndarray, np.ndarray]]] = None):
+        """
+        Ganti seluruh isi index (rebuild penuh).
+
+        Perubahan yang dicatat sejak `begin_rebuild` diterapkan ke array baru
+        sebelum swap; `vectorize(rows)` menghitung vektornya dengan versi baru.
+        Dijalankan di bawah lock agar tidak ada perubahan yang lolos di antara
+        replay dan swap (log hanya berisi perubahan selama rebuild, jadi kecil).
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.n_features)
+        with self._lock:
+            pending, self._pending = self._pending or {}, None
+            self._reset(len(ids))
+            n = len(ids)
+            self._ids[:n] = ids
+            self._vectors[:n] = vectors
+            self._sq_norms[:n] = np.einsum("ij,ij->i", vectors, vectors)
+            self._positions = dict(zip(ids.tolist(), range(n)))
+            self._size = n
+            self.version = version
+            self.built_at = time.time()
+
+            if pending and vectorize is not None:
+                rows = [row for row in pending.values() if row is not None]
+                replay_ids, replay_vectors = vectorize(rows) if rows else (np.empty(0, dtype=np.int64), None)
+                if len(replay_ids):
+                    self.upsert(replay_ids, replay_vectors)
+                # Dihapus, atau tidak lagi bisa dinilai
+                for property_id in set(pending) - set(replay_ids.tolist()):
+                    self.remove(property_id)
+                logger.info(f"Replayed {len(pending)} comparables updates made during rebuild")
+
+    def upsert(self, ids: Sequence[int], vectors: np.ndarray, version: Optional[str] = None):
+        """Tambah atau perbarui vektor listing; diabaikan bila `version` bukan versi index saat ini"""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.n_features)
+        with self._lock:
+            if version is not None and version != self.version:
+                # Vektor dihitung dengan scaler lama sebelum rebuild selesai; sudah diputar ulang oleh replace
+                return
+            self._grow(self._size + len(ids))
+            for property_id, vector in zip(ids, vectors):
+                property_id = int(property_id)
+                position = self._positions.get(property_id)
+                if position is None:
+                    position = self._size
+                    self._positions[property_id] = position
+                    self._ids[position] = property_id
+                    self._size += 1
+                self._vectors[position] = vector
+                self._sq_norms[position] = float(np.dot(vector, vector))
+
+    def remove(self, property_id: int):
+        """Hapus listing dari index"""
+        with self._lock:
+            position = self._positions.pop(int(property_id), None)
+            if position is None:
+                return
+            last = self._size - 1
+            if position != last:
+                moved_id = int(self._ids[last])
+                self._ids[position] = moved_id
+                self._vectors[position] = self._vectors[last]
+                self._sq_norms[position] = self._sq_norms[last]
+                self._positions[moved_id] = position
+            self._size -= 1
+
+    def search(self, query: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        """k listing terdekat (id, jarak euclidean) untuk satu vektor yang sudah di-scale"""
+        query = np.asarray(query, dtype=np.float32).reshape(self.n_features)
+        query_norm = float(np.dot(query, query))
+
+        with self._lock:
+            n = self._size
+            k = min(k, n)
+            if k == 0:
+                return []
+
+            best_ids = np.empty(0, dtype=np.int64)
+            best_distances = np.empty(0, dtype=np.float32)
+            for start in range(0, n, self.block_size):
+                stop = min(start + self.block_size, n)
+                distances = self._sq_norms[start:stop] - 2.0 * (self._vectors[start:stop] @ query) + query_norm
+                if stop - start > k:
+                    top = np.argpartition(distances, k - 1)[:k]
+                else:
+                    top = np.arange(stop - start)
+                best_ids = np.concatenate([best_ids, self._ids[start:stop][top]])
+                best_distances = np.concatenate([best_distances, distances[top]])
+
+        order = np.argsort(best_distances, kind="stable")[:k]
+        return [
+            (int(property_id), float(np.sqrt(max(distance, 0.0))))
+            for property_id, distance in zip(best_ids[order], best_distances[order])
+        ]
+
+    def stats(self) -> Dict:
+        return {
+            "ready": self.ready,
+            "size": self._size,
+            "model_version": self.version,
+            "built_at": self.built_at,
+            "nbytes": int(self._vectors[:self._size].nbytes),
+        }
+
+
+def listing_vectors(rows: Sequence, version: Optional[str] = None,
+                    extractor: Optional[ListingFeatureExtractor] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """(ids, vektor ter-scale) untuk listing yang bisa dinilai"""
+    model_manager = MLModelManager()
+    bundle = model_manager.get_bundle(version)
+    batch = (extractor or ListingFeatureExtractor()).extract(rows)
+    batch = batch.subset(batch.valid)
+    if not len(batch):
+        return batch.ids, np.empty((0, len(model_manager.feature_columns)), dtype=np.float32)
+    X = model_manager.preprocess_columns(batch.numeric, batch.kabupaten, batch.sertifikat, bundle)
+    return batch.ids, X
+
+
+# Satu rebuild pada satu waktu (startup dan setiap reload model bisa memicu rebuild)
+_build_lock = threading.Lock()
+
+
+def build_index(chunk_size: Optional[int] = None) -> Dict:
+    """Bangun ulang index dari seluruh tabel property (keyset per chunk)"""
+    with _build_lock:
+        try:
+            return _build_index(chunk_size)
+        except Exception:
+            comparables_index.abort_rebuild()
+            raise
+
+
+def _build_index(chunk_size: Optional[int] = None) -> Dict:
+    from app.database import SessionLocal
+    from app.models.property import PropertyModel
+
+    chunk_size = chunk_size or settings.VALUATION_CHUNK_SIZE
+    version = MLModelManager().get_bundle().version
+    extractor = ListingFeatureExtractor()
+    source_columns = [getattr(PropertyModel, column) for column in SOURCE_COLUMNS]
+
+    start = time.perf_counter()
+    all_ids, all_vectors = [], []
+    last_id = 0
+    # Dicatat sebelum scan: perubahan pada baris yang sudah terbaca tetap masuk
+    comparables_index.begin_rebuild()
+    db = SessionLocal()
+    try:
+        while True:
+            rows = (
+                db.query(*source_columns)
+                .filter(PropertyModel.id > last_id)
+                .order_by(PropertyModel.id)
+                .limit(chunk_size)
+                .all()
+            )
+            if not rows:
+                break
+            ids, vectors = listing_vectors(rows, version, extractor)
+            all_ids.append(ids)
+            all_vectors.append(np.asarray(vectors, dtype=np.float32))
+            last_id = rows[-1].id
+    finally:
+        db.close()
+
+    ids = np.concatenate(all_ids) if all_ids else np.empty(0, dtype=np.int64)
+    vectors = np.vstack(all_vectors) if all_vectors else np.empty((0, comparables_index.n_features), dtype=np.float32)
+    comparables_index.replace(ids, vectors, version, lambda rows: listing_vectors(rows, version, extractor))
+
+    stats = {**comparables_index.stats(), "duration_seconds": round(time.perf_counter() - start, 3)}
+    logger.info(f"Comparables index built: {stats}")
+    return stats
+
+
+def refresh_listing(property_model):
+    """Perbarui satu listing di index setelah create/update (tanpa scan tabel)"""
+    refresh_listings([property_model])
+
+
+def refresh_listings(rows: Sequence):
+    """Perbarui listing (PropertyModel atau row kolom `SOURCE_COLUMNS`) di index; yang tidak bisa dinilai dihapus"""
+    if not settings.COMPARABLES_ENABLED or not rows:
+        return
+    try:
+        comparables_index.track(rows=rows)
+        version = comparables_index.version
+        if version is None:
+            return
+        ids, vectors = listing_vectors(rows, version)
+        if len(ids):
+            comparables_index.upsert(ids, vectors, version)
+        for property_id in {row.id for row in rows} - set(ids.tolist()):
+            comparables_index.remove(property_id)
+    except Exception as e:
+        logger.warning(f"Failed to update comparables index for {len(rows)} properties: {str(e)}")
+
+
+def remove_listing(property_id: int):
+    """Hapus listing dari index setelah delete"""
+    if settings.COMPARABLES_ENABLED:
+        comparables_index.track(removed_ids=[property_id])
+        comparables_index.remove(property_id)
+
+
+def find_comparables(data: Dict, k: int) -> Tuple[str, List[Tuple[int, float]]]:
+    """Scale record PropertyFeatures dengan scaler versi index lalu cari k listing terdekat"""
+    model_manager = MLModelManager()
+    version = comparables_index.version
+    bundle = model_manager.get_bundle(version)
+    query = model_manager.preprocess_batch([data], bundle)[0]
+    return version, comparables_index.search(query, k)
+
+
+comparables_index = ComparablesIndex(n_features=len(MLModelManager().feature_columns))
@@ -6,6 +6,15 @@ load_dotenv()
 class Settings:
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL")
+    # Default: DATABASE_URL dengan driver async (asyncpg / aiosqlite)
+    ASYNC_DATABASE_URL: Optional[str] = os.getenv("ASYNC_DATABASE_URL") or None
+    
+    # Connection pool (berlaku untuk engine sync dan async, masing-masing punya pool sendiri)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # detik menunggu koneksi kosong
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # detik; -1 = tidak pernah
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
     
     # API
     API_V1_STR: str = "/api/v1"
@@ -14,5 +23,66 @@ class Settings:
     
     # CORS
     BACKEND_CORS_ORIGINS: list = ["*"]
+    
+    # ML model artifacts
+    MODEL_REPO_ID: str = os.getenv("MODEL_REPO_ID", "stevencmichael/Capstone_Project_SM079-LAI")
+    MODEL_ARTIFACT_DIR: Optional[str] = os.getenv("MODEL_ARTIFACT_DIR") or None  # direktori lokal, tanpa akses jaringan
+    MODEL_VERIFY_HASHES: bool = os.getenv("MODEL_VERIFY_HASHES", "true").lower() == "true"
+    MODEL_MMAP: bool = os.getenv("MODEL_MMAP", "true").lower() == "true"
+    # sklearn | compiled (tree ensemble diratakan ke array NumPy, estimator dilepas)
+    # | auto (compiled untuk batch kecil, sklearn untuk batch besar)
+    MODEL_ENGINE: str = os.getenv("MODEL_ENGINE", "sklearn")
+    MODEL_ENGINE_AUTO_MAX_ROWS: int = int(os.getenv("MODEL_ENGINE_AUTO_MAX_ROWS", "256"))
+    MODEL_REGISTRY_KEEP: int = int(os.getenv("MODEL_REGISTRY_KEEP", "2"))  # jumlah versi yang disimpan di memori
+    # Direktori induk artifact set yang boleh dipilih lewat POST /predict/admin/reload
+    MODEL_REGISTRY_ROOT: Optional[str] = os.getenv("MODEL_REGISTRY_ROOT") or None
+    
+    # Admin
+    ADMIN_TOKEN: Optional[str] = os.getenv("ADMIN_TOKEN") or None  # header X-Admin-Token untuk endpoint admin
+    
+    # Prediction
+    PREDICT_BATCH_MAX_SIZE: int = int(os.getenv("PREDICT_BATCH_MAX_SIZE", "5000"))
+    PREDICTION_CACHE_SIZE: int = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))  # 0 = nonaktif
+    PREDICTION_CACHE_TTL_SECONDS: float = float(os.getenv("PREDICTION_CACHE_TTL_SECONDS", "3600"))  # 0 = tanpa TTL
+    
+    # Inference pool
+    INFERENCE_EXECUTOR: str = os.getenv("INFERENCE_EXECUTOR", "thread")  # thread | process
+    INFERENCE_WORKERS: int = int(os.getenv("INFERENCE_WORKERS", "4"))
+    INFERENCE_QUEUE_SIZE: int = int(os.getenv("INFERENCE_QUEUE_SIZE", "256"))
+    
+    # Micro-batching untuk request /predict yang datang bersamaan
+    MICRO_BATCH_ENABLED: bool = os.getenv("MICRO_BATCH_ENABLED", "true").lower() == "true"
+    MICRO_BATCH_MAX_SIZE: int = int(os.getenv("MICRO_BATCH_MAX_SIZE", "64"))
+    MICRO_BATCH_MAX_WAIT_MS: float = float(os.getenv("MICRO_BATCH_MAX_WAIT_MS", "2"))
+    
+    # Upload file CSV/Parquet untuk bulk scoring
+    BULK_SCORING_CHUNK_SIZE: int = int(os.getenv("BULK_SCORING_CHUNK_SIZE", "5000"))
+    
+    # Harga prediksi tersimpan per listing (tabel property_valuation)
+    VALUATION_CHUNK_SIZE: int = int(os.getenv("VALUATION_CHUNK_SIZE", "1000"))
+    VALUATION_ON_WRITE: bool = os.getenv("VALUATION_ON_WRITE", "true").lower() == "true"
+    
+    # Jalankan migrasi skema saat startup (default: lewat `python -m app.migrations upgrade`)
+    MIGRATE_ON_STARTUP: bool = os.getenv("MIGRATE_ON_STARTUP", "false").lower() == "true"
+    
+    # Full-text search parameter filter (PostgreSQL tsvector / SQLite FTS5)
+    FULL_TEXT_SEARCH: bool = os.getenv("FULL_TEXT_SEARCH", "true").lower() == "true"
+    FULL_TEXT_SEARCH_CONFIG: str = os.getenv("FULL_TEXT_SEARCH_CONFIG", "simple")  # text search config PostgreSQL
+    
+    # Index trigram untuk filter substring location_text (pg_trgm / SQLite FTS5 trigram)
+    LOCATION_INDEX: bool = os.getenv("LOCATION_INDEX", "true").lower() == "true"
+    
+    # POST /properties/bulk
+    PROPERTIES_BULK_CHUNK_SIZE: int = int(os.getenv("PROPERTIES_BULK_CHUNK_SIZE", "1000"))  # item per transaksi
+    PROPERTIES_BULK_MAX_ITEMS: int = int(os.getenv("PROPERTIES_BULK_MAX_ITEMS", "100000"))
+    
+    # Total baris GET /properties: exact | cached | estimated | none
+    PROPERTIES_COUNT_STRATEGY: str = os.getenv("PROPERTIES_COUNT_STRATEGY", "exact")
+    PROPERTIES_COUNT_CACHE_SIZE: int = int(os.getenv("PROPERTIES_COUNT_CACHE_SIZE", "1000"))
+    PROPERTIES_COUNT_CACHE_TTL_SECONDS: float = float(os.getenv("PROPERTIES_COUNT_CACHE_TTL_SECONDS", "60"))
+    
+    # Index nearest neighbor in-memory untuk /predict/comparables
+    COMPARABLES_ENABLED: bool = os.getenv("COMPARABLES_ENABLED", "true").lower() == "true"
+    COMPARABLES_MAX_K: int = int(os.getenv("COMPARABLES_MAX_K", "50"))
 
 settings = Settings()
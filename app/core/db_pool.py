@@ -0,0 +1,156 @@
+# ================================
+# app/core/db_pool.py
+# ================================
+"""
+Konfigurasi dan metrik connection pool SQLAlchemy.
+
+Pool engine sync (QueuePool) dan async (AsyncAdaptedQueuePool) diganti
+subclass yang mengukur waktu mendapatkan koneksi (termasuk menunggu slot
+kosong dan membuka koneksi baru) ke histogram, serta menghitung overflow,
+timeout dan invalidasi (misalnya koneksi yang diputus load balancer dan
+terdeteksi pre-ping).
+"""
+import threading
+import time
+from typing import Dict, List
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.config import settings
+
+# Batas atas bucket histogram waktu tunggu (ms); bucket terakhir tanpa batas
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class PoolMetrics:
+    """Counter pool; diubah dari thread mana pun sehingga dijaga lock"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.overflows = 0
+        self.timeouts = 0
+        self.invalidations = 0
+        self.soft_invalidations = 0
+        self.peak_checked_out = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self._wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def observe_wait(self, seconds: float, checked_out: int = 0, timed_out: bool = False):
+        milliseconds = seconds * 1000
+        bucket = next((i for i, bound in enumerate(WAIT_BUCKETS_MS) if milliseconds <= bound), len(WAIT_BUCKETS_MS))
+        with self._lock:
+            self._wait_buckets[bucket] += 1
+            self.total_wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+
+    def count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def wait_histogram(self) -> List[Dict]:
+        bounds = [f"le_{bound}ms" for bound in WAIT_BUCKETS_MS] + ["gt_%dms" % WAIT_BUCKETS_MS[-1]]
+        return [{"bucket": bound, "count": count} for bound, count in zip(bounds, self._wait_buckets)]
+
+    def stats(self, pool) -> Dict:
+        """Metrik kumulatif + keadaan pool saat ini"""
+        observed = sum(self._wait_buckets)
+        return {
+            "pool_class": type(pool).__name__,
+            "pool_size": pool.size(),
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "timeout_seconds": pool.timeout(),
+            "recycle_seconds": settings.DB_POOL_RECYCLE,
+            "pre_ping": settings.DB_POOL_PRE_PING,
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(0, pool.overflow()),
+            "peak_checked_out": self.peak_checked_out,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "connects": self.connects,
+            "overflow_events": self.overflows,
+            "timeouts": self.timeouts,
+            "invalidations": self.invalidations,
+            "soft_invalidations": self.soft_invalidations,
+            "wait": {
+                "count": observed,
+                "total_seconds": self.total_wait_seconds,
+                "mean_ms": self.total_wait_seconds * 1000 / observed if observed else 0.0,
+                "max_ms": self.max_wait_seconds * 1000,
+                "histogram": self.wait_histogram(),
+            },
+        }
+
+
+class InstrumentedPoolMixin:
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.observe_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        self.metrics.observe_wait(time.perf_counter() - started, checked_out=self.checkedout())
+        return connection
+
+    def _inc_overflow(self):
+        # Koneksi baru di atas pool_size
+        incremented = super()._inc_overflow()
+        if incremented and self.overflow() > 0:
+            self.metrics.count("overflows")
+        return incremented
+
+
+def instrumented_pool_class(base, metrics: PoolMetrics):
+    """
+    Subclass pool per engine. Metrik disimpan di class (bukan instance)
+    karena `engine.dispose()` membuat instance pool baru dari class yang sama.
+    """
+    return type(f"Instrumented{base.__name__}", (InstrumentedPoolMixin, base), {"metrics": metrics})
+
+
+def listen_pool_events(engine, metrics: PoolMetrics):
+    event.listen(engine, "checkin", lambda *args: metrics.count("checkins"))
+    event.listen(engine, "connect", lambda *args: metrics.count("connects"))
+    event.listen(engine, "invalidate", lambda *args: metrics.count("invalidations"))
+    event.listen(engine, "soft_invalidate", lambda *args: metrics.count("soft_invalidations"))
+
+
+def pool_options(url, metrics: PoolMetrics, is_async: bool = False) -> Dict:
+    """
+    Argumen pool untuk create_engine / create_async_engine dari Settings.
+
+    SQLite in-memory memakai pool bawaan dialect (satu koneksi per proses/thread)
+    sehingga tidak dikonfigurasi.
+    """
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": instrumented_pool_class(AsyncAdaptedQueuePool if is_async else QueuePool, metrics),
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def pool_stats(engine, metrics: PoolMetrics) -> Dict:
+    if not isinstance(engine.pool, InstrumentedPoolMixin):
+        return {"pool_class": type(engine.pool).__name__, "instrumented": False}
+    return metrics.stats(engine.pool)
@@ -0,0 +1,351 @@
+# ================================
+# app/core/feature_extraction.py
+# ================================
+import re
+from functools import lru_cache
+from operator import attrgetter
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Kolom fasilitas yang dipakai model (tanpa prefix f_)
+FACILITY_FLAGS = [
+    'taman', 'jogging_track', 'cctv', 'lapangan_voli', 'lapangan_bola',
+    'lapangan_basket', 'lapangan_bulu_tangkis', 'tempat_jemuran', 'kulkas',
+    'telepon', 'tempat_cuci', 'laundry', 'masjid', 'taman_bermain',
+    'kolam_renang', 'mesin_cuci', 'kompor', 'keamanan_24_jam', 'kolam_ikan',
+    'backyard', 'kitchen_set', 'teras', 'wastafel', 'akses_parkir',
+    'lapangan_tenis', 'tempat_gym', 'ac', 'water_heater', 'one_gate_system'
+]
+
+# Penulisan fasilitas lain yang sering muncul di listing
+FACILITY_ALIASES = {
+    'gym': 'tempat_gym',
+    'pusat_kebugaran': 'tempat_gym',
+    'swimming_pool': 'kolam_renang',
+    'keamanan': 'keamanan_24_jam',
+    'security': 'keamanan_24_jam',
+    'security_24_jam': 'keamanan_24_jam',
+    'parkir': 'akses_parkir',
+    'taman_bermain_anak': 'taman_bermain',
+    'playground': 'taman_bermain',
+    'mushola': 'masjid',
+    'musholla': 'masjid',
+    'air_conditioner': 'ac',
+    'pemanas_air': 'water_heater',
+    'one_gate': 'one_gate_system',
+}
+
+KABUPATEN = ["jakarta barat", "jakarta pusat", "jakarta selatan", "jakarta timur", "jakarta utara"]
+
+# Bagian provinsi di akhir location_text diabaikan saat menentukan kabupaten/kota
+PROVINSI = frozenset([
+    "dki jakarta", "jakarta", "banten", "jawa barat", "jawa tengah", "jawa timur",
+    "di yogyakarta", "yogyakarta", "bali", "sumatera utara", "sumatera barat",
+    "sumatera selatan", "kalimantan timur", "sulawesi selatan", "riau", "lampung",
+])
+
+SERTIFIKAT = ["adat", "girik", "hak pakai", "hak sewa", "hgb", "hgu", "lainnya", "ppjb", "shm", "strata"]
+
+# Kategori POI pada nearby_points_of_interest_text -> kolom poi_*
+POI_KEYWORDS = {
+    'poi_perbelanjaan': ['perbelanjaan', 'belanja', 'mall', 'pasar', 'supermarket', 'minimarket', 'shopping'],
+    'poi_sekolah': ['sekolah', 'pendidikan', 'school', 'universitas', 'kampus', 'university'],
+    'poi_transportasi': ['transportasi', 'stasiun', 'halte', 'terminal', 'bandara', 'tol', 'transport', 'krl', 'mrt', 'lrt'],
+}
+
+# Jarak (km) yang dipakai bila listing tidak mencantumkan jarak POI
+POI_DEFAULT_DISTANCE_KM = 1.0
+
+# Kolom numerik model, urutannya sama dengan MLModelManager.feature_columns
+NUMERIC_COLUMNS = (
+    [f"f_{flag}" for flag in FACILITY_FLAGS]
+    + ['s_jumlah_lantai', 's_kamar_mandi', 's_kamar_tidur', 's_luas_bangunan', 's_luas_tanah']
+    + list(POI_KEYWORDS)
+)
+
+# Kolom PropertyModel yang dibutuhkan extractor
+SOURCE_COLUMNS = [
+    'id', 'price_numeric', 'location_text', 'facilities', 'land_area', 'building_area',
+    'certificate_type', 'number_of_floors', 'bathrooms', 'bedrooms', 'nearby_points_of_interest_text'
+]
+
+_AREA_PATTERN = re.compile(r'\d[\d.,]*')
+_AREA_THOUSANDS = re.compile(r'\d{1,3}(?:\.\d{3})+(?:,\d+)?')
+_KABUPATEN_PATTERN = re.compile('|'.join(re.escape(k) for k in KABUPATEN))
+_AREA_PREFIX = re.compile(r'^(?:kota|kabupaten|kab\.?|kecamatan|kec\.?)\s+')
+_WHITESPACE = re.compile(r'\s+')
+_SERTIFIKAT_PATTERNS = [(s, re.compile(rf'\b{s}\b')) for s in SERTIFIKAT]
+_DISTANCE_PATTERN = re.compile(r'(\d+(?:[.,]\d+)?)\s*(km|m)\b', re.IGNORECASE)
+
+
+def normalize_facility(name: str) -> Optional[str]:
+    """Nama fasilitas listing -> nama kolom f_* (atau None bila tidak dipakai model)"""
+    key = re.sub(r'[^a-z0-9]+', '_', name.lower()).strip('_')
+    key = FACILITY_ALIASES.get(key, key)
+    return f"f_{key}" if key in FACILITY_FLAGS else None
+
+
+def parse_area(text) -> float:
+    """'1.200 m²' -> 1200.0, '120,5 m2' -> 120.5; NaN bila tidak bisa dibaca"""
+    if text is None:
+        return np.nan
+    if isinstance(text, (int, float)):
+        return float(text)
+    match = _AREA_PATTERN.search(str(text))
+    if not match:
+        return np.nan
+    number = match.group(0).rstrip('.,')
+    if _AREA_THOUSANDS.fullmatch(number):
+        # Titik sebagai pemisah ribuan
+        number = number.replace('.', '')
+    try:
+        return float(number.replace(',', '.'))
+    except ValueError:
+        return np.nan
+
+
+def extract_kabupaten(location_text: Optional[str]) -> Optional[str]:
+    """Cari nama kabupaten/kota di location_text"""
+    if not location_text:
+        return None
+    match = _KABUPATEN_PATTERN.search(location_text.lower())
+    return match.group(0) if match else None
+
+
+def normalize_area(name: Optional[str]) -> Optional[str]:
+    """'  Kota  Jakarta Selatan ' -> 'jakarta selatan' (key wilayah untuk filter equality)"""
+    if not name:
+        return None
+    name = _WHITESPACE.sub(' ', name.strip().lower())
+    name = _AREA_PREFIX.sub('', name)
+    return name or None
+
+
+def parse_location(location_text: Optional[str]) -> tuple:
+    """
+    (kabupaten, kecamatan) ternormalisasi dari location_text
+    '[Kelurahan,] Kecamatan, Kota[, Provinsi]'.
+
+    Kota Jakarta dikenali di bagian mana pun; selain itu bagian terakhir
+    (setelah provinsi dibuang) dianggap kabupaten/kota dan bagian sebelumnya
+    kecamatan.
+    """
+    parts = [normalize_area(part) for part in (location_text or '').split(',')]
+    parts = [part for part in parts if part]
+    if len(parts) > 1 and parts[-1] in PROVINSI:
+        parts.pop()
+    if not parts:
+        return None, None
+    kabupaten = extract_kabupaten(location_text)
+    position = next((i for i, part in enumerate(parts) if kabupaten and kabupaten in part), None)
+    if position is None:
+        kabupaten, position = parts[-1], len(parts) - 1
+    kecamatan = parts[position - 1] if position > 0 else None
+    return kabupaten, kecamatan
+
+
+def normalize_sertifikat(certificate_type: Optional[str]) -> str:
+    """'SHM - Sertifikat Hak Milik' -> 'shm'; tidak dikenal -> 'lainnya'"""
+    if not certificate_type:
+        return "lainnya"
+    text = certificate_type.lower()
+    for sertifikat, pattern in _SERTIFIKAT_PATTERNS:
+        if pattern.search(text):
+            return sertifikat
+    return "lainnya"
+
+
+@lru_cache(maxsize=4096)
+def poi_column(category: str) -> Optional[str]:
+    """Nama kategori POI -> kolom poi_* (atau None)"""
+    category = category.strip().lower()
+    for column, keywords in POI_KEYWORDS.items():
+        if any(keyword in category for keyword in keywords):
+            return column
+    return None
+
+
+def parse_poi_distances(poi_text: Optional[str]) -> List[float]:
+    """Jarak terdekat (km) per kolom poi_*; default bila tidak ada jarak di teks"""
+    distances = {column: POI_DEFAULT_DISTANCE_KM for column in POI_KEYWORDS}
+    # Sebagian besar listing hanya menyebut nama tempat tanpa jarak
+    if poi_text and _DISTANCE_PATTERN.search(poi_text):
+        found: Dict[str, List[float]] = {}
+        for entry in poi_text.split(';'):
+            category, separator, items = entry.partition(':')
+            column = poi_column(category) if separator else None
+            if column is None:
+                continue
+            found.setdefault(column, []).extend(
+                float(value.replace(',', '.')) / (1000 if unit.lower() == 'm' else 1)
+                for value, unit in _DISTANCE_PATTERN.findall(items)
+            )
+        distances.update({column: min(values) for column, values in found.items() if values})
+    return [distances[column] for column in POI_KEYWORDS]
+
+
+def split_facilities(facilities) -> List[str]:
+    """Kolom facilities (list JSON atau string dipisah ';'/',') -> daftar nama"""
+    if not facilities:
+        return []
+    if isinstance(facilities, str):
+        separator = ';' if ';' in facilities else ','
+        return [f.strip() for f in facilities.split(separator) if f.strip()]
+    names = []
+    for item in facilities:
+        if isinstance(item, str):
+            names.extend(f.strip() for f in item.split(';') if f.strip())
+    return names
+
+
+def _factorize(values: List):
+    """Kode per baris dan daftar nilai unik (None menjadi kode -1)"""
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=True)
+    return codes, list(uniques)
+
+
+class ListingFeatureBatch:
+    """
+    Fitur model untuk satu batch listing dalam bentuk kolom.
+
+    `numeric` berisi 37 kolom numerik dengan urutan `NUMERIC_COLUMNS`;
+    `kabupaten` dan `sertifikat` belum di-encode. Baris dengan `valid` False
+    tidak bisa dinilai (kabupaten tidak dikenali atau luas tidak terbaca).
+    """
+
+    def __init__(self, ids: np.ndarray, prices: np.ndarray, numeric: np.ndarray,
+                 kabupaten: np.ndarray, sertifikat: np.ndarray, valid: np.ndarray):
+        self.ids = ids
+        self.prices = prices
+        self.numeric = numeric
+        self.kabupaten = kabupaten
+        self.sertifikat = sertifikat
+        self.valid = valid
+
+    def __len__(self) -> int:
+        return self.ids.shape[0]
+
+    def subset(self, mask: np.ndarray) -> "ListingFeatureBatch":
+        return ListingFeatureBatch(
+            self.ids[mask], self.prices[mask], self.numeric[mask],
+            self.kabupaten[mask], self.sertifikat[mask], self.valid[mask]
+        )
+
+    def to_records(self) -> List[Dict]:
+        """Record dengan format PropertyFeatures (untuk jalur preprocessing pandas)"""
+        records = []
+        for values, kabupaten, sertifikat in zip(self.numeric.tolist(), self.kabupaten, self.sertifikat):
+            record = dict(zip(NUMERIC_COLUMNS, values))
+            record["kabupaten"] = kabupaten
+            record["s_sertifikat"] = sertifikat
+            records.append(record)
+        return records
+
+
+class ListingFeatureExtractor:
+    """
+    Ubah baris PropertyModel menjadi fitur model per kolom.
+
+    Kolom teks listing sangat berulang (luas, sertifikat, daftar fasilitas,
+    teks POI), jadi setiap kolom di-factorize terlebih dulu: nilai unik
+    di-parse sekali, hasilnya disusun menjadi array lalu disebar ke seluruh
+    baris dengan indexing NumPy. Regex dikompilasi sekali di level modul dan
+    nama fasilitas dipetakan ke index kolom lewat map yang disimpan antar batch.
+    """
+
+    def __init__(self):
+        self.column_index = {column: i for i, column in enumerate(NUMERIC_COLUMNS)}
+        self.facility_slice = slice(0, len(FACILITY_FLAGS))
+        self.poi_index = [self.column_index[column] for column in POI_KEYWORDS]
+        self._facility_map: Dict[str, int] = {}
+
+    def _facility_index(self, name: str) -> int:
+        index = self._facility_map.get(name)
+        if index is None:
+            column = normalize_facility(name)
+            index = self._facility_map[name] = self.column_index[column] if column else -1
+        return index
+
+    def _facility_flags(self, facilities) -> np.ndarray:
+        flags = np.zeros(len(FACILITY_FLAGS), dtype=np.float64)
+        for name in split_facilities(facilities):
+            index = self._facility_index(name)
+            if index >= 0:
+                flags[index] = 1.0
+        return flags
+
+    @staticmethod
+    def _broadcast(codes: np.ndarray, parsed: List, fill, dtype) -> np.ndarray:
+        """Sebar hasil parse nilai unik ke setiap baris; kode -1 (None) memakai `fill`"""
+        table = np.array(list(parsed) + [fill], dtype=dtype)
+        return table[codes]
+
+    def extract(self, rows: Sequence) -> ListingFeatureBatch:
+        """Ekstrak fitur dari PropertyModel atau row hasil query kolom `SOURCE_COLUMNS`"""
+        getter = attrgetter(*SOURCE_COLUMNS)
+        columns = dict(zip(SOURCE_COLUMNS, zip(*map(getter, rows)))) if rows else {
+            column: () for column in SOURCE_COLUMNS
+        }
+        n = len(rows)
+        numeric = np.empty((n, len(NUMERIC_COLUMNS)), dtype=np.float64)
+        index = self.column_index
+
+        # Fasilitas: list JSON tidak hashable, factorize dengan key tuple
+        facilities = [tuple(value) if isinstance(value, list) else value for value in columns['facilities']]
+        codes, uniques = _factorize(facilities)
+        flags = np.vstack([self._facility_flags(value) for value in uniques] + [np.zeros(len(FACILITY_FLAGS))])
+        numeric[:, self.facility_slice] = flags[codes]
+
+        for column, source in (('s_jumlah_lantai', 'number_of_floors'),
+                               ('s_kamar_mandi', 'bathrooms'),
+                               ('s_kamar_tidur', 'bedrooms')):
+            numeric[:, index[column]] = np.array(
+                [value or 0 for value in columns[source]], dtype=np.float64
+            ).reshape(n)
+
+        for column, source in (('s_luas_bangunan', 'building_area'), ('s_luas_tanah', 'land_area')):
+            codes, uniques = _factorize(list(columns[source]))
+            numeric[:, index[column]] = self._broadcast(
+                codes, [parse_area(value) for value in uniques], np.nan, np.float64
+            )
+
+        codes, uniques = _factorize(list(columns['nearby_points_of_interest_text']))
+        distances = [parse_poi_distances(value) for value in uniques]
+        default = [POI_DEFAULT_DISTANCE_KM] * len(POI_KEYWORDS)
+        numeric[:, self.poi_index] = np.array(distances + [default], dtype=np.float64).reshape(-1, len(default))[codes]
+
+        codes, uniques = _factorize(list(columns['location_text']))
+        kabupaten = self._broadcast(codes, [extract_kabupaten(value) for value in uniques], None, object)
+
+        codes, uniques = _factorize(list(columns['certificate_type']))
+        sertifikat = self._broadcast(codes, [normalize_sertifikat(value) for value in uniques], "lainnya", object)
+
+        building = numeric[:, index['s_luas_bangunan']]
+        land = numeric[:, index['s_luas_tanah']]
+        valid = (kabupaten != None) & (building > 0) & (land > 0)  # noqa: E711
+
+        return ListingFeatureBatch(
+            ids=np.array(columns['id'], dtype=np.int64).reshape(n),
+            prices=np.array(
+                [np.nan if value is None else value for value in columns['price_numeric']], dtype=np.float64
+            ).reshape(n),
+            numeric=numeric,
+            kabupaten=np.where(valid, kabupaten, ""),
+            sertifikat=sertifikat,
+            valid=valid
+        )
+
+
+def extract_features(property_model) -> Optional[Dict]:
+    """
+    Ubah satu baris PropertyModel menjadi dict fitur dengan format PropertyFeatures.
+
+    Return None bila baris tidak bisa dinilai (kabupaten tidak dikenali atau
+    luas tidak bisa dibaca).
+    """
+    batch = ListingFeatureExtractor().extract([property_model])
+    if not batch.valid[0]:
+        return None
+    return batch.to_records()[0]
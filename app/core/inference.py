@@ -0,0 +1,198 @@
+# ================================
+# app/core/inference.py
+# ================================
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.ml_models import MLModelManager
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceQueueFullError(RuntimeError):
+    """Antrian inferensi penuh, request harus ditolak"""
+
+
+def _timed_call(fn: Callable, *args) -> Tuple[Any, float, float]:
+    # time.monotonic memakai CLOCK_MONOTONIC sehingga tetap bisa dibandingkan
+    # dengan waktu submit walaupun dijalankan di proses worker
+    started_at = time.monotonic()
+    result = fn(*args)
+    return result, started_at, time.monotonic()
+
+
+def predict_records(records: List[Dict], version: Optional[str] = None) -> List[float]:
+    """Fungsi level modul agar bisa dikirim ke process pool"""
+    return MLModelManager().predict_records(records, version)
+
+
+def predict_uncached(records: List[Dict], version: Optional[str] = None) -> List[float]:
+    """Seperti `predict_records` tetapi tanpa cache (cache dikelola pemanggil)"""
+    return MLModelManager().predict_uncached(records, version)
+
+
+def predict_columns(numeric: np.ndarray, kabupaten, sertifikat, version: Optional[str] = None) -> List[float]:
+    """Prediksi batch columnar (lihat `MLModelManager.predict_columns`)"""
+    return MLModelManager().predict_columns(numeric, kabupaten, sertifikat, version)
+
+
+def model_version_available(version: str) -> int:
+    """Cek di worker bahwa `version` ada di registry model proses tersebut; return pid"""
+    MLModelManager().get_bundle(version)
+    return os.getpid()
+
+
+class InferenceExecutor:
+    """
+    Menjalankan inferensi CPU-bound di thread/process pool agar event loop
+    uvicorn tidak terblokir.
+
+    Jumlah pekerjaan yang menunggu dibatasi `max_queue_size`; bila penuh
+    `InferenceQueueFullError` dilempar. Waktu tunggu di antrian dan waktu
+    komputasi dicatat terpisah untuk metrik.
+    """
+
+    def __init__(self, mode: str = "thread", max_workers: int = 4, max_queue_size: int = 256,
+                 metrics_window: int = 1000):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Unknown inference executor mode: {mode}")
+        self.mode = mode
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self._executor: Optional[Executor] = None
+
+        # Semua counter hanya diubah dari event loop, sehingga tidak perlu lock
+        self._in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+        self.total_compute_seconds = 0.0
+        self._wait_samples = deque(maxlen=metrics_window)
+        self._compute_samples = deque(maxlen=metrics_window)
+
+    def _new_executor(self) -> Executor:
+        if self.mode == "process":
+            return ProcessPoolExecutor(max_workers=self.max_workers)
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inference")
+
+    def _get_executor(self) -> Executor:
+        # Pool dibuat saat pertama dipakai, setelah model dimuat, sehingga worker
+        # proses (fork) mewarisi model yang sudah ada di memori
+        if self._executor is None:
+            self._executor = self._new_executor()
+        return self._executor
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """Jalankan `fn(*args)` di pool dan tunggu hasilnya tanpa memblokir event loop"""
+        if self._in_flight >= self.max_queue_size + self.max_workers:
+            self.rejected += 1
+            raise InferenceQueueFullError(
+                f"Inference queue is full ({self.max_queue_size} pending requests)"
+            )
+
+        self._in_flight += 1
+        self.submitted += 1
+        submitted_at = time.monotonic()
+        try:
+            loop = asyncio.get_running_loop()
+            result, started_at, finished_at = await loop.run_in_executor(
+                self._get_executor(), _timed_call, fn, *args
+            )
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self._in_flight -= 1
+
+        wait_seconds = max(0.0, started_at - submitted_at)
+        compute_seconds = finished_at - started_at
+        self.completed += 1
+        self.total_wait_seconds += wait_seconds
+        self.total_compute_seconds += compute_seconds
+        self._wait_samples.append(wait_seconds)
+        self._compute_samples.append(compute_seconds)
+        return result
+
+    @staticmethod
+    def _summarize(samples) -> Dict:
+        if not samples:
+            return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        values = np.fromiter(samples, dtype=np.float64) * 1000
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        return {
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+            "max_ms": float(values.max()),
+        }
+
+    def stats(self) -> Dict:
+        """Metrik pool: kedalaman antrian, waktu tunggu vs waktu komputasi"""
+        return {
+            "mode": self.mode,
+            "max_workers": self.max_workers,
+            "max_queue_size": self.max_queue_size,
+            "in_flight": self._in_flight,
+            "queue_depth": max(0, self._in_flight - self.max_workers),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "total_wait_seconds": self.total_wait_seconds,
+            "total_compute_seconds": self.total_compute_seconds,
+            "wait": self._summarize(self._wait_samples),
+            "compute": self._summarize(self._compute_samples),
+        }
+
+    async def restart(self, version: str):
+        """
+        Ganti pool mode process dengan pool baru yang sudah memegang `version`.
+
+        Dipanggil saat hot swap setelah bundle baru didaftarkan tetapi sebelum
+        diaktifkan. Worker baru di-fork dan dicek memegang versi tersebut
+        sebelum pool diganti; selama itu request tetap dilayani pool lama
+        dengan versi aktif lama. Worker lama menyelesaikan antriannya tanpa
+        ditunggu. Mode thread berbagi registry dengan proses utama sehingga
+        tidak perlu restart.
+        """
+        if self.mode != "process" or self._executor is None:
+            # Pool belum dibuat: worker pertama di-fork dari registry yang sudah berisi versi baru
+            return
+
+        executor = self._new_executor()
+        try:
+            # Dengan start method fork seluruh worker dibuat pada submit pertama
+            loop = asyncio.get_running_loop()
+            pids = await asyncio.gather(*(
+                loop.run_in_executor(executor, model_version_available, version)
+                for _ in range(self.max_workers)
+            ))
+        except Exception:
+            executor.shutdown(wait=False)
+            raise
+
+        previous, self._executor = self._executor, executor
+        previous.shutdown(wait=False)
+        logger.info(f"Inference process pool restarted with model version {version} (workers {sorted(set(pids))})")
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+inference_executor = InferenceExecutor(
+    mode=settings.INFERENCE_EXECUTOR,
+    max_workers=settings.INFERENCE_WORKERS,
+    max_queue_size=settings.INFERENCE_QUEUE_SIZE
+)
@@ -0,0 +1,56 @@
+# ================================
+# app/core/listing_identity.py
+# ================================
+"""
+Identitas listing hasil scraping.
+
+- `normalize_source_url`: key unik listing (kolom `source_url_key`). Varian URL
+  yang menunjuk halaman yang sama (http/https, www, huruf besar host, slash
+  di akhir, fragment, parameter tracking, urutan query) menghasilkan key sama.
+- `content_hash`: sha256 isi listing (kolom `content_hash`), untuk mendeteksi
+  apakah hasil scraping ulang benar-benar berubah.
+"""
+import hashlib
+import json
+from typing import Any, Dict
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+# Parameter query yang tidak mengubah halaman listing
+TRACKING_PARAMS = ("fbclid", "gclid")
+TRACKING_PREFIXES = ("utm_",)
+
+# Kolom isi listing yang di-hash (tanpa id, key turunan dan timestamp)
+CONTENT_COLUMNS = (
+    "title", "description", "monthly_installment_info", "price_display", "price_numeric",
+    "location_text", "estimated_savings", "posted_by", "property_type", "facilities",
+    "bedrooms", "bathrooms", "land_area", "building_area", "carport_capacity",
+    "certificate_type", "electricity_power", "maid_bedrooms", "maid_bathrooms",
+    "number_of_floors", "property_condition", "nearby_points_of_interest_text",
+)
+
+
+def normalize_source_url(url: str) -> str:
+    """'https://WWW.Portal.com/listing/123/?utm_source=x#foto' → 'portal.com/listing/123'"""
+    url = (url or "").strip()
+    parts = urlsplit(url if "://" in url else f"//{url}")
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path.rstrip("/")
+    query = sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if name.lower() not in TRACKING_PARAMS and not name.lower().startswith(TRACKING_PREFIXES)
+    )
+    return host + path + (f"?{urlencode(query)}" if query else "")
+
+
+def content_hash(values: Dict[str, Any]) -> str:
+    """Hash isi listing dari dict kolom (row insert atau atribut PropertyModel)"""
+    content = [values.get(column) for column in CONTENT_COLUMNS]
+    # float agar 2e9 dari JSON dan 2000000000 dari database menghasilkan hash sama
+    content[CONTENT_COLUMNS.index("price_numeric")] = float(values.get("price_numeric") or 0)
+    payload = json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
@@ -0,0 +1,136 @@
+# ================================
+# app/core/location.py
+# ================================
+"""
+Index untuk filter lokasi GET /properties.
+
+- `location_text` (substring): PostgreSQL memakai index GIN trigram (pg_trgm)
+  yang dipakai planner langsung untuk ILIKE '%...%'; SQLite memakai tabel
+  shadow FTS5 dengan tokenizer trigram (`property_location_fts`) yang juga
+  menjawab LIKE '%...%' dari index. Pola di bawah 3 karakter tidak bisa
+  dilayani trigram dan tetap memakai ILIKE biasa.
+- `kabupaten`/`kecamatan`: kolom ternormalisasi ber-index B-tree, diisi
+  dari location_text saat ditulis (lihat `parse_location`).
+"""
+import logging
+
+from sqlalchemy import Select, bindparam, inspect, select, text
+from sqlalchemy.engine import Connection
+
+from app.core.config import settings
+from app.core.feature_extraction import parse_location
+from app.models.property import PropertyModel
+
+logger = logging.getLogger(__name__)
+
+TRIGRAM_MIN_LENGTH = 3
+
+POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_property_location_text_trgm ON property USING gin (location_text gin_trgm_ops)",
+]
+
+SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS property_location_fts USING fts5(
+        location_text, content='property', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS property_location_fts_ai AFTER INSERT ON property BEGIN
+        INSERT INTO property_location_fts(rowid, location_text) VALUES (new.id, new.location_text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS property_location_fts_ad AFTER DELETE ON property BEGIN
+        INSERT INTO property_location_fts(property_location_fts, rowid, location_text)
+        VALUES ('delete', old.id, old.location_text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS property_location_fts_au AFTER UPDATE OF location_text ON property BEGIN
+        INSERT INTO property_location_fts(property_location_fts, rowid, location_text)
+        VALUES ('delete', old.id, old.location_text);
+        INSERT INTO property_location_fts(rowid, location_text) VALUES (new.id, new.location_text);
+    END
+    """,
+]
+
+
+def location_index_enabled(dialect_name: str) -> bool:
+    return settings.LOCATION_INDEX and dialect_name in ("postgresql", "sqlite")
+
+
+def backfill_location_keys(conn: Connection, chunk_size: int = 1000) -> int:
+    """Isi kabupaten/kecamatan untuk listing lama (keyset per chunk)"""
+    table = PropertyModel.__table__
+    update = table.update().where(table.c.id == bindparam("row_id")).values(
+        kabupaten=bindparam("new_kabupaten"), kecamatan=bindparam("new_kecamatan")
+    )
+    updated, last_id = 0, 0
+    while True:
+        rows = conn.execute(
+            select(table.c.id, table.c.location_text)
+            .where(table.c.id > last_id)
+            .order_by(table.c.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+        params = []
+        for row in rows:
+            kabupaten, kecamatan = parse_location(row.location_text)
+            params.append({"row_id": row.id, "new_kabupaten": kabupaten, "new_kecamatan": kecamatan})
+        conn.execute(update, params)
+        updated += len(rows)
+        last_id = rows[-1].id
+    return updated
+
+
+def add_location_keys(conn: Connection):
+    """Tambah kolom key wilayah pada tabel lama lalu isi dari location_text"""
+    columns = {column["name"] for column in inspect(conn).get_columns("property")}
+    missing = [name for name in ("kabupaten", "kecamatan") if name not in columns]
+    if not missing:
+        return
+    for name in missing:
+        conn.exec_driver_sql(f"ALTER TABLE property ADD COLUMN {name} VARCHAR")
+        conn.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS ix_property_{name} ON property ({name})")
+    logger.info(f"Backfilled location keys for {backfill_location_keys(conn)} properties")
+
+
+def setup_location_index(conn: Connection):
+    """Index substring location_text sesuai dialect"""
+    dialect_name = conn.dialect.name
+    if not location_index_enabled(dialect_name):
+        return
+
+    if dialect_name == "postgresql":
+        try:
+            # Savepoint: kegagalan CREATE EXTENSION tidak membatalkan migrasi lain
+            with conn.begin_nested():
+                for statement in POSTGRES_DDL:
+                    conn.exec_driver_sql(statement)
+        except Exception as e:
+            # CREATE EXTENSION bisa butuh hak superuser; filter tetap jalan tanpa index
+            logger.warning(f"Failed to create trigram index for location_text: {str(e)}")
+            return
+    else:
+        exists = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'property_location_fts'"
+        ).first()
+        for statement in SQLITE_DDL:
+            conn.exec_driver_sql(statement)
+        if not exists:
+            conn.exec_driver_sql("INSERT INTO property_location_fts(property_location_fts) VALUES ('rebuild')")
+    logger.info(f"Location substring index ready ({dialect_name})")
+
+
+def apply_location_filter(query: Select, dialect_name: str, location_text: str) -> Select:
+    """Filter substring location_text (case-insensitive) lewat index trigram bila tersedia"""
+    pattern = f"%{location_text}%"
+    if dialect_name == "sqlite" and location_index_enabled(dialect_name) and len(location_text) >= TRIGRAM_MIN_LENGTH:
+        matches = text("SELECT rowid FROM property_location_fts WHERE location_text LIKE :location_pattern")
+        return query.filter(PropertyModel.id.in_(matches.bindparams(location_pattern=pattern)))
+    # PostgreSQL: planner memakai index trigram untuk ILIKE secara langsung
+    return query.filter(PropertyModel.location_text.ilike(pattern))
@@ -0,0 +1,38 @@
+# ================================
+# app/core/memory.py
+# ================================
+import os
+from typing import Dict
+
+SMAPS_ROLLUP = "/proc/self/smaps_rollup"
+SMAPS_FIELDS = {
+    "Rss": "rss_kb",
+    "Pss": "pss_kb",
+    "Shared_Clean": "shared_clean_kb",
+    "Shared_Dirty": "shared_dirty_kb",
+    "Private_Clean": "private_clean_kb",
+    "Private_Dirty": "private_dirty_kb",
+}
+
+
+def process_memory() -> Dict:
+    """
+    Pemakaian memori proses ini dari /proc/self/smaps_rollup (Linux).
+
+    Dengan worker hasil fork, `private_*` adalah overhead per worker yang
+    sebenarnya; halaman model yang masih dibagi dengan proses induk masuk ke
+    `shared_*` dan dihitung proporsional di `pss_kb`.
+    """
+    memory = {"pid": os.getpid(), "ppid": os.getppid()}
+    try:
+        with open(SMAPS_ROLLUP) as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in SMAPS_FIELDS:
+                    memory[SMAPS_FIELDS[key]] = int(value.split()[0])
+    except OSError:
+        # Bukan Linux / procfs tidak tersedia
+        pass
+    if "private_clean_kb" in memory:
+        memory["uss_kb"] = memory["private_clean_kb"] + memory["private_dirty_kb"]
+    return memory
@@ -0,0 +1,98 @@
+# ================================
+# app/core/micro_batcher.py
+# ================================
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Mengumpulkan request prediksi yang datang bersamaan menjadi satu batch.
+
+    Batch dikirim ke `runner` ketika jumlah item mencapai `max_batch_size`
+    atau `max_wait_ms` sudah lewat sejak item pertama masuk, mana yang lebih
+    dulu. Hasil ke-i dari runner dikembalikan ke pemanggil ke-i.
+    """
+
+    def __init__(self, runner: Callable[[List[Any]], Awaitable[List[Any]]],
+                 max_batch_size: int = 64, max_wait_ms: float = 2.0):
+        self.runner = runner
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_seconds = max(0.0, max_wait_ms) / 1000
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+        self.size_flushes = 0
+        self.timeout_flushes = 0
+
+    async def submit(self, item: Any) -> Any:
+        """Masukkan item ke batch berikutnya dan tunggu hasilnya"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self.size_flushes += 1
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait_seconds, self._flush_on_timeout)
+
+        return await future
+
+    def _flush_on_timeout(self):
+        self._flush_handle = None
+        self.timeout_flushes += 1
+        self._flush()
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        self.batches += 1
+        self.items += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]]):
+        try:
+            results = await self.runner([item for item, _ in batch])
+        except Exception as e:
+            logger.error(f"Micro-batch of {len(batch)} items failed: {str(e)}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            # Future bisa sudah dibatalkan bila client memutus koneksi
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict:
+        """Statistik micro-batching untuk endpoint model-info"""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_seconds * 1000,
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "items": self.items,
+            "average_batch_size": self.items / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "size_flushes": self.size_flushes,
+            "timeout_flushes": self.timeout_flushes,
+        }
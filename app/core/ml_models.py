@@ -1,15 +1,56 @@
 # ================================
 # app/core/ml_models.py 
 # ================================
-import joblib
 import pandas as pd
 import numpy as np
-from huggingface_hub import hf_hub_download
+import asyncio
 import logging
-from typing import Dict, List, Optional
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from app.core.artifacts import load_artifact_set
+from app.core.config import settings
+from app.core.micro_batcher import MicroBatcher
+from app.core.prediction_cache import PredictionCache
+from app.core.preprocessing import PreprocessingPlan
+from app.core.tree_engine import CompiledTreeEnsemble, compile_and_verify
 
 logger = logging.getLogger(__name__)
 
+class ModelBundle:
+    """Satu set artifact model (encoder, scaler, model) beserta versinya"""
+    
+    def __init__(self, version: str, source: str, le_kabupaten, le_sertifikat, scaler, model):
+        self.version = version
+        self.source = source
+        self.le_kabupaten = le_kabupaten
+        self.le_sertifikat = le_sertifikat
+        self.scaler = scaler
+        self.model = model
+        self.preprocessing_plan: Optional[PreprocessingPlan] = None
+        self.compiled_model: Optional[CompiledTreeEnsemble] = None
+        self.engine = "sklearn"
+        self.loaded_at = datetime.now(timezone.utc)
+    
+    def predict(self, preprocessed_data: np.ndarray) -> np.ndarray:
+        """Prediksi matriks yang sudah di-scale dengan engine yang dipilih"""
+        if self.compiled_model is not None and (
+            self.model is None or len(preprocessed_data) <= settings.MODEL_ENGINE_AUTO_MAX_ROWS
+        ):
+            return self.compiled_model.predict(preprocessed_data)
+        return self.model.predict(preprocessed_data)
+    
+    def info(self) -> Dict:
+        return {
+            "version": self.version,
+            "source": self.source,
+            "loaded_at": self.loaded_at.isoformat(),
+            "compiled_preprocessing": self.preprocessing_plan is not None,
+            "engine": self.engine,
+            "compiled_model": self.compiled_model.info() if self.compiled_model is not None else None
+        }
+
 class MLModelManager:
     """Singleton class untuk mengelola ML models"""
     _instance = None
@@ -22,10 +63,20 @@ class MLModelManager:
     
     def __init__(self):
         if not hasattr(self, 'initialized'):
-            self.le_kabupaten = None
-            self.le_sertifikat = None
-            self.scaler = None
-            self.model = None
+            # Bundle aktif diganti secara atomik saat hot swap; request yang sedang
+            # berjalan tetap memakai bundle yang diambilnya di awal
+            self.active_bundle: Optional[ModelBundle] = None
+            self._bundles: "OrderedDict[str, ModelBundle]" = OrderedDict()
+            self._reload_lock: Optional[asyncio.Lock] = None
+            self.prediction_cache = PredictionCache(
+                max_size=settings.PREDICTION_CACHE_SIZE,
+                ttl_seconds=settings.PREDICTION_CACHE_TTL_SECONDS
+            )
+            self.micro_batcher = MicroBatcher(
+                self._run_micro_batch,
+                max_batch_size=settings.MICRO_BATCH_MAX_SIZE,
+                max_wait_ms=settings.MICRO_BATCH_MAX_WAIT_MS
+            )
             self.feature_columns = [
                 'f_taman', 'f_jogging_track', 'f_cctv', 'f_lapangan_voli', 'f_lapangan_bola',
                 'f_lapangan_basket', 'f_lapangan_bulu_tangkis', 'f_tempat_jemuran', 'f_kulkas',
@@ -39,36 +90,170 @@ class MLModelManager:
             ]
             self.initialized = True
     
+    # Akses ke artifact bundle aktif
+    @property
+    def le_kabupaten(self):
+        return self.active_bundle.le_kabupaten if self.active_bundle else None
+    
+    @property
+    def le_sertifikat(self):
+        return self.active_bundle.le_sertifikat if self.active_bundle else None
+    
+    @property
+    def scaler(self):
+        return self.active_bundle.scaler if self.active_bundle else None
+    
+    @property
+    def model(self):
+        return self.active_bundle.model if self.active_bundle else None
+    
+    @property
+    def preprocessing_plan(self) -> Optional[PreprocessingPlan]:
+        return self.active_bundle.preprocessing_plan if self.active_bundle else None
+    
+    @property
+    def model_source(self) -> Optional[str]:
+        return self.active_bundle.source if self.active_bundle else None
+    
+    @property
+    def model_version(self) -> Optional[str]:
+        return self.active_bundle.version if self.active_bundle else None
+    
     async def load_models(self):
         """Load semua model ML secara asinkron"""
         if self._models_loaded:
             return
-            
+        
         try:
-            logger.info("Loading ML models from Hugging Face Hub...")
-            
-            # Download semua file sekaligus
-            repo_id = "stevencmichael/Capstone_Project_SM079-LAI"
-            
-            # Download files
-            le_kabupaten_path = hf_hub_download(repo_id, "le_kabupaten.joblib")
-            le_sertifikat_path = hf_hub_download(repo_id, "le_sertifikat.joblib")
-            scaler_path = hf_hub_download(repo_id, "standard_scaler.joblib")
-            model_path = hf_hub_download(repo_id, "model.joblib")
-
-            # Load semua model
-            self.le_kabupaten = joblib.load(le_kabupaten_path)
-            self.le_sertifikat = joblib.load(le_sertifikat_path)
-            self.scaler = joblib.load(scaler_path)
-            self.model = joblib.load(model_path)
-            
-            self._models_loaded = True
-            logger.info("ML models loaded successfully!")
-            
+            self._activate(self._build_bundle())
         except Exception as e:
             logger.error(f"Error loading ML models: {str(e)}")
             raise RuntimeError(f"Failed to load ML models: {str(e)}")
     
+    async def reload_models(self, artifact_dir: Optional[str] = None) -> ModelBundle:
+        """
+        Load artifact set baru di background, warm up, lalu swap secara atomik.
+        
+        Request yang sedang berjalan selesai dengan versi lama; request baru
+        memakai versi baru setelah swap. Pada inference pool mode process,
+        bundle didaftarkan dulu lalu pool diganti dengan worker yang sudah
+        memegang versi baru; versi aktif baru diganti setelah itu, sehingga
+        tidak ada request versi baru yang sampai ke worker lama.
+        """
+        from app.core.inference import inference_executor
+        
+        if self._reload_lock is None:
+            self._reload_lock = asyncio.Lock()
+        
+        async with self._reload_lock:
+            loop = asyncio.get_running_loop()
+            bundle = await loop.run_in_executor(None, self._build_bundle, artifact_dir)
+            self._register(bundle)
+            try:
+                await inference_executor.restart(bundle.version)
+            except Exception:
+                self._unregister(bundle)
+                raise
+            previous = self.model_version
+            self._activate(bundle)
+            logger.info(f"Swapped ML model version {previous} -> {bundle.version}")
+            return bundle
+    
+    def _build_bundle(self, artifact_dir: Optional[str] = None) -> ModelBundle:
+        """Load artifact, kompilasi preprocessing dan jalankan inferensi uji"""
+        start = time.perf_counter()
+        artifacts, version, source = load_artifact_set(artifact_dir)
+        
+        bundle = ModelBundle(
+            version=version,
+            source=source,
+            le_kabupaten=artifacts["le_kabupaten"],
+            le_sertifikat=artifacts["le_sertifikat"],
+            scaler=artifacts["scaler"],
+            model=artifacts["model"]
+        )
+        bundle.preprocessing_plan = self._compile_preprocessing_plan(bundle)
+        self._compile_model(bundle)
+        
+        # Warm up: inferensi uji sebelum bundle boleh dipakai
+        warmup = self.predict_batch(self.preprocess_batch(self._parity_samples(bundle), bundle), bundle)
+        if not np.all(np.isfinite(warmup)):
+            raise RuntimeError(f"Warm-up inference for version {version} returned non-finite values")
+        
+        logger.info(f"ML models version {version} loaded successfully in {(time.perf_counter() - start) * 1000:.1f} ms!")
+        return bundle
+    
+    def _compile_model(self, bundle: ModelBundle):
+        """Kompilasi tree ensemble ke array NumPy sesuai MODEL_ENGINE"""
+        if settings.MODEL_ENGINE not in ("compiled", "auto"):
+            return
+        
+        # Sampel verifikasi: record contoh + titik acak di ruang fitur yang sudah di-scale
+        rng = np.random.default_rng(0)
+        samples = np.vstack([
+            self.preprocess_batch(self._parity_samples(bundle), bundle),
+            rng.normal(scale=2.0, size=(512, len(self.feature_columns)))
+        ])
+        compiled = compile_and_verify(bundle.model, samples)
+        if compiled is None:
+            return
+        
+        bundle.compiled_model = compiled
+        bundle.engine = settings.MODEL_ENGINE
+        if settings.MODEL_ENGINE == "compiled":
+            # Estimator sklearn dilepas agar hanya array kompilasi yang tersisa di memori
+            bundle.model = None
+    
+    def _register(self, bundle: ModelBundle):
+        """
+        Simpan bundle di registry tanpa mengaktifkannya. Registry tidak di-trim
+        di sini (baru di `_activate`): dengan MODEL_REGISTRY_KEEP=1 trim akan
+        membuang bundle yang baru didaftarkan karena bundle aktif dilindungi.
+        """
+        self._bundles[bundle.version] = bundle
+        self._bundles.move_to_end(bundle.version)
+    
+    def _unregister(self, bundle: ModelBundle):
+        if self._bundles.get(bundle.version) is bundle and bundle is not self.active_bundle:
+            del self._bundles[bundle.version]
+    
+    def _trim(self):
+        """Buang versi tertua sampai batas MODEL_REGISTRY_KEEP; bundle aktif tidak pernah dibuang"""
+        excess = len(self._bundles) - max(1, settings.MODEL_REGISTRY_KEEP)
+        for version in list(self._bundles):
+            if excess <= 0:
+                break
+            if self._bundles[version] is not self.active_bundle:
+                del self._bundles[version]
+                excess -= 1
+    
+    def _activate(self, bundle: ModelBundle):
+        """Jadikan bundle aktif; versi lama disimpan sampai batas MODEL_REGISTRY_KEEP"""
+        self._bundles[bundle.version] = bundle
+        self._bundles.move_to_end(bundle.version)
+        self.active_bundle = bundle
+        self._models_loaded = True
+        self._trim()
+        self.prediction_cache.invalidate()
+    
+    def get_bundle(self, version: Optional[str] = None) -> ModelBundle:
+        """Bundle untuk versi tertentu, atau bundle aktif bila versi tidak diberikan"""
+        if not self._models_loaded:
+            raise RuntimeError("Models not loaded yet")
+        if version is None:
+            return self.active_bundle
+        bundle = self._bundles.get(version)
+        if bundle is None:
+            raise RuntimeError(f"Model version {version} is not available")
+        return bundle
+    
+    def get_versions(self) -> List[Dict]:
+        """Daftar versi model yang masih tersimpan di registry"""
+        return [
+            {**bundle.info(), "active": bundle is self.active_bundle}
+            for bundle in self._bundles.values()
+        ]
+    
     def is_loaded(self) -> bool:
         """Check apakah model sudah dimuat"""
         return self._models_loaded
@@ -85,32 +270,80 @@ class MLModelManager:
             return []
         return list(self.le_sertifikat.classes_)
     
+    def _compile_preprocessing_plan(self, bundle: ModelBundle) -> Optional[PreprocessingPlan]:
+        """Kompilasi plan preprocessing dan verifikasi hasilnya identik dengan jalur pandas"""
+        try:
+            plan = PreprocessingPlan(
+                bundle.le_kabupaten, bundle.le_sertifikat, bundle.scaler, self.feature_columns
+            )
+            samples = self._parity_samples(bundle)
+            expected = self._preprocess_batch_pandas(samples, bundle)
+            actual = plan.transform(samples)
+            if actual.dtype != expected.dtype or not np.array_equal(actual, expected):
+                logger.warning("Compiled preprocessing plan does not match pandas path, using pandas path")
+                return None
+            logger.info("Compiled preprocessing plan verified against pandas path")
+            return plan
+        except Exception as e:
+            logger.warning(f"Failed to compile preprocessing plan, using pandas path: {str(e)}")
+            return None
+    
+    def _parity_samples(self, bundle: ModelBundle) -> List[Dict]:
+        """Record contoh yang mencakup semua kategori untuk verifikasi plan"""
+        numeric_columns = self.feature_columns[:-2]
+        kabupaten = list(bundle.le_kabupaten.classes_)
+        sertifikat = list(bundle.le_sertifikat.classes_)
+        rng = np.random.default_rng(0)
+        samples = []
+        for i in range(max(len(kabupaten), len(sertifikat))):
+            record = {
+                column: (int(rng.integers(0, 2)) if column.startswith("f_") else float(rng.uniform(0, 500)))
+                for column in numeric_columns
+            }
+            record["kabupaten"] = f"  {str(kabupaten[i % len(kabupaten)]).upper()} "
+            record["s_sertifikat"] = str(sertifikat[i % len(sertifikat)]).title()
+            samples.append(record)
+        return samples
+    
     def preprocess_data(self, data: Dict) -> np.ndarray:
         """Preprocess data untuk prediksi"""
-        if not self._models_loaded:
-            raise RuntimeError("Models not loaded yet")
+        return self.preprocess_batch([data])
+    
+    def preprocess_batch(self, records: List[Dict], bundle: Optional[ModelBundle] = None) -> np.ndarray:
+        """Preprocess banyak record sekaligus menjadi matriks N x 39"""
+        if bundle is None:
+            bundle = self.get_bundle()
         
+        if bundle.preprocessing_plan is not None:
+            return bundle.preprocessing_plan.transform(records)
+        
+        return self._preprocess_batch_pandas(records, bundle)
+    
+    def _preprocess_batch_pandas(self, records: List[Dict], bundle: ModelBundle) -> np.ndarray:
+        """Jalur preprocessing referensi berbasis pandas"""
         # Convert to DataFrame
-        df = pd.DataFrame([data])
+        df = pd.DataFrame(records)
         
         # Preprocess string columns
         df['kabupaten'] = df['kabupaten'].str.lower().str.strip()
         df['s_sertifikat'] = df['s_sertifikat'].str.lower().str.strip()
         
         # Handle unknown values
-        known_kabupaten = self.le_kabupaten.classes_
-        if df.loc[0, 'kabupaten'] not in known_kabupaten:
-            logger.warning(f"Unknown kabupaten: {df.loc[0, 'kabupaten']}, using default")
-            df.loc[0, 'kabupaten'] = known_kabupaten[0]
+        known_kabupaten = bundle.le_kabupaten.classes_
+        unknown_kabupaten = ~df['kabupaten'].isin(known_kabupaten)
+        if unknown_kabupaten.any():
+            logger.warning(f"Unknown kabupaten: {df.loc[unknown_kabupaten, 'kabupaten'].unique().tolist()}, using default")
+            df.loc[unknown_kabupaten, 'kabupaten'] = known_kabupaten[0]
         
-        known_sertifikat = self.le_sertifikat.classes_
-        if df.loc[0, 's_sertifikat'] not in known_sertifikat:
-            logger.warning(f"Unknown sertifikat: {df.loc[0, 's_sertifikat']}, using default")
-            df.loc[0, 's_sertifikat'] = known_sertifikat[0]
+        known_sertifikat = bundle.le_sertifikat.classes_
+        unknown_sertifikat = ~df['s_sertifikat'].isin(known_sertifikat)
+        if unknown_sertifikat.any():
+            logger.warning(f"Unknown sertifikat: {df.loc[unknown_sertifikat, 's_sertifikat'].unique().tolist()}, using default")
+            df.loc[unknown_sertifikat, 's_sertifikat'] = known_sertifikat[0]
         
         # Encoding
-        df['kabupaten_encoded'] = self.le_kabupaten.transform(df['kabupaten'])
-        df['s_sertifikat_encoded'] = self.le_sertifikat.transform(df['s_sertifikat'])
+        df['kabupaten_encoded'] = bundle.le_kabupaten.transform(df['kabupaten'])
+        df['s_sertifikat_encoded'] = bundle.le_sertifikat.transform(df['s_sertifikat'])
         
         # Drop original string columns
         df = df.drop(['kabupaten', 's_sertifikat'], axis=1)
@@ -119,14 +352,115 @@ class MLModelManager:
         df = df[self.feature_columns]
         
         # Scale data
-        scaled_data = self.scaler.transform(df)
+        scaled_data = bundle.scaler.transform(df)
         
         return scaled_data
     
     def predict(self, preprocessed_data: np.ndarray) -> float:
         """Melakukan prediksi"""
-        if not self._models_loaded:
-            raise RuntimeError("Models not loaded yet")
+        return float(self.predict_batch(preprocessed_data)[0])
+    
+    def predict_batch(self, preprocessed_data: np.ndarray, bundle: Optional[ModelBundle] = None) -> List[float]:
+        """Melakukan prediksi untuk seluruh baris dalam satu panggilan model"""
+        if bundle is None:
+            bundle = self.get_bundle()
+        
+        predictions = bundle.predict(preprocessed_data)
+        return [float(p) for p in predictions]
+    
+    def _cache_key(self, data: Dict, version: str) -> Tuple:
+        return PredictionCache.make_key(data, self.feature_columns[:-2], version)
+    
+    def predict_records(self, records: List[Dict], version: Optional[str] = None) -> List[float]:
+        """Prediksi banyak record fitur mentah; hanya cache miss yang diproses model"""
+        bundle = self.get_bundle(version)
+        
+        keys = [self._cache_key(record, bundle.version) for record in records]
+        results = [self.prediction_cache.get(key) for key in keys]
+        
+        miss_indices = [i for i, value in enumerate(results) if value is None]
+        if miss_indices:
+            predictions = self.predict_uncached([records[i] for i in miss_indices], bundle.version)
+            for i, prediction in zip(miss_indices, predictions):
+                results[i] = prediction
+                self.prediction_cache.set(keys[i], prediction)
         
-        prediction = self.model.predict(preprocessed_data)
-        return float(prediction[0])
\ No newline at end of file
+        return results
+    
+    def predict_uncached(self, records: List[Dict], version: Optional[str] = None) -> List[float]:
+        """Preprocess dan prediksi tanpa melewati cache"""
+        bundle = self.get_bundle(version)
+        return self.predict_batch(self.preprocess_batch(records, bundle), bundle)
+    
+    def preprocess_columns(self, numeric: np.ndarray, kabupaten, sertifikat,
+                           bundle: Optional[ModelBundle] = None) -> np.ndarray:
+        """
+        Preprocess fitur per kolom (lihat app.core.feature_extraction) tanpa
+        membentuk dict per baris, kecuali bila plan preprocessing tidak tersedia.
+        """
+        if bundle is None:
+            bundle = self.get_bundle()
+        
+        plan = bundle.preprocessing_plan
+        if plan is not None:
+            return plan.transform_columns(numeric, kabupaten, sertifikat)
+        
+        records = [dict(zip(self.feature_columns[:-2], values)) for values in numeric.tolist()]
+        for record, kab, sert in zip(records, kabupaten, sertifikat):
+            record["kabupaten"] = kab
+            record["s_sertifikat"] = sert
+        return self._preprocess_batch_pandas(records, bundle)
+    
+    def predict_columns(self, numeric: np.ndarray, kabupaten, sertifikat, version: Optional[str] = None) -> List[float]:
+        """Prediksi dari fitur per kolom"""
+        bundle = self.get_bundle(version)
+        return self.predict_batch(self.preprocess_columns(numeric, kabupaten, sertifikat, bundle), bundle)
+    
+    async def predict_async(self, data: Dict, version: Optional[str] = None) -> float:
+        """
+        Prediksi satu record dari event loop.
+        
+        Cache dicek langsung; cache miss digabung dengan request lain oleh
+        micro-batcher lalu dijalankan di inference pool.
+        """
+        from app.core.inference import inference_executor, predict_uncached
+        
+        bundle = self.get_bundle(version)
+        
+        key = self._cache_key(data, bundle.version)
+        cached = self.prediction_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        if settings.MICRO_BATCH_ENABLED:
+            prediction = await self.micro_batcher.submit((data, bundle.version))
+        else:
+            prediction = (await inference_executor.run(predict_uncached, [data], bundle.version))[0]
+        
+        self.prediction_cache.set(key, prediction)
+        return prediction
+    
+    async def _run_micro_batch(self, items: List[Tuple[Dict, str]]) -> List[float]:
+        from app.core.inference import inference_executor, predict_uncached
+        
+        # Saat hot swap satu batch bisa berisi beberapa versi; proses per versi
+        groups: Dict[str, List[int]] = {}
+        for i, (_, version) in enumerate(items):
+            groups.setdefault(version, []).append(i)
+        
+        results = [None] * len(items)
+        for version, indices in groups.items():
+            predictions = await inference_executor.run(
+                predict_uncached, [items[i][0] for i in indices], version
+            )
+            for i, prediction in zip(indices, predictions):
+                results[i] = prediction
+        return results
+    
+    def get_micro_batch_stats(self) -> Dict:
+        """Statistik micro-batching"""
+        return self.micro_batcher.stats()
+    
+    def get_cache_stats(self) -> Dict:
+        """Statistik cache prediksi"""
+        return self.prediction_cache.stats()
@@ -0,0 +1,100 @@
+# ================================
+# app/core/prediction_cache.py
+# ================================
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+
+class PredictionCache:
+    """
+    Cache hasil prediksi in-process dengan eviksi LRU dan TTL.
+
+    Key dibentuk dari vektor fitur yang dinormalisasi (lihat `make_key`),
+    sehingga request dengan isi yang sama namun penulisan berbeda
+    ("Jakarta Selatan" vs "jakarta selatan ", 2 vs 2.0) memakai entri yang sama.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 3600):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    @staticmethod
+    def make_key(data: Dict, numeric_columns: List[str], version: Optional[str] = None) -> Tuple:
+        """Bentuk key kanonik: versi model, float untuk kolom numerik, kategori lower/strip"""
+        # + 0.0 menyamakan -0.0 dengan 0.0
+        values = tuple(float(data[c]) + 0.0 for c in numeric_columns)
+        kabupaten = str(data["kabupaten"]).lower().strip()
+        sertifikat = str(data["s_sertifikat"]).lower().strip()
+        # Versi ikut di key agar hasil dari request versi lama yang selesai
+        # setelah hot swap tidak tercampur dengan versi baru
+        return (version,) + values + (kabupaten, sertifikat)
+
+    def get(self, key: Hashable) -> Optional[float]:
+        """Ambil hasil prediksi; None bila tidak ada atau sudah kedaluwarsa"""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, stored_at = entry
+            if self.ttl_seconds and time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: float):
+        """Simpan hasil prediksi, buang entri paling lama dipakai bila penuh"""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        """Kosongkan cache, dipanggil setiap kali model berganti"""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> Dict:
+        """Statistik cache untuk endpoint model-info"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
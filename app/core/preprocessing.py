@@ -0,0 +1,130 @@
+# ================================
+# app/core/preprocessing.py
+# ================================
+import logging
+from collections.abc import Mapping
+from typing import Dict, List, Sequence, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+Record = Union[Mapping, object]
+
+
+class PreprocessingPlan:
+    """
+    Rencana preprocessing yang dikompilasi sekali dari label encoder dan scaler.
+
+    Menghasilkan matriks yang identik (bit for bit) dengan jalur pandas di
+    `MLModelManager`: lower/strip kategori, fallback ke kelas pertama untuk
+    nilai yang tidak dikenal, encoding, urutan kolom, lalu `(x - mean_) / scale_`
+    dengan urutan operasi yang sama seperti `StandardScaler.transform`.
+    """
+
+    def __init__(self, le_kabupaten, le_sertifikat, scaler, feature_columns: List[str]):
+        self.feature_columns = list(feature_columns)
+        self.n_features = len(self.feature_columns)
+
+        # Tabel lookup kategori -> kode (LabelEncoder memakai index pada classes_)
+        self.kabupaten_classes = [str(c) for c in le_kabupaten.classes_]
+        self.sertifikat_classes = [str(c) for c in le_sertifikat.classes_]
+        self.kabupaten_codes = {c: i for i, c in enumerate(self.kabupaten_classes)}
+        self.sertifikat_codes = {c: i for i, c in enumerate(self.sertifikat_classes)}
+
+        # Kolom numerik diambil langsung dari record, kolom encoded diisi dari lookup
+        self.numeric_columns = [
+            c for c in self.feature_columns
+            if c not in ("kabupaten_encoded", "s_sertifikat_encoded")
+        ]
+        self.numeric_index = np.array(
+            [self.feature_columns.index(c) for c in self.numeric_columns], dtype=np.intp
+        )
+        self.kabupaten_index = self.feature_columns.index("kabupaten_encoded")
+        self.sertifikat_index = self.feature_columns.index("s_sertifikat_encoded")
+
+        # Vektor scaler; mean 0 / scale 1 bila with_mean / with_std dimatikan
+        n = self.n_features
+        if getattr(scaler, "with_mean", True) and getattr(scaler, "mean_", None) is not None:
+            self.mean = np.asarray(scaler.mean_, dtype=np.float64).copy()
+        else:
+            self.mean = np.zeros(n, dtype=np.float64)
+        if getattr(scaler, "with_std", True) and getattr(scaler, "scale_", None) is not None:
+            self.scale = np.asarray(scaler.scale_, dtype=np.float64).copy()
+        else:
+            self.scale = np.ones(n, dtype=np.float64)
+
+        if self.mean.shape != (n,) or self.scale.shape != (n,):
+            raise ValueError(
+                f"Scaler expects {self.mean.shape[0]} features, plan has {n}"
+            )
+
+    def encode_kabupaten(self, value) -> int:
+        """Kode kabupaten; nilai tidak dikenal memakai kelas pertama"""
+        return self._encode(value, self.kabupaten_codes, "kabupaten")
+
+    def encode_sertifikat(self, value) -> int:
+        """Kode sertifikat; nilai tidak dikenal memakai kelas pertama"""
+        return self._encode(value, self.sertifikat_codes, "sertifikat")
+
+    def _encode(self, value, codes: Dict[str, int], name: str) -> int:
+        key = value.lower().strip() if isinstance(value, str) else value
+        code = codes.get(key)
+        if code is None:
+            logger.warning(f"Unknown {name}: {key}, using default")
+            return 0
+        return code
+
+    def build_matrix(self, records: Sequence[Record]) -> np.ndarray:
+        """Susun matriks fitur mentah (belum di-scale) dengan urutan kolom model"""
+        n = len(records)
+        X = np.empty((n, self.n_features), dtype=np.float64)
+        numeric_columns = self.numeric_columns
+
+        for i, record in enumerate(records):
+            if isinstance(record, Mapping):
+                values = [record[c] for c in numeric_columns]
+                kabupaten = record["kabupaten"]
+                sertifikat = record["s_sertifikat"]
+            else:
+                values = [getattr(record, c) for c in numeric_columns]
+                kabupaten = record.kabupaten
+                sertifikat = record.s_sertifikat
+
+            row = X[i]
+            row[self.numeric_index] = values
+            row[self.kabupaten_index] = self.encode_kabupaten(kabupaten)
+            row[self.sertifikat_index] = self.encode_sertifikat(sertifikat)
+
+        return X
+
+    def build_matrix_columns(self, numeric: np.ndarray, kabupaten: Sequence, sertifikat: Sequence) -> np.ndarray:
+        """Susun matriks fitur mentah dari data per kolom (kolom numerik sesuai `numeric_columns`)"""
+        n = numeric.shape[0]
+        X = np.empty((n, self.n_features), dtype=np.float64)
+        X[:, self.numeric_index] = numeric
+        X[:, self.kabupaten_index] = self._encode_column(kabupaten, self.kabupaten_codes, "kabupaten")
+        X[:, self.sertifikat_index] = self._encode_column(sertifikat, self.sertifikat_codes, "sertifikat")
+        return X
+
+    def _encode_column(self, values: Sequence, codes: Dict[str, int], name: str) -> np.ndarray:
+        # Encoding per nilai unik, lalu dipetakan balik ke seluruh kolom
+        unique, inverse = np.unique(np.asarray(values, dtype=object).astype(str), return_inverse=True)
+        unique_codes = np.array([self._encode(value, codes, name) for value in unique], dtype=np.float64)
+        return unique_codes[inverse] if len(unique) else np.empty(0, dtype=np.float64)
+
+    def scale_matrix(self, X: np.ndarray) -> np.ndarray:
+        """Terapkan StandardScaler secara in-place dengan NumPy"""
+        X -= self.mean
+        X /= self.scale
+        return X
+
+    def transform(self, records: Union[Record, Sequence[Record]]) -> np.ndarray:
+        """Ubah satu atau banyak record menjadi matriks float64 yang sudah di-scale"""
+        if isinstance(records, Mapping) or not isinstance(records, (list, tuple)):
+            records = [records]
+        return self.scale_matrix(self.build_matrix(records))
+
+    def transform_columns(self, numeric: np.ndarray, kabupaten: Sequence, sertifikat: Sequence) -> np.ndarray:
+        """Versi kolom dari `transform` untuk batch besar"""
+        return self.scale_matrix(self.build_matrix_columns(numeric, kabupaten, sertifikat))
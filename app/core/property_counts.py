@@ -0,0 +1,111 @@
+# ================================
+# app/core/property_counts.py
+# ================================
+import json
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.prediction_cache import PredictionCache
+
+logger = logging.getLogger(__name__)
+
+COUNT_STRATEGIES = ("exact", "cached", "estimated", "none")
+
+# Cache LRU + TTL yang sama dengan cache prediksi, berisi jumlah baris per
+# signature filter. TTL membatasi umur entri bila penulisan terjadi di
+# worker lain (invalidasi hanya berlaku di proses yang menulis).
+count_cache = PredictionCache(
+    max_size=settings.PROPERTIES_COUNT_CACHE_SIZE,
+    ttl_seconds=settings.PROPERTIES_COUNT_CACHE_TTL_SECONDS
+)
+
+
+def filter_signature(filters: Dict[str, Any]) -> Tuple:
+    """
+    Key kanonik filter: tanpa nilai kosong, angka sebagai float, teks lower
+    (filter teks memakai ILIKE; spasi tidak di-strip karena ikut dicocokkan).
+    """
+    items = []
+    for name, value in sorted(filters.items()):
+        if value is None or value == "":
+            continue
+        if isinstance(value, str):
+            value = value.lower()
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = float(value) + 0.0
+        items.append((name, value))
+    return tuple(items)
+
+
+def invalidate_counts():
+    """Dipanggil setelah property atau valuation berubah"""
+    count_cache.invalidate()
+
+
+async def estimate_count(db: AsyncSession, query: Select) -> Optional[int]:
+    """
+    Perkiraan jumlah baris dari planner PostgreSQL; None untuk dialect lain.
+
+    EXPLAIN dijalankan di dalam savepoint: bila gagal, PostgreSQL membatalkan
+    transaksi, dan tanpa savepoint COUNT(*) pengganti di session yang sama
+    akan ditolak (InFailedSqlTransaction).
+    """
+    dialect = db.get_bind().dialect
+    if dialect.name != "postgresql":
+        return None
+    compiled = query.compile(dialect=dialect)
+    params: Any = compiled.params
+    if compiled.positional:
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+    async with db.begin_nested():
+        conn = await db.connection()
+        plan = (await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", params)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def exact_count(db: AsyncSession, query: Select) -> int:
+    """COUNT(*) atas query list (tanpa ORDER BY)"""
+    return await db.scalar(select(func.count()).select_from(query.subquery()))
+
+
+async def count_properties(db: AsyncSession, query: Select, strategy: str,
+                           filters: Dict[str, Any]) -> Tuple[Optional[int], str]:
+    """
+    Total baris untuk query list sesuai strategi; return (total, strategi yang dipakai).
+
+    - exact: COUNT(*) setiap request
+    - cached: COUNT(*) sekali per signature filter, dipakai ulang sampai ada penulisan atau TTL habis
+    - estimated: perkiraan planner (PostgreSQL), selain itu jatuh ke exact
+    - none: tanpa count; `has_next` dihitung dari baris limit+1
+    """
+    if strategy == "none":
+        return None, "none"
+
+    # Urutan tidak mempengaruhi jumlah; tanpa ORDER BY count lebih murah
+    query = query.order_by(None)
+
+    if strategy == "estimated":
+        try:
+            estimate = await estimate_count(db, query)
+        except Exception as e:
+            logger.warning(f"Failed to estimate property count, using exact count: {str(e)}")
+            estimate = None
+        if estimate is not None:
+            return estimate, "estimated"
+        strategy = "exact"
+
+    if strategy == "cached" and count_cache.enabled:
+        key = filter_signature(filters)
+        total = count_cache.get(key)
+        if total is None:
+            total = await exact_count(db, query)
+            count_cache.set(key, total)
+        return int(total), "cached"
+
+    return await exact_count(db, query), "exact"
@@ -0,0 +1,297 @@
+# ================================
+# app/core/property_ingest.py
+# ================================
+"""
+Ingest listing dalam jumlah besar (POST /properties/bulk).
+
+Item divalidasi satu per satu dengan `PropertyCreate`; item valid ditulis
+per chunk dengan satu INSERT multi-row (insertmanyvalues SQLAlchemy) dan satu
+transaksi per chunk. Listing diidentifikasi oleh `source_url_key`:
+
+- mode `insert`: listing yang sudah ada dilaporkan sebagai error
+  (INSERT ... ON CONFLICT DO NOTHING)
+- mode `upsert`: listing yang sudah ada hanya ditulis bila `content_hash`
+  berubah (INSERT ... ON CONFLICT DO UPDATE ... WHERE hash berbeda); listing
+  yang tidak berubah tidak ditulis sama sekali
+
+Harga prediksi dan index pembanding dihitung per chunk sebagai batch, hanya
+untuk listing yang ditulis.
+"""
+import json
+import logging
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.core.comparables import refresh_listings
+from app.core.config import settings
+from app.core.feature_extraction import parse_location
+from app.core.listing_identity import CONTENT_COLUMNS, content_hash, normalize_source_url
+from app.core.ml_models import MLModelManager
+from app.core.property_counts import invalidate_counts
+from app.core.valuation import score_properties, upsert_valuations
+from app.models.property import PropertyModel
+from app.schemas.property import PropertyCreate
+
+logger = logging.getLogger(__name__)
+
+INGEST_MODES = ("insert", "upsert")
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/json-lines")
+
+
+class InvalidLine:
+    """Baris NDJSON yang bukan JSON valid"""
+
+    def __init__(self, message: str):
+        self.message = message
+
+
+def property_row(item: PropertyCreate) -> Dict:
+    """Nilai kolom tabel property untuk satu item (sama dengan POST /properties)"""
+    specifications = item.specifications
+    kabupaten, kecamatan = parse_location(item.location_text)
+    row = {
+        "title": item.title,
+        "description": item.description,
+        "monthly_installment_info": item.monthly_installment_info,
+        "price_display": item.price_display,
+        "price_numeric": item.price_numeric,
+        "location_text": item.location_text,
+        "kabupaten": kabupaten,
+        "kecamatan": kecamatan,
+        "estimated_savings": item.estimated_savings,
+        "posted_by": item.posted_by,
+        "source_url": item.source_url,
+        "property_type": item.property_type,
+        "facilities": item.facilities,
+        "bedrooms": specifications.bedrooms,
+        "bathrooms": specifications.bathrooms,
+        "land_area": specifications.land_area,
+        "building_area": specifications.building_area,
+        "carport_capacity": specifications.carport_capacity,
+        "certificate_type": specifications.certificate_type,
+        "electricity_power": specifications.electricity_power,
+        "maid_bedrooms": specifications.maid_bedrooms,
+        "maid_bathrooms": specifications.maid_bathrooms,
+        "number_of_floors": specifications.number_of_floors,
+        "property_condition": specifications.property_condition,
+        "nearby_points_of_interest_text": None,
+        "source_url_key": normalize_source_url(item.source_url),
+    }
+    row["content_hash"] = content_hash(row)
+    return row
+
+
+def item_error(index: int, field: str, message: str) -> Dict:
+    return {"index": index, "status": "error", "error": [{"field": field, "message": message}]}
+
+
+def validate_item(index: int, item: Any):
+    """Return (row, None) untuk item valid atau (None, hasil error)"""
+    if isinstance(item, InvalidLine):
+        return None, item_error(index, "body", item.message)
+    if not isinstance(item, dict):
+        return None, item_error(index, "body", "Item must be a JSON object")
+    try:
+        return property_row(PropertyCreate(**item)), None
+    except ValidationError as e:
+        return None, {
+            "index": index,
+            "status": "error",
+            "error": [
+                {"field": ".".join(str(loc) for loc in err["loc"]), "message": err["msg"]}
+                for err in e.errors()
+            ]
+        }
+
+
+async def iter_ndjson(stream: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    """Item dari body NDJSON yang dibaca bertahap (memori sebanding panjang baris, bukan body)"""
+    buffer = b""
+    async for data in stream:
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield parse_line(line)
+    if buffer.strip():
+        yield parse_line(buffer)
+
+
+def parse_line(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return InvalidLine(f"Invalid JSON: {str(e)}")
+
+
+def write_statement(dialect_name: str, mode: str):
+    """INSERT ... ON CONFLICT (source_url_key) sesuai mode; RETURNING (id, source_url_key)"""
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    table = PropertyModel.__table__
+    statement = insert(table)
+    if mode == "upsert":
+        updated_columns = CONTENT_COLUMNS + ("kabupaten", "kecamatan", "source_url", "content_hash", "updatedAt")
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.source_url_key],
+            set_={column: statement.excluded[column] for column in updated_columns},
+            # Dicek ulang di database: penulis lain bisa mengubah listing setelah dibaca
+            where=table.c.content_hash.is_distinct_from(statement.excluded.content_hash)
+        )
+    else:
+        statement = statement.on_conflict_do_nothing(index_elements=[table.c.source_url_key])
+    # Dipetakan lewat key unik, sehingga urutan baris RETURNING tidak penting
+    return statement.returning(table.c.id, table.c.source_url_key)
+
+
+async def existing_listings(db: AsyncSession, keys: List[str]) -> Dict[str, tuple]:
+    """{source_url_key: (id, content_hash)} untuk listing yang sudah ada"""
+    if not keys:
+        return {}
+    table = PropertyModel.__table__
+    result = await db.execute(
+        select(table.c.source_url_key, table.c.id, table.c.content_hash).where(table.c.source_url_key.in_(keys))
+    )
+    return {row.source_url_key: (row.id, row.content_hash) for row in result}
+
+
+async def refresh_derived(db: AsyncSession, rows: List[Dict], ids: List[int]):
+    """Harga prediksi tersimpan dan index pembanding untuk listing yang baru ditulis"""
+    listings = [SimpleNamespace(id=property_id, **row) for property_id, row in zip(ids, rows)]
+    if settings.VALUATION_ON_WRITE and MLModelManager().is_loaded():
+        try:
+            valuations = await run_in_threadpool(score_properties, listings)
+            await db.run_sync(upsert_valuations, valuations)
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            logger.warning(f"Failed to score {len(listings)} ingested properties: {str(e)}")
+    await run_in_threadpool(refresh_listings, listings)
+
+
+async def ingest_chunk(db: AsyncSession, items: List[Any], offset: int, mode: str = "insert") -> List[Dict]:
+    """Validasi dan tulis satu chunk dalam satu transaksi; return hasil per item"""
+    results: List[Optional[Dict]] = [None] * len(items)
+    pending: Dict[str, tuple] = {}
+    for position, item in enumerate(items):
+        row, error = validate_item(offset + position, item)
+        if error is None and row["source_url_key"] in pending:
+            error = item_error(offset + position, "source_url", "Duplicate source_url in request")
+        if error is not None:
+            results[position] = error
+        else:
+            pending[row["source_url_key"]] = (position, row)
+
+    def success(position: int, property_id: int, action: str) -> Dict:
+        return {"index": offset + position, "status": "success", "id": property_id, "action": action}
+
+    def exists(position: int, property_id: Optional[int]) -> Dict:
+        result = item_error(offset + position, "source_url", "Property with this source_url already exists")
+        result["id"] = property_id
+        return result
+
+    try:
+        existing = await existing_listings(db, list(pending))
+        writes = []
+        for key, (position, row) in pending.items():
+            if key not in existing:
+                writes.append((position, row))
+            elif mode == "insert":
+                results[position] = exists(position, existing[key][0])
+            elif existing[key][1] == row["content_hash"]:
+                results[position] = success(position, existing[key][0], "unchanged")
+            else:
+                writes.append((position, row))
+
+        written = {}
+        if writes:
+            statement = write_statement(db.get_bind().dialect.name, mode)
+            result = await db.execute(statement, [row for _, row in writes])
+            written = {key: property_id for property_id, key in result.all()}
+            await db.commit()
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Bulk {mode} of {len(pending)} properties failed: {str(e)}")
+        for position, _ in pending.values():
+            results[position] = item_error(offset + position, "database", str(e))
+        return results
+
+    # Baris yang tidak dikembalikan RETURNING ditulis oleh proses lain di antara pembacaan dan penulisan
+    missing = [row["source_url_key"] for _, row in writes if row["source_url_key"] not in written]
+    concurrent = await existing_listings(db, missing) if missing else {}
+    for position, row in writes:
+        key = row["source_url_key"]
+        if key in written:
+            results[position] = success(position, written[key], "updated" if key in existing else "created")
+        elif mode == "insert":
+            results[position] = exists(position, concurrent.get(key, (None,))[0])
+        else:
+            results[position] = success(position, concurrent.get(key, (None,))[0], "unchanged")
+
+    written_rows = [row for _, row in writes if row["source_url_key"] in written]
+    if written_rows:
+        await refresh_derived(db, written_rows, [written[row["source_url_key"]] for row in written_rows])
+    return results
+
+
+async def ingest(db: AsyncSession, items: AsyncIterator[Any], mode: str = "insert",
+                 chunk_size: Optional[int] = None, max_items: Optional[int] = None) -> Dict:
+    """
+    Ingest item dari iterator (array JSON atau stream NDJSON) per chunk.
+
+    Item setelah `max_items` tidak ditulis dan dilaporkan sebagai error.
+    """
+    chunk_size = chunk_size or settings.PROPERTIES_BULK_CHUNK_SIZE
+    max_items = max_items or settings.PROPERTIES_BULK_MAX_ITEMS
+    results: List[Dict] = []
+    chunk: List[Any] = []
+    count = 0
+
+    async def flush():
+        if chunk:
+            results.extend(await ingest_chunk(db, chunk, len(results), mode))
+            chunk.clear()
+
+    try:
+        async for item in items:
+            if count >= max_items:
+                await flush()
+                results.append(item_error(count, "body", f"Bulk size exceeds limit of {max_items} items"))
+            else:
+                chunk.append(item)
+                if len(chunk) >= chunk_size:
+                    await flush()
+            count += 1
+        await flush()
+    finally:
+        invalidate_counts()
+
+    actions = {action: 0 for action in ("created", "updated", "unchanged")}
+    for result in results:
+        if result["status"] == "success":
+            actions[result["action"]] += 1
+    success_count = sum(actions.values())
+    logger.info(f"Bulk {mode} finished: {actions} of {len(results)} items")
+    return {
+        "mode": mode,
+        "total": len(results),
+        "success_count": success_count,
+        "error_count": len(results) - success_count,
+        "created_count": actions["created"],
+        "updated_count": actions["updated"],
+        "unchanged_count": actions["unchanged"],
+        "results": results
+    }
+
+
+async def iter_items(items: Iterable[Any]) -> AsyncIterator[Any]:
+    for item in items:
+        yield item
@@ -0,0 +1,121 @@
+# ================================
+# app/core/property_query.py
+# ================================
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import Select, and_, literal, or_, select, tuple_
+from sqlalchemy.orm import contains_eager
+
+from app.core.feature_extraction import normalize_area
+from app.core.location import apply_location_filter
+from app.core.search import apply_search
+from app.models.property import PropertyModel, PropertyValuationModel
+
+# Parameter filter GET /properties
+LIST_FILTERS = (
+    "filter", "location_text", "kabupaten", "kecamatan", "property_type", "bedrooms", "bathrooms",
+    "min_price", "max_price", "min_predicted_price", "max_predicted_price",
+    "min_price_ratio", "max_price_ratio",
+)
+
+# Kolom sort yang bisa NULL (listing tanpa valuation); selalu di akhir
+NULLABLE_SORTS = ("predicted_price", "price_ratio")
+
+
+class PropertyQueryError(ValueError):
+    """Kombinasi parameter list tidak valid"""
+
+
+def normalize_filters(filters: Dict[str, Any]) -> Dict[str, Any]:
+    """Filter wilayah dalam bentuk key ternormalisasi (sama dengan kolom kabupaten/kecamatan)"""
+    filters = {name: filters.get(name) for name in LIST_FILTERS}
+    filters["kabupaten"] = normalize_area(filters["kabupaten"])
+    filters["kecamatan"] = normalize_area(filters["kecamatan"])
+    return filters
+
+
+def build_property_query(dialect_name: str, filters: Dict[str, Any], sort_by: str = "price",
+                         sort: str = "desc") -> Tuple[Select, Any]:
+    """
+    Statement select list property dengan filter dan urutan GET /properties;
+    return (statement, kolom sort). Bisa dieksekusi dengan Session maupun AsyncSession.
+
+    Urutan selalu (kolom sort, id) searah sehingga index komposit
+    (filter equality, price_numeric, id) bisa melayani filter, ORDER BY dan
+    seek cursor sekaligus.
+    """
+    filters = normalize_filters(filters)
+
+    # Harga prediksi tersimpan ikut di-join agar bisa difilter dan diurutkan di SQL
+    query = select(PropertyModel).outerjoin(PropertyModel.valuation).options(
+        contains_eager(PropertyModel.valuation)
+    )
+
+    relevance = None
+    if filters["filter"]:
+        query, relevance = apply_search(query, dialect_name, filters["filter"])
+    elif sort_by == "relevance":
+        raise PropertyQueryError("sort_by=relevance requires the filter parameter")
+
+    if filters["location_text"]:
+        query = apply_location_filter(query, dialect_name, filters["location_text"])
+
+    if filters["kabupaten"]:
+        query = query.filter(PropertyModel.kabupaten == filters["kabupaten"])
+
+    if filters["kecamatan"]:
+        query = query.filter(PropertyModel.kecamatan == filters["kecamatan"])
+
+    if filters["property_type"]:
+        query = query.filter(PropertyModel.property_type == filters["property_type"])
+
+    if filters["bedrooms"]:
+        query = query.filter(PropertyModel.bedrooms == filters["bedrooms"])
+
+    if filters["bathrooms"]:
+        query = query.filter(PropertyModel.bathrooms == filters["bathrooms"])
+
+    if filters["min_price"]:
+        query = query.filter(PropertyModel.price_numeric >= filters["min_price"])
+
+    if filters["max_price"]:
+        query = query.filter(PropertyModel.price_numeric <= filters["max_price"])
+
+    if filters["min_predicted_price"] is not None:
+        query = query.filter(PropertyValuationModel.predicted_price >= filters["min_predicted_price"])
+
+    if filters["max_predicted_price"] is not None:
+        query = query.filter(PropertyValuationModel.predicted_price <= filters["max_predicted_price"])
+
+    if filters["min_price_ratio"] is not None:
+        query = query.filter(PropertyValuationModel.price_ratio >= filters["min_price_ratio"])
+
+    if filters["max_price_ratio"] is not None:
+        query = query.filter(PropertyValuationModel.price_ratio <= filters["max_price_ratio"])
+
+    sort_column = {
+        "price": PropertyModel.price_numeric,
+        "predicted_price": PropertyValuationModel.predicted_price,
+        "price_ratio": PropertyValuationModel.price_ratio,
+        # Pencarian ILIKE tidak punya skor: urutan relevansi jatuh ke id
+        "relevance": relevance if relevance is not None else literal(0.0),
+    }[sort_by]
+
+    order = sort_column.asc() if sort == "asc" else sort_column.desc()
+    if sort_by in NULLABLE_SORTS:
+        order = order.nulls_last()
+    id_order = PropertyModel.id.asc() if sort == "asc" else PropertyModel.id.desc()
+    return query.order_by(order, id_order), sort_column
+
+
+def seek_predicate(sort_column, sort_by: str, sort: str, last_value: Optional[float], last_id: int):
+    """Baris setelah (last_value, last_id) pada urutan `sort` dengan NULL di akhir"""
+    nullable = sort_by in NULLABLE_SORTS
+    if last_value is None:
+        # Cursor sudah berada di bagian NULL: lanjutkan berdasarkan id saja
+        id_after = PropertyModel.id < last_id if sort == "desc" else PropertyModel.id > last_id
+        return and_(sort_column.is_(None), id_after)
+
+    position = tuple_(sort_column, PropertyModel.id)
+    after = position < (last_value, last_id) if sort == "desc" else position > (last_value, last_id)
+    return or_(after, sort_column.is_(None)) if nullable else after
@@ -0,0 +1,128 @@
+# ================================
+# app/core/search.py
+# ================================
+"""
+Full-text search untuk parameter `filter` GET /properties (title + description).
+
+- PostgreSQL: kolom generated `search_vector` (tsvector, title berbobot A,
+  description B) dengan index GIN; ranking `ts_rank_cd`.
+- SQLite: tabel shadow FTS5 `property_fts` (external content) yang dijaga
+  trigger insert/update/delete; ranking `bm25`.
+
+Setiap kata pencarian dicocokkan sebagai prefix dan semua kata harus ada.
+Database lain (atau FULL_TEXT_SEARCH=false) memakai ILIKE seperti sebelumnya.
+"""
+import logging
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Select, func, literal_column, or_, select, text
+from sqlalchemy.engine import Connection
+
+from app.core.config import settings
+from app.models.property import PropertyModel
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_DIALECTS = ("postgresql", "sqlite")
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+POSTGRES_DDL = [
+    """
+    ALTER TABLE property ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('{config}', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('{config}', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_property_search_vector ON property USING gin (search_vector)",
+]
+
+SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS property_fts USING fts5(
+        title, description, content='property', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS property_fts_ai AFTER INSERT ON property BEGIN
+        INSERT INTO property_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS property_fts_ad AFTER DELETE ON property BEGIN
+        INSERT INTO property_fts(property_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS property_fts_au AFTER UPDATE OF title, description ON property BEGIN
+        INSERT INTO property_fts(property_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO property_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+]
+
+
+def search_enabled(dialect_name: str) -> bool:
+    return settings.FULL_TEXT_SEARCH and dialect_name in SUPPORTED_DIALECTS
+
+
+def setup_full_text_search(conn: Connection):
+    """Buat kolom/index (PostgreSQL) atau tabel FTS5 + trigger (SQLite) bila belum ada"""
+    dialect_name = conn.dialect.name
+    if not search_enabled(dialect_name):
+        return
+
+    if dialect_name == "postgresql":
+        for statement in POSTGRES_DDL:
+            conn.exec_driver_sql(statement.format(config=settings.FULL_TEXT_SEARCH_CONFIG))
+    else:
+        exists = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'property_fts'"
+        ).first()
+        for statement in SQLITE_DDL:
+            conn.exec_driver_sql(statement)
+        if not exists:
+            # Index listing yang sudah ada sebelum tabel FTS dibuat
+            conn.exec_driver_sql("INSERT INTO property_fts(property_fts) VALUES ('rebuild')")
+    logger.info(f"Full-text search ready ({dialect_name})")
+
+
+def search_tokens(search: str) -> List[str]:
+    """Kata pencarian (huruf/angka saja) sehingga aman disusun menjadi query FTS"""
+    return TOKEN_RE.findall(search.lower())
+
+
+def apply_search(query: Select, dialect_name: str, search: str) -> Tuple[Select, Optional[object]]:
+    """
+    Terapkan filter pencarian; return (query, ekspresi relevansi).
+
+    Relevansi bernilai lebih besar untuk hasil yang lebih cocok; None bila
+    pencarian memakai ILIKE.
+    """
+    tokens = search_tokens(search)
+    if not tokens or not search_enabled(dialect_name):
+        search_term = f"%{search}%"
+        return query.filter(
+            or_(PropertyModel.title.ilike(search_term), PropertyModel.description.ilike(search_term))
+        ), None
+
+    if dialect_name == "postgresql":
+        search_vector = literal_column("property.search_vector")
+        ts_query = func.to_tsquery(
+            literal_column(f"'{settings.FULL_TEXT_SEARCH_CONFIG}'::regconfig"),
+            " & ".join(f"{token}:*" for token in tokens)
+        )
+        return query.filter(search_vector.op("@@")(ts_query)), func.ts_rank_cd(search_vector, ts_query)
+
+    # SQLite FTS5: kata di-quote agar tidak dibaca sebagai operator, '*' = prefix
+    matches = (
+        select(literal_column("rowid").label("id"), literal_column("-bm25(property_fts)").label("relevance"))
+        .select_from(text("property_fts"))
+        .where(text("property_fts MATCH :fts_query").bindparams(fts_query=" ".join(f'"{t}"*' for t in tokens)))
+        .subquery("fts")
+    )
+    return query.join(matches, matches.c.id == PropertyModel.id), matches.c.relevance
@@ -0,0 +1,161 @@
+# ================================
+# app/core/sensitivity.py
+# ================================
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.core.columnar import field_constraints
+from app.core.ml_models import MLModelManager
+
+CATEGORICAL_FEATURES = {"kabupaten": "kabupaten_encoded", "s_sertifikat": "s_sertifikat_encoded"}
+
+
+class SensitivityError(ValueError):
+    """Spesifikasi sweep tidak valid"""
+
+
+def sweep_values(sweep: Dict) -> List:
+    """Nilai sweep: `values` eksplisit atau grid linspace(start, stop, steps)"""
+    if sweep.get("values"):
+        return list(sweep["values"])
+    if sweep.get("start") is None or sweep.get("stop") is None:
+        raise SensitivityError(f"Sweep {sweep['feature']} needs either values or start/stop")
+    grid = np.linspace(sweep["start"], sweep["stop"], sweep.get("steps") or 10)
+    is_int, _ = field_constraints().get(sweep["feature"], (False, {}))
+    if is_int:
+        # Fitur integer (jumlah kamar, lantai, flag): titik grid dibulatkan tanpa duplikat
+        return [int(v) for v in dict.fromkeys(np.round(grid).tolist())]
+    return grid.tolist()
+
+
+def resolve_toggles(toggles: Sequence[str], feature_columns: List[str]) -> List[str]:
+    """Daftar flag f_* yang di-toggle; 'all' berarti seluruh fasilitas"""
+    flags = [c for c in feature_columns if c.startswith("f_")]
+    if "all" in toggles:
+        return flags
+    unknown = [t for t in toggles if t not in flags]
+    if unknown:
+        raise SensitivityError(f"Unknown facility flags: {', '.join(unknown)}")
+    return list(dict.fromkeys(toggles))
+
+
+def validate_sweep(feature: str, values: List, feature_columns: List[str]):
+    """Setiap titik sweep harus lolos validasi yang sama dengan `PropertyFeatures` (POST /predict)"""
+    from app.schemas.property import ALLOWED_KABUPATEN, ALLOWED_SERTIFIKAT
+
+    if feature in CATEGORICAL_FEATURES:
+        allowed = ALLOWED_KABUPATEN if feature == "kabupaten" else ALLOWED_SERTIFIKAT
+        unknown = [v for v in values if not isinstance(v, str) or v.lower() not in allowed]
+        if unknown:
+            raise SensitivityError(
+                f"Unknown {feature} values: {', '.join(map(str, unknown))}; "
+                f"{feature} harus salah satu dari: {', '.join(sorted(allowed))}"
+            )
+        return
+    if feature not in feature_columns[:-2]:
+        raise SensitivityError(f"Unknown feature: {feature}")
+    if any(isinstance(v, (str, bool)) or not np.isfinite(v) for v in values):
+        raise SensitivityError(f"Sweep values for {feature} must be numbers")
+
+    is_int, bounds = field_constraints()[feature]
+    if is_int and any(v != int(v) for v in values):
+        raise SensitivityError(f"Sweep values for {feature} must be integers")
+    checks = {
+        "ge": (lambda v, limit: v >= limit, "greater than or equal to"),
+        "gt": (lambda v, limit: v > limit, "greater than"),
+        "le": (lambda v, limit: v <= limit, "less than or equal to"),
+        "lt": (lambda v, limit: v < limit, "less than"),
+    }
+    for key, limit in bounds.items():
+        check, description = checks[key]
+        if not all(check(v, limit) for v in values):
+            raise SensitivityError(f"Sweep values for {feature} must be {description} {limit}")
+
+
+def count_rows(sweeps: List[Dict], toggles: Sequence[str], feature_columns: List[str]) -> int:
+    """Jumlah baris matriks perturbasi, termasuk baris dasar"""
+    return 1 + sum(len(sweep_values(s)) for s in sweeps) + len(resolve_toggles(toggles, feature_columns))
+
+
+def run_sensitivity(base: Dict, sweeps: List[Dict], toggles: Sequence[str],
+                    version: Optional[str] = None) -> Dict:
+    """
+    Prediksi kurva respons harga terhadap perubahan fitur.
+
+    Seluruh perturbasi (baris dasar, setiap titik sweep, setiap toggle) disusun
+    menjadi satu matriks NumPy dari baris dasar yang sudah di-encode, di-scale
+    sekali, lalu diprediksi dengan satu panggilan model.
+    """
+    model_manager = MLModelManager()
+    bundle = model_manager.get_bundle(version)
+    feature_columns = model_manager.feature_columns
+
+    # (feature, kolom matriks, nilai asli, nilai matriks)
+    segments = []
+    for sweep in sweeps:
+        feature = sweep["feature"]
+        values = sweep_values(sweep)
+        validate_sweep(feature, values, feature_columns)
+        segments.append((feature, values))
+    flags = resolve_toggles(toggles, feature_columns)
+
+    n_rows = 1 + sum(len(values) for _, values in segments) + len(flags)
+    plan = bundle.preprocessing_plan
+
+    if plan is not None:
+        base_row = plan.build_matrix([base])[0]
+        X = np.repeat(base_row[np.newaxis, :], n_rows, axis=0)
+        row = 1
+        for feature, values in segments:
+            column = feature_columns.index(CATEGORICAL_FEATURES.get(feature, feature))
+            if feature == "kabupaten":
+                values = [plan.encode_kabupaten(v) for v in values]
+            elif feature == "s_sertifikat":
+                values = [plan.encode_sertifikat(v) for v in values]
+            X[row:row + len(values), column] = values
+            row += len(values)
+        columns = [feature_columns.index(flag) for flag in flags]
+        X[np.arange(row, n_rows), columns] = 1.0 - base_row[columns]
+        plan.scale_matrix(X)
+    else:
+        # Tanpa plan terkompilasi: susun record lalu preprocessing pandas sekaligus
+        records = [dict(base)]
+        for feature, values in segments:
+            records.extend({**base, feature: value} for value in values)
+        records.extend({**base, flag: 1 - int(base[flag])} for flag in flags)
+        X = model_manager.preprocess_batch(records, bundle)
+
+    predictions = [float(p) for p in bundle.predict(X)]
+    base_prediction = predictions[0]
+
+    result_sweeps, row = [], 1
+    for feature, values in segments:
+        points = predictions[row:row + len(values)]
+        result_sweeps.append({
+            "feature": feature,
+            "base_value": base[feature],
+            "points": [
+                {"value": value, "prediksi_harga": price, "delta": price - base_prediction}
+                for value, price in zip(values, points)
+            ]
+        })
+        row += len(values)
+
+    result_toggles = []
+    for flag, price in zip(flags, predictions[row:]):
+        result_toggles.append({
+            "feature": flag,
+            "from": int(base[flag]),
+            "to": 1 - int(base[flag]),
+            "prediksi_harga": price,
+            "delta": price - base_prediction
+        })
+
+    return {
+        "model_version": bundle.version,
+        "base_prediction": base_prediction,
+        "total_rows": n_rows,
+        "sweeps": result_sweeps,
+        "toggles": result_toggles
+    }
@@ -0,0 +1,239 @@
+# ================================
+# app/core/tree_engine.py
+# ================================
+import logging
+from typing import Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class UnsupportedModelError(ValueError):
+    """Model bukan tree ensemble yang bisa dikompilasi"""
+
+
+class CompiledTreeEnsemble:
+    """
+    Tree ensemble scikit-learn yang diratakan menjadi array NumPy kontigu.
+
+    Semua node dari semua tree disimpan dalam satu set array (feature,
+    threshold, left, value, is_leaf) dengan urutan BFS per tree, sehingga anak
+    kanan selalu berada di `left + 1`. Traversal dilakukan serentak untuk
+    semua pasangan (baris, tree); pasangan yang sudah sampai leaf dikeluarkan
+    dari himpunan aktif sehingga total kerja sebanding dengan panjang path,
+    bukan kedalaman maksimum.
+
+    Prediksi = offset + learning_rate * sum(nilai leaf per tree) / divisor
+    (forest: divisor = jumlah tree; gradient boosting: learning_rate dan
+    offset dari init estimator).
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray,
+                 value: np.ndarray, is_leaf: np.ndarray, missing_left: np.ndarray,
+                 roots: np.ndarray, max_depth: int, n_features: int,
+                 learning_rate: float = 1.0, divisor: float = 1.0, offset: float = 0.0,
+                 source: str = ""):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.value = value
+        self.is_leaf = is_leaf
+        self.missing_left = missing_left
+        self.roots = roots
+        self.max_depth = max_depth
+        self.n_features = n_features
+        self.learning_rate = learning_rate
+        self.divisor = divisor
+        self.offset = offset
+        self.source = source
+
+    @classmethod
+    def from_estimator(cls, model) -> "CompiledTreeEnsemble":
+        """Kompilasi DecisionTree, RandomForest/ExtraTrees, atau GradientBoosting regressor"""
+        from sklearn.ensemble import (
+            ExtraTreesRegressor, GradientBoostingRegressor, RandomForestRegressor
+        )
+        from sklearn.tree import DecisionTreeRegressor
+
+        learning_rate, divisor, offset = 1.0, 1.0, 0.0
+
+        if isinstance(model, DecisionTreeRegressor):
+            trees = [model.tree_]
+        elif isinstance(model, (RandomForestRegressor, ExtraTreesRegressor)):
+            trees = [estimator.tree_ for estimator in model.estimators_]
+            divisor = float(len(trees))
+        elif isinstance(model, GradientBoostingRegressor):
+            trees = [estimator.tree_ for estimator in model.estimators_[:, 0]]
+            learning_rate = float(model.learning_rate)
+            offset = cls._gradient_boosting_offset(model)
+        else:
+            raise UnsupportedModelError(f"Unsupported model type: {type(model).__name__}")
+
+        if any(tree.n_outputs != 1 for tree in trees):
+            raise UnsupportedModelError("Only single-output regressors are supported")
+
+        total = int(sum(tree.node_count for tree in trees))
+        feature = np.zeros(total, dtype=np.int32)
+        threshold = np.zeros(total, dtype=np.float64)
+        left = np.zeros(total, dtype=np.int32)
+        value = np.empty(total, dtype=np.float64)
+        is_leaf = np.zeros(total, dtype=bool)
+        missing_left = np.zeros(total, dtype=bool)
+        roots = np.empty(len(trees), dtype=np.int32)
+
+        base = 0
+        for i, tree in enumerate(trees):
+            order = cls._bfs_order(tree.children_left, tree.children_right)
+            # Posisi baru setiap node lama
+            position = np.empty_like(order)
+            position[order] = np.arange(order.shape[0])
+
+            nodes = slice(base, base + order.shape[0])
+            children_left = tree.children_left[order]
+            leaf = children_left == -1
+
+            is_leaf[nodes] = leaf
+            # Leaf menunjuk ke dirinya sendiri: threshold +inf dan missing ke kiri
+            # membuat langkah traversal tambahan tidak mengubah posisi
+            own_index = np.arange(base, base + order.shape[0], dtype=np.int32)
+            feature[nodes] = np.where(leaf, 0, tree.feature[order])
+            threshold[nodes] = np.where(leaf, np.inf, tree.threshold[order])
+            left[nodes] = np.where(leaf, own_index, position[np.where(leaf, 0, children_left)] + base)
+            value[nodes] = tree.value[order, 0, 0]
+            if hasattr(tree, "missing_go_to_left"):
+                missing_left[nodes] = np.asarray(tree.missing_go_to_left, dtype=bool)[order]
+            missing_left[nodes] |= leaf
+
+            roots[i] = base
+            base += order.shape[0]
+
+        return cls(
+            feature=feature, threshold=threshold, left=left, value=value, is_leaf=is_leaf,
+            missing_left=missing_left, roots=roots,
+            max_depth=int(max(tree.max_depth for tree in trees)),
+            n_features=int(model.n_features_in_),
+            learning_rate=learning_rate, divisor=divisor, offset=offset,
+            source=type(model).__name__
+        )
+
+    @staticmethod
+    def _bfs_order(children_left: np.ndarray, children_right: np.ndarray) -> np.ndarray:
+        """Urutan node BFS; anak kiri dan kanan selalu bersebelahan"""
+        order = [0]
+        for node in order:
+            if children_left[node] != -1:
+                order.append(int(children_left[node]))
+                order.append(int(children_right[node]))
+        return np.asarray(order, dtype=np.intp)
+
+    @staticmethod
+    def _gradient_boosting_offset(model) -> float:
+        from sklearn.dummy import DummyRegressor
+
+        if model.init_ == "zero":
+            return 0.0
+        if isinstance(model.init_, DummyRegressor):
+            return float(np.ravel(model.init_.constant_)[0])
+        raise UnsupportedModelError(f"Unsupported init estimator: {type(model.init_).__name__}")
+
+    def predict(self, X: np.ndarray, block_size: int = 2048) -> np.ndarray:
+        """Prediksi batch; baris diproses per blok untuk membatasi memori sementara"""
+        # Sama seperti sklearn: fitur dibandingkan dalam float32
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected input with {self.n_features} features, got shape {X.shape}")
+
+        out = np.empty(X.shape[0], dtype=np.float64)
+        for start in range(0, X.shape[0], block_size):
+            block = np.ascontiguousarray(X[start:start + block_size])
+            out[start:start + block_size] = self._predict_block(block)
+        return out
+
+    def _predict_block(self, X: np.ndarray, target_pairs: int = 65536) -> np.ndarray:
+        n_rows, n_trees = X.shape[0], self.roots.shape[0]
+        X_flat = X.ravel()
+        check_missing = bool(np.isnan(X_flat).any())
+        total = np.zeros(n_rows, dtype=np.float64)
+
+        # Tree diproses per kelompok: batch kecil memakai semua tree sekaligus
+        # (overhead Python minimal), batch besar memakai kelompok kecil agar node
+        # yang sedang dipakai tetap berada di cache
+        trees_per_group = max(1, min(n_trees, target_pairs // max(1, n_rows)))
+        for first_tree in range(0, n_trees, trees_per_group):
+            roots = self.roots[first_tree:first_tree + trees_per_group]
+            leaves = self._traverse(X_flat, X.shape[1], n_rows, roots, check_missing)
+            total += self.value[leaves].reshape(n_rows, roots.shape[0]).sum(axis=1)
+
+        return self.offset + self.learning_rate * total / self.divisor
+
+    def _traverse(self, X_flat: np.ndarray, n_features: int, n_rows: int,
+                  roots: np.ndarray, check_missing: bool, compact_every: int = 4) -> np.ndarray:
+        """Leaf tujuan untuk setiap pasangan (baris, tree), urut per baris"""
+        n_trees = roots.shape[0]
+        nodes = np.tile(roots, n_rows)
+        row_offset = np.repeat(np.arange(n_rows, dtype=np.intp) * n_features, n_trees)
+        leaves = np.empty(nodes.shape[0], dtype=np.int32)
+        active = np.arange(nodes.shape[0])
+
+        for step in range(self.max_depth):
+            # Pasangan yang sudah di leaf dikeluarkan secara berkala; di antaranya
+            # leaf cukup berputar di tempat
+            if step and step % compact_every == 0:
+                done = self.is_leaf[nodes]
+                if done.all():
+                    break
+                if done.any():
+                    leaves[active[done]] = nodes[done]
+                    keep = ~done
+                    active, nodes, row_offset = active[keep], nodes[keep], row_offset[keep]
+
+            x = X_flat[row_offset + self.feature[nodes]]
+            go_right = x > self.threshold[nodes]
+            if check_missing:
+                go_right |= np.isnan(x) & ~self.missing_left[nodes]
+            nodes = self.left[nodes] + go_right
+
+        leaves[active] = nodes
+        return leaves
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(
+            array.nbytes for array in (
+                self.feature, self.threshold, self.left, self.value,
+                self.is_leaf, self.missing_left, self.roots
+            )
+        ))
+
+    def info(self) -> Dict:
+        return {
+            "source": self.source,
+            "n_trees": int(self.roots.shape[0]),
+            "n_nodes": int(self.feature.shape[0]),
+            "max_depth": self.max_depth,
+            "nbytes": self.nbytes,
+        }
+
+
+def compile_and_verify(model, samples: np.ndarray, rtol: float = 1e-7) -> Optional[CompiledTreeEnsemble]:
+    """
+    Kompilasi model dan pastikan prediksinya sama dengan `model.predict` dalam
+    toleransi float. Return None bila model tidak didukung atau hasil berbeda.
+    """
+    try:
+        compiled = CompiledTreeEnsemble.from_estimator(model)
+    except UnsupportedModelError as e:
+        logger.info(f"Compiled tree engine not used: {str(e)}")
+        return None
+
+    expected = np.asarray(model.predict(samples), dtype=np.float64)
+    actual = compiled.predict(samples)
+    atol = rtol * max(1.0, float(np.abs(expected).max(initial=0.0)))
+    if not np.allclose(actual, expected, rtol=rtol, atol=atol):
+        max_diff = float(np.abs(actual - expected).max())
+        logger.warning(f"Compiled tree engine does not match sklearn (max diff {max_diff}), using sklearn")
+        return None
+
+    logger.info(f"Compiled tree engine verified: {compiled.info()}")
+    return compiled
@@ -0,0 +1,205 @@
+# ================================
+# app/core/valuation.py
+# ================================
+import logging
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.feature_extraction import SOURCE_COLUMNS, ListingFeatureExtractor
+from app.core.ml_models import MLModelManager
+from app.core.property_counts import invalidate_counts
+from app.database import SessionLocal
+from app.models.property import PropertyModel, PropertyValuationModel
+
+logger = logging.getLogger(__name__)
+
+# Satu rescore background per proses; dilepas oleh task setelah selesai
+_rescore_lock = threading.Lock()
+
+
+def score_properties(rows: Sequence, version: Optional[str] = None,
+                     extractor: Optional[ListingFeatureExtractor] = None) -> List[Dict]:
+    """
+    Prediksi harga untuk PropertyModel (atau row query kolom `SOURCE_COLUMNS`);
+    baris yang tidak bisa dinilai dilewati.
+    """
+    model_manager = MLModelManager()
+    bundle = model_manager.get_bundle(version)
+
+    batch = (extractor or ListingFeatureExtractor()).extract(rows)
+    batch = batch.subset(batch.valid)
+    if not len(batch):
+        return []
+
+    predictions = np.asarray(
+        model_manager.predict_columns(batch.numeric, batch.kabupaten, batch.sertifikat, bundle.version)
+    )
+    ratios = np.divide(
+        batch.prices, predictions, out=np.zeros_like(predictions), where=predictions != 0
+    )
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "property_id": property_id,
+            "predicted_price": predicted_price,
+            "price_ratio": price_ratio,
+            "model_version": bundle.version,
+            "updatedAt": now,
+        }
+        for property_id, predicted_price, price_ratio in zip(
+            batch.ids.tolist(), predictions.tolist(), ratios.tolist()
+        )
+    ]
+
+
+def upsert_valuations(db: Session, rows: List[Dict]):
+    """Insert atau update baris property_valuation dalam satu statement"""
+    if not rows:
+        return
+
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        # executemany (batch insertmanyvalues) jauh lebih murah daripada
+        # mengompilasi satu statement VALUES berisi ribuan parameter
+        statement = insert(PropertyValuationModel)
+        statement = statement.on_conflict_do_update(
+            index_elements=[PropertyValuationModel.property_id],
+            set_={
+                column: statement.excluded[column]
+                for column in ("predicted_price", "price_ratio", "model_version", "updatedAt")
+            }
+        )
+        db.execute(statement, rows)
+    else:
+        for row in rows:
+            db.merge(PropertyValuationModel(**row))
+
+
+async def refresh_valuation_async(db: AsyncSession, property_model: PropertyModel):
+    """
+    Hitung ulang harga prediksi satu listing setelah create/update.
+
+    Prediksi berjalan di thread pool agar tidak menahan event loop; relasi
+    `valuation` dimuat ulang setelahnya. Kegagalan hanya dicatat di log,
+    penulisan listing tidak ikut gagal.
+    """
+    model_manager = MLModelManager()
+    if settings.VALUATION_ON_WRITE and model_manager.is_loaded():
+        try:
+            rows = await run_in_threadpool(score_properties, [property_model])
+            await db.run_sync(write_valuation, property_model.id, rows)
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            logger.warning(f"Failed to refresh valuation for property {property_model.id}: {str(e)}")
+    await db.refresh(property_model, ["valuation"])
+
+
+def write_valuation(db: Session, property_id: int, rows: List[Dict]):
+    if rows:
+        upsert_valuations(db, rows)
+    else:
+        # Listing tidak lagi bisa dinilai; jangan simpan nilai lama
+        db.query(PropertyValuationModel).filter(
+            PropertyValuationModel.property_id == property_id
+        ).delete(synchronize_session=False)
+
+
+def score_all(chunk_size: Optional[int] = None, only_stale: bool = False) -> Dict:
+    """
+    Bulk scoring seluruh tabel property per chunk.
+
+    Tabel dibaca dengan keyset pagination pada id, hanya kolom yang dibutuhkan
+    extractor, sehingga memori tetap sebanding dengan ukuran chunk; setiap
+    chunk di-commit sendiri. Dengan `only_stale`, hanya listing tanpa
+    valuation atau dengan versi model lain yang diproses.
+    """
+    chunk_size = chunk_size or settings.VALUATION_CHUNK_SIZE
+    model_manager = MLModelManager()
+    version = model_manager.get_bundle().version
+    extractor = ListingFeatureExtractor()
+    source_columns = [getattr(PropertyModel, column) for column in SOURCE_COLUMNS]
+
+    stats = {"model_version": version, "scanned": 0, "scored": 0, "skipped": 0, "chunks": 0}
+    start = time.perf_counter()
+    last_id = 0
+
+    while True:
+        db = SessionLocal()
+        try:
+            query = db.query(*source_columns).filter(PropertyModel.id > last_id)
+            if only_stale:
+                query = query.outerjoin(
+                    PropertyValuationModel, PropertyValuationModel.property_id == PropertyModel.id
+                ).filter(
+                    or_(
+                        PropertyValuationModel.property_id.is_(None),
+                        PropertyValuationModel.model_version != version
+                    )
+                )
+            properties = query.order_by(PropertyModel.id).limit(chunk_size).all()
+            if not properties:
+                break
+
+            rows = score_properties(properties, version, extractor)
+            upsert_valuations(db, rows)
+            db.commit()
+
+            last_id = properties[-1].id
+            stats["scanned"] += len(properties)
+            stats["scored"] += len(rows)
+            stats["skipped"] += len(properties) - len(rows)
+            stats["chunks"] += 1
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    # Filter harga prediksi/rasio ikut berubah
+    invalidate_counts()
+    stats["duration_seconds"] = round(time.perf_counter() - start, 3)
+    logger.info(f"Valuation scoring finished: {stats}")
+    return stats
+
+
+def try_start_rescore() -> bool:
+    """Ambil slot rescore background; False bila rescore lain masih berjalan"""
+    return _rescore_lock.acquire(blocking=False)
+
+
+def run_rescore(only_stale: bool = False):
+    """Background task POST /properties/valuations/rescore; slot dari `try_start_rescore`"""
+    try:
+        score_all(only_stale=only_stale)
+    except Exception as e:
+        logger.error(f"Valuation rescore failed: {str(e)}")
+    finally:
+        _rescore_lock.release()
+
+
+if __name__ == "__main__":
+    # python -m app.core.valuation [--stale]
+    import asyncio
+
+    from app.database import Base, engine
+
+    logging.basicConfig(level=logging.INFO)
+    Base.metadata.create_all(bind=engine)
+    asyncio.run(MLModelManager().load_models())
+    print(score_all(only_stale="--stale" in sys.argv[1:]))
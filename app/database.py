@@ -2,10 +2,45 @@
 # app/database.py
 # ================================
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.db_pool import PoolMetrics, listen_pool_events, pool_options
 
-engine = create_engine(settings.DATABASE_URL)
+# Driver async untuk driver sync DATABASE_URL
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+def async_database_url(url: str):
+    """DATABASE_URL dengan driver async (psycopg2 → asyncpg, pysqlite → aiosqlite)"""
+    url = make_url(url)
+    drivername = ASYNC_DRIVERS.get(url.drivername, url.drivername)
+    if drivername == "postgresql+asyncpg" and "sslmode" in url.query:
+        # asyncpg memakai parameter `ssl`, bukan `sslmode` libpq
+        url = url.difference_update_query(["sslmode"]).update_query_dict({"ssl": url.query["sslmode"]})
+    return url.set(drivername=drivername)
+
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+
+# Metrik pool per engine, lihat GET /health/db-pool
+pool_metrics = PoolMetrics("sync")
+async_pool_metrics = PoolMetrics("async")
+
+engine = create_engine(settings.DATABASE_URL, **pool_options(settings.DATABASE_URL, pool_metrics))
+listen_pool_events(engine, pool_metrics)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
\ No newline at end of file
+
+# Engine async untuk route yang berjalan di event loop (GET/POST/PUT/DELETE /properties)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, **pool_options(ASYNC_DATABASE_URL, async_pool_metrics, is_async=True)
+)
+listen_pool_events(async_engine.sync_engine, async_pool_metrics)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+Base = declarative_base()
@@ -4,12 +4,17 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 import logging
+from starlette.concurrency import run_in_threadpool
 from app.core.config import settings
-from app.database import Base, engine
+from app.database import async_engine, engine
 from app.api.routes import properties, health, predict
 from app.utils.responses import create_success_response
 from app.core.ml_models import MLModelManager
+from app.core.inference import inference_executor
+from app.core.comparables import build_index
+from app.migrations import pending_migrations, upgrade
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -31,13 +36,40 @@ async def lifespan(app: FastAPI):
         # You can choose to raise the exception to prevent startup
         # raise e
     
-    # Create database tables
-    Base.metadata.create_all(bind=engine)
+    # Skema dikelola lewat `python -m app.migrations upgrade`, bukan di startup
+    try:
+        if settings.MIGRATE_ON_STARTUP:
+            await run_in_threadpool(upgrade, engine)
+        else:
+            pending = await run_in_threadpool(pending_migrations, engine)
+            if pending:
+                logger.warning(
+                    f"{len(pending)} pending migration(s): "
+                    f"{', '.join(f'{m.version:04d}_{m.name}' for m in pending)}; "
+                    f"run `python -m app.migrations upgrade`"
+                )
+    except Exception as e:
+        logger.error(f"Failed to check database migrations: {str(e)}")
+    
+    # Build comparables index in background; /predict/comparables returns 503 until ready
+    index_task = None
+    if settings.COMPARABLES_ENABLED and MLModelManager().is_loaded():
+        index_task = asyncio.create_task(_build_comparables_index())
     
     yield
     
     # Shutdown
     logger.info("Shutting down application...")
+    if index_task is not None:
+        index_task.cancel()
+    inference_executor.shutdown()
+    await async_engine.dispose()
+
+async def _build_comparables_index():
+    try:
+        await run_in_threadpool(build_index)
+    except Exception as e:
+        logger.error(f"Failed to build comparables index: {str(e)}")
 
 # FastAPI App with lifespan management
 app = FastAPI(
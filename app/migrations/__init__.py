@@ -0,0 +1,119 @@
+# ================================
+# app/migrations/__init__.py
+# ================================
+"""
+Migrasi skema berversi, dijalankan di luar startup aplikasi:
+
+    python -m app.migrations upgrade
+    python -m app.migrations status
+    python -m app.migrations explain   # cek index dipakai untuk setiap filter
+
+Setiap migrasi adalah modul `versions/vNNNN_nama.py` dengan fungsi
+`upgrade(conn)`; migrasi dijalankan berurutan, masing-masing dalam satu
+transaksi, dan versinya dicatat di tabel `schema_migrations`.
+"""
+import importlib
+import logging
+import pkgutil
+import re
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+VERSION_PATTERN = re.compile(r"^v(\d{4})_(\w+)$")
+# Kunci advisory PostgreSQL agar dua proses tidak menjalankan migrasi bersamaan
+ADVISORY_LOCK_ID = 727274
+
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+class Migration:
+    def __init__(self, version: int, name: str, module):
+        self.version = version
+        self.name = name
+        self.module = module
+
+    @property
+    def description(self) -> str:
+        return self.module.__doc__.strip().splitlines()[0] if self.module.__doc__ else self.name
+
+    def upgrade(self, conn: Connection):
+        self.module.upgrade(conn)
+
+
+def discover() -> List[Migration]:
+    """Semua migrasi di app/migrations/versions, urut versi"""
+    from app.migrations import versions
+
+    migrations = []
+    for module_info in pkgutil.iter_modules(versions.__path__):
+        match = VERSION_PATTERN.match(module_info.name)
+        if not match:
+            continue
+        module = importlib.import_module(f"{versions.__name__}.{module_info.name}")
+        migrations.append(Migration(int(match.group(1)), match.group(2), module))
+    migrations.sort(key=lambda m: m.version)
+
+    duplicates = {m.version for m in migrations if sum(n.version == m.version for n in migrations) > 1}
+    if duplicates:
+        raise RuntimeError(f"Duplicate migration versions: {sorted(duplicates)}")
+    return migrations
+
+
+def applied_versions(conn: Connection) -> Dict[int, datetime]:
+    if not inspect(conn).has_table(schema_migrations.name):
+        return {}
+    rows = conn.execute(select(schema_migrations.c.version, schema_migrations.c.applied_at)).all()
+    return {row.version: row.applied_at for row in rows}
+
+
+def pending_migrations(engine: Engine) -> List[Migration]:
+    with engine.connect() as conn:
+        applied = applied_versions(conn)
+    return [m for m in discover() if m.version not in applied]
+
+
+def upgrade(engine: Engine, target: Optional[int] = None) -> List[Migration]:
+    """Jalankan migrasi yang belum diterapkan sampai `target` (default: terbaru)"""
+    applied = []
+    for migration in discover():
+        if target is not None and migration.version > target:
+            break
+        with engine.begin() as conn:
+            if conn.dialect.name == "postgresql":
+                conn.exec_driver_sql(f"SELECT pg_advisory_xact_lock({ADVISORY_LOCK_ID})")
+            schema_migrations.create(conn, checkfirst=True)
+            # Dicek ulang di dalam lock: proses lain mungkin sudah menerapkannya
+            if migration.version in applied_versions(conn):
+                continue
+            logger.info(f"Applying migration {migration.version:04d}_{migration.name}")
+            migration.upgrade(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=migration.version, name=migration.name, applied_at=datetime.now(timezone.utc)
+            ))
+        applied.append(migration)
+    return applied
+
+
+def status(engine: Engine) -> List[Dict]:
+    with engine.connect() as conn:
+        applied = applied_versions(conn)
+    return [
+        {
+            "version": m.version,
+            "name": m.name,
+            "description": m.description,
+            "applied_at": applied.get(m.version),
+        }
+        for m in discover()
+    ]
@@ -0,0 +1,49 @@
+# ================================
+# app/migrations/__main__.py
+# ================================
+import argparse
+import logging
+import sys
+from typing import List, Optional
+
+from app.database import SessionLocal, engine
+from app.migrations import status, upgrade
+from app.migrations.explain import check_index_usage
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.migrations", description="Migrasi skema database")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    upgrade_parser = subparsers.add_parser("upgrade", help="Terapkan migrasi yang belum dijalankan")
+    upgrade_parser.add_argument("--target", type=int, help="Berhenti setelah versi ini")
+    subparsers.add_parser("status", help="Daftar migrasi dan waktu penerapannya")
+    subparsers.add_parser("explain", help="Cek index dipakai untuk setiap kombinasi filter GET /properties")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == "upgrade":
+        applied = upgrade(engine, args.target)
+        print(f"Applied {len(applied)} migration(s)" + "".join(f"\n  {m.version:04d}_{m.name}" for m in applied))
+        return 0
+
+    if args.command == "status":
+        for m in status(engine):
+            state = m["applied_at"].isoformat() if m["applied_at"] else "pending"
+            print(f"{m['version']:04d}_{m['name']:<32} {state:<28} {m['description']}")
+        return 0
+
+    db = SessionLocal()
+    try:
+        results = check_index_usage(db)
+    finally:
+        db.close()
+    for result in results:
+        print(f"[{'FULL SCAN' if result['full_scan'] else 'ok'}] {result['name']}")
+        for line in result["plan"]:
+            print(f"    {line}")
+    return 1 if any(result["full_scan"] for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
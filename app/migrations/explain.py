@@ -0,0 +1,79 @@
+# ================================
+# app/migrations/explain.py
+# ================================
+"""
+Cek bahwa setiap kombinasi filter GET /properties dilayani index.
+
+Query dibangun dengan `build_property_query` (sama persis dengan endpoint)
+lalu di-EXPLAIN. Di PostgreSQL sequential scan dimatikan untuk pengecekan
+(`enable_seqscan = off`) sehingga yang diuji adalah ketersediaan index,
+bukan pilihan planner untuk tabel kecil.
+"""
+import re
+from typing import Any, Dict, List
+
+from sqlalchemy import Select
+from sqlalchemy.orm import Session
+
+# (nama, filter, sort_by)
+FILTER_COMBINATIONS = [
+    ("default order", {}, "price"),
+    ("property_type", {"property_type": "House"}, "price"),
+    ("bedrooms", {"bedrooms": 3}, "price"),
+    ("bathrooms", {"bathrooms": 2}, "price"),
+    ("bedrooms + bathrooms", {"bedrooms": 3, "bathrooms": 2}, "price"),
+    ("price range", {"min_price": 1e9, "max_price": 5e9}, "price"),
+    ("property_type + price range", {"property_type": "House", "min_price": 1e9, "max_price": 5e9}, "price"),
+    ("kabupaten", {"kabupaten": "Jakarta Selatan"}, "price"),
+    ("kecamatan", {"kecamatan": "Kebayoran Baru"}, "price"),
+    ("location_text", {"location_text": "Kebayoran"}, "price"),
+    ("filter (full-text)", {"filter": "rumah minimalis"}, "relevance"),
+    ("predicted_price range", {"min_predicted_price": 1e9, "max_predicted_price": 5e9}, "predicted_price"),
+    ("price_ratio range", {"min_price_ratio": 0.5, "max_price_ratio": 0.9}, "price_ratio"),
+]
+
+# Scan penuh tabel property (bukan property_valuation / tabel FTS)
+FULL_SCAN_PATTERNS = {
+    "sqlite": re.compile(r"\bSCAN property\b(?!_)(?! USING (?:COVERING )?INDEX)"),
+    "postgresql": re.compile(r"\bSeq Scan on property\b(?!_)"),
+}
+
+
+def explain(db: Session, statement: Select) -> List[str]:
+    """Baris rencana eksekusi statement (EXPLAIN QUERY PLAN / EXPLAIN)"""
+    dialect = db.get_bind().dialect
+    compiled = statement.compile(dialect=dialect)
+    params: Any = compiled.params
+    if compiled.positional:
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+
+    conn = db.connection()
+    if dialect.name == "sqlite":
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+        return [row[-1] for row in rows]
+
+    conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    rows = conn.exec_driver_sql(f"EXPLAIN {compiled}", params).all()
+    return [row[0] for row in rows]
+
+
+def check_index_usage(db: Session, limit: int = 10) -> List[Dict]:
+    """Rencana eksekusi setiap kombinasi filter; `full_scan` True bila tabel property di-scan penuh"""
+    from app.core.property_query import build_property_query
+
+    dialect_name = db.get_bind().dialect.name
+    pattern = FULL_SCAN_PATTERNS.get(dialect_name)
+    results = []
+    try:
+        for name, filters, sort_by in FILTER_COMBINATIONS:
+            statement, _ = build_property_query(dialect_name, filters, sort_by, "desc")
+            plan = explain(db, statement.limit(limit))
+            results.append({
+                "name": name,
+                "filters": filters,
+                "plan": plan,
+                "full_scan": bool(pattern and any(pattern.search(line) for line in plan)),
+            })
+    finally:
+        db.rollback()
+    return results
@@ -0,0 +1,17 @@
+# ================================
+# app/migrations/versions/v0001_baseline.py
+# ================================
+"""Tabel property dan property_valuation"""
+from sqlalchemy.engine import Connection
+
+from app.database import Base
+from app.models.property import PropertyModel, PropertyValuationModel
+
+
+def upgrade(conn: Connection):
+    # Database yang dibuat dengan create_all sebelum ada migrasi sudah punya
+    # tabel ini (checkfirst); database baru langsung mendapat skema model
+    # terkini, dan migrasi berikutnya melewati perubahan yang sudah ada.
+    Base.metadata.create_all(
+        conn, tables=[PropertyModel.__table__, PropertyValuationModel.__table__], checkfirst=True
+    )
@@ -0,0 +1,11 @@
+# ================================
+# app/migrations/versions/v0002_location_keys.py
+# ================================
+"""Kolom kabupaten/kecamatan ternormalisasi, diisi dari location_text"""
+from sqlalchemy.engine import Connection
+
+from app.core.location import add_location_keys
+
+
+def upgrade(conn: Connection):
+    add_location_keys(conn)
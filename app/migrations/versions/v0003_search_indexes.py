@@ -0,0 +1,13 @@
+# ================================
+# app/migrations/versions/v0003_search_indexes.py
+# ================================
+"""Index full-text title/description dan index trigram location_text"""
+from sqlalchemy.engine import Connection
+
+from app.core.location import setup_location_index
+from app.core.search import setup_full_text_search
+
+
+def upgrade(conn: Connection):
+    setup_full_text_search(conn)
+    setup_location_index(conn)
@@ -0,0 +1,24 @@
+# ================================
+# app/migrations/versions/v0004_property_composite_indexes.py
+# ================================
+"""Index komposit untuk filter dan urutan GET /properties"""
+from sqlalchemy.engine import Connection
+
+from app.models.property import PropertyModel, PropertyValuationModel
+
+# Hanya index versi ini; index yang ditambahkan model kemudian punya migrasi sendiri
+COMPOSITE_INDEXES = (
+    "ix_property_price_numeric_id",
+    "ix_property_type_price",
+    "ix_property_rooms_price",
+    "ix_property_bathrooms_price",
+)
+
+
+def upgrade(conn: Connection):
+    indexes = [index for index in PropertyModel.__table__.indexes if index.name in COMPOSITE_INDEXES]
+    indexes += list(PropertyValuationModel.__table__.indexes)
+    for index in sorted(indexes, key=lambda i: i.name):
+        index.create(conn, checkfirst=True)
+    # Statistik baru agar planner langsung memakai index
+    conn.exec_driver_sql("ANALYZE")
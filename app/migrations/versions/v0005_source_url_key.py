@@ -0,0 +1,72 @@
+# ================================
+# app/migrations/versions/v0005_source_url_key.py
+# ================================
+"""Key unik source_url ternormalisasi dan hash isi listing untuk ingest upsert"""
+import logging
+
+from sqlalchemy import bindparam, func, inspect, select
+from sqlalchemy.engine import Connection
+
+from app.core.listing_identity import CONTENT_COLUMNS, content_hash, normalize_source_url
+from app.models.property import PropertyModel
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1000
+
+
+def backfill(conn: Connection) -> int:
+    """Isi source_url_key dan content_hash semua listing (keyset per chunk)"""
+    table = PropertyModel.__table__
+    update = table.update().where(table.c.id == bindparam("row_id")).values(
+        source_url_key=bindparam("new_source_url_key"), content_hash=bindparam("new_content_hash")
+    )
+    columns = [table.c.id, table.c.source_url] + [table.c[name] for name in CONTENT_COLUMNS]
+    updated, last_id = 0, 0
+    while True:
+        rows = conn.execute(
+            select(*columns).where(table.c.id > last_id).order_by(table.c.id).limit(CHUNK_SIZE)
+        ).all()
+        if not rows:
+            break
+        conn.execute(update, [
+            {
+                "row_id": row.id,
+                "new_source_url_key": normalize_source_url(row.source_url),
+                "new_content_hash": content_hash(row._mapping),
+            }
+            for row in rows
+        ])
+        updated += len(rows)
+        last_id = rows[-1].id
+    return updated
+
+
+def upgrade(conn: Connection):
+    table = PropertyModel.__table__
+    columns = {column["name"] for column in inspect(conn).get_columns("property")}
+    for name, column_type in (("source_url_key", "VARCHAR"), ("content_hash", "VARCHAR(64)")):
+        if name not in columns:
+            conn.exec_driver_sql(f"ALTER TABLE property ADD COLUMN {name} {column_type}")
+    logger.info(f"Backfilled source_url_key for {backfill(conn)} properties")
+
+    # Duplikat lama: listing terbaru memegang key, sisanya key NULL (tidak dihapus)
+    latest = (
+        select(func.max(table.c.id))
+        .where(table.c.source_url_key.isnot(None))
+        .group_by(table.c.source_url_key)
+    )
+    duplicates = conn.execute(
+        table.update()
+        .where(table.c.source_url_key.isnot(None), table.c.id.notin_(latest))
+        .values(source_url_key=None)
+    ).rowcount
+    if duplicates:
+        logger.warning(
+            f"{duplicates} duplicate properties kept without source_url_key "
+            f"(SELECT * FROM property WHERE source_url_key IS NULL)"
+        )
+
+    for index in table.indexes:
+        if index.name == "ix_property_source_url_key":
+            index.create(conn, checkfirst=True)
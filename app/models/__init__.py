@@ -1,3 +1,3 @@
-from .property import PropertyModel
+from .property import PropertyModel, PropertyValuationModel
 
-__all__ = ["PropertyModel"]
\ No newline at end of file
+__all__ = ["PropertyModel", "PropertyValuationModel"]
\ No newline at end of file
@@ -1,12 +1,25 @@
 # ================================
 # app/models/property.py
 # ================================
-from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, Text, ForeignKey, Index, event
+from sqlalchemy.orm import relationship, validates
 from datetime import datetime, timezone
+from app.core.feature_extraction import parse_location
+from app.core.listing_identity import CONTENT_COLUMNS, content_hash, normalize_source_url
 from app.database import Base
 
 class PropertyModel(Base):
     __tablename__ = "property"
+    # Index komposit sesuai bentuk query GET /properties: filter equality,
+    # lalu price_numeric (range + ORDER BY), lalu id (tiebreak + cursor)
+    __table_args__ = (
+        Index("ix_property_price_numeric_id", "price_numeric", "id"),
+        Index("ix_property_type_price", "property_type", "price_numeric", "id"),
+        Index("ix_property_rooms_price", "bedrooms", "bathrooms", "price_numeric", "id"),
+        Index("ix_property_bathrooms_price", "bathrooms", "price_numeric", "id"),
+        # Satu listing per halaman sumber; target ON CONFLICT ingest upsert
+        Index("ix_property_source_url_key", "source_url_key", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
@@ -15,9 +28,15 @@ class PropertyModel(Base):
     price_display = Column(String, nullable=False)
     price_numeric = Column(Float, nullable=False)
     location_text = Column(String, nullable=False)
+    # Key wilayah ternormalisasi, diisi dari location_text saat ditulis
+    kabupaten = Column(String, nullable=True, index=True)
+    kecamatan = Column(String, nullable=True, index=True)
     estimated_savings = Column(String, nullable=True)
     posted_by = Column(String, nullable=False)
     source_url = Column(String, nullable=False)
+    # normalize_source_url(source_url) dan hash isi listing, lihat app.core.listing_identity
+    source_url_key = Column(String, nullable=True)
+    content_hash = Column(String(64), nullable=True)
     property_type = Column(String, nullable=False)
     facilities = Column(JSON, nullable=True)
     
@@ -37,3 +56,36 @@ class PropertyModel(Base):
     nearby_points_of_interest_text = Column(Text, nullable=True)
     createdAt = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     updatedAt = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    
+    valuation = relationship(
+        "PropertyValuationModel", uselist=False, back_populates="property",
+        cascade="all, delete-orphan"
+    )
+    
+    @validates("location_text")
+    def _set_location_keys(self, key, location_text):
+        self.kabupaten, self.kecamatan = parse_location(location_text)
+        return location_text
+    
+    @validates("source_url")
+    def _set_source_url_key(self, key, source_url):
+        self.source_url_key = normalize_source_url(source_url)
+        return source_url
+
+@event.listens_for(PropertyModel, "before_insert")
+@event.listens_for(PropertyModel, "before_update")
+def _set_content_hash(mapper, connection, target):
+    target.content_hash = content_hash({column: getattr(target, column) for column in CONTENT_COLUMNS})
+
+class PropertyValuationModel(Base):
+    """Harga prediksi model untuk setiap listing, diisi oleh app.core.valuation"""
+    __tablename__ = "property_valuation"
+    
+    property_id = Column(Integer, ForeignKey("property.id", ondelete="CASCADE"), primary_key=True)
+    predicted_price = Column(Float, nullable=False, index=True)
+    # price_numeric / predicted_price, disimpan agar bisa difilter dan diurutkan dengan index
+    price_ratio = Column(Float, nullable=False, index=True)
+    model_version = Column(String, nullable=False, index=True)
+    updatedAt = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    
+    property = relationship("PropertyModel", back_populates="valuation")
@@ -8,7 +8,12 @@ from .property import (
     PaginationMeta,
     PropertiesListResponse,
     PropertyStatsResponse,
-    PropertyFeatures
+    PropertyFeatures,
+    PropertyFeaturesBatch,
+    PropertyFeaturesColumnar,
+    ModelReloadRequest,
+    SensitivitySweep,
+    SensitivityRequest
 )
 
 __all__ = [
@@ -21,5 +26,10 @@ __all__ = [
     "PaginationMeta",
     "PropertiesListResponse",
     "PropertyStatsResponse",
-    "PropertyFeatures"
+    "PropertyFeatures",
+    "PropertyFeaturesBatch",
+    "PropertyFeaturesColumnar",
+    "ModelReloadRequest",
+    "SensitivitySweep",
+    "SensitivityRequest"
 ]
\ No newline at end of file
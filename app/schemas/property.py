@@ -2,7 +2,7 @@
 # app/schemas/property.py
 # ================================
 from pydantic import BaseModel, Field, validator
-from typing import Optional, List, Any
+from typing import Optional, List, Any, Union, Dict
 from datetime import datetime
 from typing import Literal
 
@@ -42,6 +42,11 @@ class PropertyUpdate(PropertyBase):
 
 class PropertyResponse(PropertyBase):
     id: int
+    kabupaten: Optional[str] = None
+    kecamatan: Optional[str] = None
+    predicted_price: Optional[float] = None
+    price_ratio: Optional[float] = None
+    valuation_model_version: Optional[str] = None
     createdAt: datetime
     updatedAt: datetime
 
@@ -55,11 +60,13 @@ class ApiResponse(BaseModel):
     error: Optional[dict] = None
 
 class PaginationMeta(BaseModel):
-    total: int
+    total: Optional[int]  # None bila count_strategy = none
+    count_strategy: str = "exact"  # exact | cached | estimated | none
     limit: int
     offset: int
     has_next: bool
     has_prev: bool
+    next_cursor: Optional[str] = None  # kirim sebagai ?cursor= untuk halaman berikutnya
 
 class PropertiesListResponse(BaseModel):
     status: str = Field(default="success")
@@ -72,6 +79,20 @@ class PropertyStatsResponse(BaseModel):
     data: dict
     error: Optional[dict] = None
 
+# Nilai kategori yang dikenal model (dipakai juga oleh validasi columnar)
+ALLOWED_KABUPATEN = frozenset({
+    "jakarta barat",
+    "jakarta pusat",
+    "jakarta selatan",
+    "jakarta timur",
+    "jakarta utara",
+})
+
+ALLOWED_SERTIFIKAT = frozenset({
+    "adat", "girik", "hak pakai", "hak sewa",
+    "hgb", "hgu", "lainnya", "ppjb", "shm", "strata"
+})
+
 class PropertyFeatures(BaseModel):
     # Fasilitas properti (0 atau 1)
     f_taman: int = Field(ge=0, le=1, description="Fasilitas taman (0/1)")
@@ -123,29 +144,18 @@ class PropertyFeatures(BaseModel):
     # Validator untuk kabupaten
     @validator("kabupaten")
     def validate_kabupaten(cls, v):
-        allowed_kabupaten = {
-            "jakarta barat",
-            "jakarta pusat",
-            "jakarta selatan",
-            "jakarta timur",
-            "jakarta utara",
-        }
-        if v.lower() not in allowed_kabupaten:
+        if v.lower() not in ALLOWED_KABUPATEN:
             raise ValueError(
-                f"kabupaten harus salah satu dari: {', '.join(sorted(allowed_kabupaten))}"
+                f"kabupaten harus salah satu dari: {', '.join(sorted(ALLOWED_KABUPATEN))}"
             )
         return v
 
     # Validator untuk sertifikat
     @validator("s_sertifikat")
     def validate_sertifikat(cls, v):
-        allowed_sertifikat = {
-            "adat", "girik", "hak pakai", "hak sewa",
-            "hgb", "hgu", "lainnya", "ppjb", "shm", "strata"
-        }
-        if v.lower() not in allowed_sertifikat:
+        if v.lower() not in ALLOWED_SERTIFIKAT:
             raise ValueError(
-                f"s_sertifikat harus salah satu dari: {', '.join(sorted(allowed_sertifikat))}"
+                f"s_sertifikat harus salah satu dari: {', '.join(sorted(ALLOWED_SERTIFIKAT))}"
             )
         return v
 
@@ -164,4 +174,31 @@ class PropertyFeatures(BaseModel):
                 "s_luas_tanah": 200.0, "poi_perbelanjaan": 2.5, "poi_sekolah": 1.0,
                 "poi_transportasi": 0.8, "kabupaten": "Jakarta Selatan", "s_sertifikat": "SHM"
             }
-        }
\ No newline at end of file
+        }
+
+class PropertyFeaturesBatch(BaseModel):
+    # Item divalidasi satu per satu di endpoint agar satu baris yang salah
+    # tidak menggagalkan seluruh batch
+    items: List[dict] = Field(..., min_length=1, description="Daftar data PropertyFeatures")
+
+class ModelReloadRequest(BaseModel):
+    artifact_dir: Optional[str] = Field(
+        None, description="Subdirektori (nama versi) di MODEL_REGISTRY_ROOT; default MODEL_ARTIFACT_DIR atau Hugging Face Hub"
+    )
+
+class SensitivitySweep(BaseModel):
+    feature: str = Field(..., description="Fitur yang divariasikan, mis. s_luas_bangunan, poi_sekolah, kabupaten")
+    values: Optional[List[Union[float, str]]] = Field(None, description="Nilai eksplisit; kategori untuk kabupaten/s_sertifikat")
+    start: Optional[float] = Field(None, description="Awal grid (bila values kosong)")
+    stop: Optional[float] = Field(None, description="Akhir grid (bila values kosong)")
+    steps: int = Field(10, ge=2, le=1000, description="Jumlah titik grid")
+
+class SensitivityRequest(BaseModel):
+    base: PropertyFeatures
+    sweeps: List[SensitivitySweep] = Field(default_factory=list, description="Sweep grid / nilai per fitur")
+    toggles: List[str] = Field(default_factory=list, description="Flag f_* yang di-toggle satu per satu; ['all'] untuk semua fasilitas")
+
+class PropertyFeaturesColumnar(BaseModel):
+    # Satu array per nama fitur; divalidasi per kolom di app.core.columnar,
+    # bukan per baris dengan PropertyFeatures
+    columns: Dict[str, List[Any]] = Field(..., description="Nama fitur PropertyFeatures -> array nilai dengan panjang sama")
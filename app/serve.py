@@ -0,0 +1,147 @@
+# ================================
+# app/serve.py
+# ================================
+"""
+Server multi-worker dengan model yang dimuat sekali di proses induk.
+
+    python -m app.serve --workers 4 --port 8000
+
+`uvicorn --workers N` menjalankan setiap worker sebagai proses baru (spawn),
+sehingga setiap worker mengunduh dan meng-unpickle artifact sendiri. Di sini
+proses induk memuat model, membekukan heap (`gc.freeze`) lalu fork worker:
+seluruh worker berbagi halaman memori model secara copy-on-write dan hanya
+membayar memori privat untuk state per request. Worker yang mati di-fork
+ulang dari induk tanpa load ulang model.
+"""
+import argparse
+import asyncio
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, List, Optional
+
+import uvicorn
+
+from app.core.memory import process_memory
+from app.core.ml_models import MLModelManager
+
+logger = logging.getLogger(__name__)
+
+
+def preload_models():
+    """Load model di proses induk lalu bekukan heap agar GC tidak menyentuh halaman bersama"""
+    # Modul aplikasi diimpor sebelum fork agar ikut dibagi
+    import app.main  # noqa: F401
+
+    start = time.perf_counter()
+    asyncio.run(MLModelManager().load_models())
+    gc.collect()
+    # Objek yang sudah ada dipindah ke generasi permanen: GC di worker tidak
+    # lagi menulis header objek model sehingga halamannya tetap dibagi
+    gc.freeze()
+    logger.info(
+        f"Models preloaded in {(time.perf_counter() - start) * 1000:.1f} ms, "
+        f"parent memory: {process_memory()}"
+    )
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(sock: socket.socket, log_level: str):
+    """Jalankan uvicorn di worker hasil fork memakai socket yang diwarisi"""
+    from app.main import app
+
+    # Sinyal dikembalikan ke default; uvicorn memasang handler sendiri
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    config = uvicorn.Config(app, log_level=log_level)
+    server = uvicorn.Server(config)
+    server.run(sockets=[sock])
+
+
+def spawn_worker(sock: socket.socket, log_level: str) -> int:
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            run_worker(sock, log_level)
+        except BaseException:
+            logger.exception("Worker crashed")
+            code = 1
+        finally:
+            os._exit(code)
+    logger.info(f"Started worker {pid}")
+    return pid
+
+
+def supervise(sock: socket.socket, workers: int, log_level: str):
+    """Fork `workers` worker, fork ulang yang mati, teruskan SIGTERM/SIGINT ke semua worker"""
+    pids: Dict[int, None] = {}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(pids):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(workers):
+        pids[spawn_worker(sock, log_level)] = None
+
+    while pids:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        pids.pop(pid, None)
+        if not stopping:
+            logger.warning(f"Worker {pid} exited with status {status}, restarting")
+            pids[spawn_worker(sock, log_level)] = None
+
+    sock.close()
+    logger.info("All workers stopped")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Jalankan API dengan model yang dibagi antar worker")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "2")))
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        preload_models()
+    except Exception as e:
+        # Tanpa model worker tetap jalan; lifespan di tiap worker mencoba load sendiri
+        logger.error(f"Failed to preload ML models: {str(e)}")
+
+    sock = bind_socket(args.host, args.port)
+    logger.info(f"Listening on {args.host}:{args.port} with {args.workers} workers")
+    supervise(sock, args.workers, args.log_level)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
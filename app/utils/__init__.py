@@ -5,11 +5,15 @@ from .responses import (
     property_to_response,
     format_currency
 )
+from .pagination import InvalidCursorError, decode_cursor, encode_cursor
 
 __all__ = [
     "create_error_response",
     "create_success_response", 
     "parse_nearby_points_of_interest",
     "property_to_response",
-    "format_currency"
+    "format_currency",
+    "InvalidCursorError",
+    "decode_cursor",
+    "encode_cursor"
 ]
\ No newline at end of file
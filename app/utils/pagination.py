@@ -0,0 +1,31 @@
+# ================================
+# app/utils/pagination.py
+# ================================
+import base64
+import binascii
+import json
+from typing import Optional, Tuple
+
+
+class InvalidCursorError(ValueError):
+    """Cursor tidak bisa dibaca atau dibuat untuk urutan lain"""
+
+
+def encode_cursor(sort_by: str, sort: str, value: Optional[float], last_id: int) -> str:
+    """Cursor opaque berisi posisi baris terakhir: (nilai kolom sort, id)"""
+    payload = json.dumps({"s": sort_by, "d": sort, "v": value, "id": last_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, sort: str) -> Tuple[Optional[float], int]:
+    """(nilai kolom sort, id) dari cursor; cursor harus dibuat dengan sort_by/sort yang sama"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        value, last_id = payload["v"], int(payload["id"])
+        if value is not None:
+            value = float(value)
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise InvalidCursorError("Invalid cursor")
+    if payload.get("s") != sort_by or payload.get("d") != sort:
+        raise InvalidCursorError("Cursor was created for a different sort order")
+    return value, last_id
@@ -89,6 +89,9 @@ def property_to_response(property_model) -> dict:
         property_condition=property_model.property_condition
     )
     
+    # Harga prediksi tersimpan (tabel property_valuation), bila sudah dihitung
+    valuation = getattr(property_model, "valuation", None)
+    
     return PropertyResponse(
         id=property_model.id,
         title=property_model.title,
@@ -97,6 +100,8 @@ def property_to_response(property_model) -> dict:
         price_display=property_model.price_display,
         price_numeric=property_model.price_numeric,
         location_text=property_model.location_text,
+        kabupaten=property_model.kabupaten,
+        kecamatan=property_model.kecamatan,
         estimated_savings=property_model.estimated_savings,
         posted_by=property_model.posted_by,
         source_url=property_model.source_url,
@@ -104,6 +109,9 @@ def property_to_response(property_model) -> dict:
         facilities=unique_facilities,
         specifications=specifications,
         nearby_points_of_interest=nearby_points_of_interest,
+        predicted_price=valuation.predicted_price if valuation else None,
+        price_ratio=valuation.price_ratio if valuation else None,
+        valuation_model_version=valuation.model_version if valuation else None,
         createdAt=property_model.createdAt,
         updatedAt=property_model.updatedAt
     )
@@ -0,0 +1,268 @@
+# ================================
+# benchmarks/prediction.py
+# ================================
+"""
+Micro-benchmark jalur prediksi, berjalan offline dengan model pengganti.
+
+    python -m benchmarks.prediction --output bench.json
+    python -m benchmarks.prediction --output bench.json --baseline benchmarks/baseline.json
+
+Model pengganti dibuat lokal dengan bentuk yang sama seperti artifact asli
+(39 fitur, kelas kabupaten/sertifikat yang sama) lalu dimuat lewat
+`MLModelManager` dari direktori artifact sementara, sehingga jalur load,
+preprocessing, dan engine model sama seperti di production.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from app.core.artifacts import ARTIFACT_FILES, MANIFEST_FILENAME, file_sha256
+from app.core.config import settings
+from app.core.feature_extraction import KABUPATEN, SERTIFIKAT
+from app.core.ml_models import MLModelManager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZES = [1, 8, 64, 512, 4096]
+
+
+def generate_records(n: int, seed: int = 0) -> List[Dict]:
+    """Record PropertyFeatures acak yang valid"""
+    rng = np.random.default_rng(seed)
+    feature_columns = MLModelManager().feature_columns[:-2]
+    records = []
+    for _ in range(n):
+        record = {}
+        for column in feature_columns:
+            if column.startswith("f_"):
+                record[column] = int(rng.integers(0, 2))
+            elif column in ("s_jumlah_lantai", "s_kamar_mandi", "s_kamar_tidur"):
+                record[column] = int(rng.integers(1, 6))
+            elif column.startswith("s_luas"):
+                record[column] = float(np.round(rng.uniform(30, 1000), 1))
+            else:
+                record[column] = float(np.round(rng.uniform(0.1, 10), 2))
+        record["kabupaten"] = str(rng.choice(KABUPATEN)).title()
+        record["s_sertifikat"] = str(rng.choice(SERTIFIKAT)).upper()
+        records.append(record)
+    return records
+
+
+def build_standin_artifacts(target_dir: str, n_estimators: int = 100, max_depth: int = 12,
+                            n_samples: int = 5000, seed: int = 0) -> Dict:
+    """
+    Buat artifact pengganti (LabelEncoder, StandardScaler, RandomForest) dengan
+    bentuk yang sama seperti artifact asli, lengkap dengan manifest.
+    """
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+    feature_columns = MLModelManager().feature_columns
+    le_kabupaten = LabelEncoder().fit(KABUPATEN)
+    le_sertifikat = LabelEncoder().fit(SERTIFIKAT)
+
+    records = generate_records(n_samples, seed)
+    df = pd.DataFrame(records)
+    df["kabupaten_encoded"] = le_kabupaten.transform(df.pop("kabupaten").str.lower())
+    df["s_sertifikat_encoded"] = le_sertifikat.transform(df.pop("s_sertifikat").str.lower())
+    df = df[feature_columns]
+
+    # Target sintetis: harga naik dengan luas, fasilitas dan lokasi
+    rng = np.random.default_rng(seed)
+    y = (
+        df["s_luas_bangunan"] * 8e6 + df["s_luas_tanah"] * 5e6
+        + df.filter(like="f_").sum(axis=1) * 2e7
+        + df["kabupaten_encoded"] * 1e8
+        + rng.normal(0, 5e7, len(df))
+    )
+
+    scaler = StandardScaler().fit(df)
+    model = RandomForestRegressor(
+        n_estimators=n_estimators, max_depth=max_depth, random_state=seed, n_jobs=-1
+    ).fit(scaler.transform(df), y)
+
+    artifacts = {"le_kabupaten": le_kabupaten, "le_sertifikat": le_sertifikat, "scaler": scaler, "model": model}
+    entries = {}
+    for name, filename in ARTIFACT_FILES.items():
+        path = os.path.join(target_dir, filename)
+        joblib.dump(artifacts[name], path)
+        entries[filename] = {"sha256": file_sha256(path), "size": os.path.getsize(path)}
+
+    manifest = {"version": "benchmark-standin", "source": "benchmarks.prediction", "artifacts": entries}
+    with open(os.path.join(target_dir, MANIFEST_FILENAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def measure(fn: Callable, rows: int, iterations: int, warmup: int = 3, min_time: float = 0.2) -> Dict:
+    """Jalankan `fn` berulang; return persentil latency (ms) dan rows/sec"""
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    start = time.perf_counter()
+    while len(samples) < iterations or (time.perf_counter() - start < min_time and len(samples) < iterations * 20):
+        t0 = time.perf_counter_ns()
+        fn()
+        samples.append((time.perf_counter_ns() - t0) / 1e6)
+
+    latencies = np.array(samples)
+    mean = float(latencies.mean())
+    return {
+        "rows": rows,
+        "iterations": len(samples),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "mean_ms": mean,
+        "rows_per_sec": rows / (mean / 1000) if mean else 0.0,
+    }
+
+
+def run_benchmarks(batch_sizes: List[int], iterations: int) -> Dict[str, Dict]:
+    """Benchmark setiap tahap jalur prediksi untuk input tunggal dan batch"""
+    from app.schemas import PropertyFeatures
+    from app.utils.responses import create_success_response, format_currency
+
+    model_manager = MLModelManager()
+    bundle = model_manager.get_bundle()
+    records = generate_records(max(batch_sizes), seed=1)
+    single = records[0]
+    X_single = model_manager.preprocess_data(single)
+
+    results = {
+        "validate_single": measure(lambda: PropertyFeatures(**single).dict(), 1, iterations),
+        "preprocess_single": measure(lambda: model_manager.preprocess_data(single), 1, iterations),
+        "predict_single": measure(lambda: model_manager.predict(X_single), 1, iterations),
+        "predict_uncached_single": measure(lambda: model_manager.predict_uncached([single]), 1, iterations),
+        "response_envelope": measure(
+            lambda: create_success_response(data={
+                "prediksi_harga": 1234567890.0,
+                "prediksi_harga_formatted": format_currency(1234567890.0),
+                "model_version": bundle.version
+            }),
+            1, iterations
+        ),
+    }
+
+    for size in batch_sizes:
+        batch = records[:size]
+        X_batch = model_manager.preprocess_batch(batch)
+        # Batch besar cukup diulang lebih sedikit
+        n = max(5, iterations // max(1, size // 64))
+        results[f"validate_batch_{size}"] = measure(lambda: [PropertyFeatures(**r).dict() for r in batch], size, n)
+        results[f"preprocess_batch_{size}"] = measure(lambda: model_manager.preprocess_batch(batch), size, n)
+        results[f"predict_batch_{size}"] = measure(lambda: model_manager.predict_batch(X_batch), size, n)
+        results[f"predict_uncached_batch_{size}"] = measure(lambda: model_manager.predict_uncached(batch), size, n)
+
+    return results
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[Dict]:
+    """Case yang p50-nya lebih lambat dari baseline melebihi toleransi"""
+    regressions = []
+    for name, current in results.items():
+        reference = baseline.get(name)
+        if not reference or not reference.get("p50_ms"):
+            continue
+        ratio = current["p50_ms"] / reference["p50_ms"]
+        if ratio > 1 + tolerance:
+            regressions.append({
+                "case": name,
+                "baseline_p50_ms": reference["p50_ms"],
+                "current_p50_ms": current["p50_ms"],
+                "ratio": ratio,
+            })
+    return regressions
+
+
+def environment_info() -> Dict:
+    import sklearn
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+        "model_engine": settings.MODEL_ENGINE,
+    }
+
+
+def print_table(results: Dict[str, Dict]):
+    print(f"{'case':<32} {'rows':>6} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'rows/sec':>12}")
+    for name, r in results.items():
+        print(f"{name:<32} {r['rows']:>6} {r['p50_ms']:>10.3f} {r['p95_ms']:>10.3f} {r['p99_ms']:>10.3f} {r['rows_per_sec']:>12.0f}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark jalur prediksi")
+    parser.add_argument("--output", help="Tulis hasil ke file JSON")
+    parser.add_argument("--baseline", help="File JSON hasil sebelumnya untuk perbandingan")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Regresi bila p50 lebih lambat dari baseline lebih dari fraksi ini (default 0.25)")
+    parser.add_argument("--batch-sizes", default=",".join(str(s) for s in DEFAULT_BATCH_SIZES))
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--artifact-dir", help="Pakai artifact lokal ini, bukan model pengganti")
+    parser.add_argument("--trees", type=int, default=100, help="Jumlah tree model pengganti")
+    parser.add_argument("--max-depth", type=int, default=12, help="Kedalaman tree model pengganti")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    # Repo masih memakai API Pydantic v1 (.dict()); peringatan deprecation tidak relevan di sini
+    warnings.filterwarnings("ignore", category=DeprecationWarning)
+    batch_sizes = [int(s) for s in args.batch_sizes.split(",") if s]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        artifact_dir = args.artifact_dir
+        if not artifact_dir:
+            build_standin_artifacts(tmp_dir, n_estimators=args.trees, max_depth=args.max_depth)
+            artifact_dir = tmp_dir
+        settings.MODEL_ARTIFACT_DIR = artifact_dir
+        asyncio.run(MLModelManager().load_models())
+        results = run_benchmarks(batch_sizes, args.iterations)
+
+    print_table(results)
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "environment": environment_info(),
+        "model": MLModelManager().get_bundle().info(),
+        "results": results,
+    }
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline.get("results", {}), args.tolerance)
+        report["baseline"] = args.baseline
+        report["regressions"] = regressions
+        for r in regressions:
+            print(f"REGRESSION {r['case']}: p50 {r['baseline_p50_ms']:.3f} ms -> {r['current_p50_ms']:.3f} ms (x{r['ratio']:.2f})")
+        if regressions:
+            exit_code = 1
+        else:
+            print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
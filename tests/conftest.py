@@ -0,0 +1,7 @@
+# ================================
+# tests/conftest.py
+# ================================
+import os
+
+# app.database membuat engine saat import; test tidak memakai database aplikasi
+os.environ.setdefault("DATABASE_URL", "sqlite://")
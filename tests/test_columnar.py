@@ -0,0 +1,68 @@
+# ================================
+# tests/test_columnar.py
+# ================================
+"""
+Validasi payload columnar: nilai yang tidak valid (termasuk list/dict
+bersarang) dilaporkan per baris tanpa menggagalkan baris lain.
+"""
+import numpy as np
+
+from app.core.columnar import field_constraints, validate_columns
+
+NUMERIC_COLUMNS = list(field_constraints())
+
+
+def make_columns(n=3):
+    columns = {name: [1] * n for name in NUMERIC_COLUMNS}
+    columns["kabupaten"] = ["Jakarta Selatan"] * n
+    columns["s_sertifikat"] = ["SHM"] * n
+    return columns
+
+
+def test_valid_payload():
+    batch = validate_columns(make_columns(), NUMERIC_COLUMNS)
+
+    assert batch.valid.all()
+    assert batch.errors == {}
+    assert batch.numeric.shape == (3, len(NUMERIC_COLUMNS))
+
+
+def test_nested_category_values_are_row_errors():
+    columns = make_columns()
+    columns["kabupaten"] = [["a"], "Jakarta Selatan", {"x": 1}]
+    columns["s_sertifikat"] = ["SHM", ["shm"], "SHM"]
+
+    batch = validate_columns(columns, NUMERIC_COLUMNS)
+
+    np.testing.assert_array_equal(batch.valid, [False, False, False])
+    assert [e["field"] for e in batch.errors[0]] == ["kabupaten"]
+    assert [e["field"] for e in batch.errors[1]] == ["s_sertifikat"]
+    assert [e["field"] for e in batch.errors[2]] == ["kabupaten"]
+
+
+def test_nested_numeric_values_are_row_errors():
+    columns = make_columns()
+    # Semua baris bersarang: np.asarray berhasil sebagai array 2-D
+    columns["s_luas_tanah"] = [[1], [0], [2]]
+    # Campuran angka dan list
+    columns["s_kamar_tidur"] = [2, {"n": 3}, [1, 2]]
+
+    batch = validate_columns(columns, NUMERIC_COLUMNS)
+
+    assert not batch.valid.any()
+    for index in range(3):
+        assert "s_luas_tanah" in {e["field"] for e in batch.errors[index]}
+    assert "s_kamar_tidur" not in {e["field"] for e in batch.errors[0]}
+    assert "s_kamar_tidur" in {e["field"] for e in batch.errors[1]}
+    assert "s_kamar_tidur" in {e["field"] for e in batch.errors[2]}
+
+
+def test_invalid_rows_do_not_affect_valid_rows():
+    columns = make_columns()
+    columns["s_luas_bangunan"] = [120.5, [1], 80]
+
+    batch = validate_columns(columns, NUMERIC_COLUMNS)
+
+    np.testing.assert_array_equal(batch.valid, [True, False, True])
+    assert batch.numeric[0, NUMERIC_COLUMNS.index("s_luas_bangunan")] == 120.5
+    assert list(batch.errors) == [1]
@@ -0,0 +1,87 @@
+# ================================
+# tests/test_comparables.py
+# ================================
+"""ComparablesIndex: perubahan listing selama rebuild diputar ulang sebelum swap"""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.core.comparables import ComparablesIndex
+from app.core.feature_extraction import SOURCE_COLUMNS
+
+N_FEATURES = 4
+
+
+def row(property_id: int, value: float) -> SimpleNamespace:
+    # Kolom lain tidak dipakai oleh vectorize pengganti di test ini
+    return SimpleNamespace(**{**dict.fromkeys(SOURCE_COLUMNS), "id": property_id, "price_numeric": value})
+
+
+def vectorize(rows):
+    """Pengganti listing_vectors: harga negatif dianggap tidak bisa dinilai"""
+    rows = [r for r in rows if r.price_numeric >= 0]
+    ids = np.array([r.id for r in rows], dtype=np.int64)
+    return ids, np.array([[r.price_numeric] * N_FEATURES for r in rows], dtype=np.float32).reshape(-1, N_FEATURES)
+
+
+def vectors_of(index: ComparablesIndex):
+    return {int(i): index._vectors[p, 0] for i, p in index._positions.items()}
+
+
+@pytest.fixture
+def index():
+    index = ComparablesIndex(N_FEATURES, block_size=3)
+    index.replace(*vectorize([row(i, float(i)) for i in range(1, 6)]), "v1")
+    return index
+
+
+def test_changes_during_rebuild_are_replayed(index):
+    index.begin_rebuild()
+    # Snapshot rebuild dibaca sebelum perubahan berikut
+    snapshot = vectorize([row(i, float(i) * 10) for i in range(1, 6)])
+
+    index.track(rows=[row(2, 222.0), row(7, 7.0)])     # update dan insert setelah snapshot
+    index.track(removed_ids=[3])                        # delete setelah snapshot
+    index.track(rows=[row(4, -1.0)])                    # tidak lagi bisa dinilai
+    index.track(rows=[row(5, 55.0), row(5, 555.0)])     # perubahan terakhir yang dipakai
+
+    index.replace(*snapshot, "v2", vectorize=vectorize)
+
+    assert index.version == "v2"
+    assert vectors_of(index) == {1: 10.0, 2: 222.0, 5: 555.0, 7: 7.0}
+    assert len(index) == 4
+
+
+def test_stale_version_upsert_is_ignored(index):
+    index.begin_rebuild()
+    index.track(rows=[row(1, 100.0)])
+    index.replace(*vectorize([row(i, float(i)) for i in range(1, 6)]), "v2", vectorize=vectorize)
+
+    # Refresh yang menghitung vektor dengan versi lama selesai setelah swap
+    index.upsert([1], np.full((1, N_FEATURES), -5.0), "v1")
+    assert vectors_of(index)[1] == 100.0
+
+    index.upsert([1], np.full((1, N_FEATURES), 8.0), "v2")
+    assert vectors_of(index)[1] == 8.0
+
+
+def test_track_outside_rebuild_is_noop(index):
+    index.track(rows=[row(1, 100.0)], removed_ids=[2])
+    index.replace(*vectorize([row(i, float(i)) for i in range(1, 3)]), "v2", vectorize=vectorize)
+    assert vectors_of(index) == {1: 1.0, 2: 2.0}
+
+
+def test_abort_rebuild_stops_tracking(index):
+    index.begin_rebuild()
+    index.track(rows=[row(9, 9.0)])
+    index.abort_rebuild()
+    index.replace(*vectorize([row(1, 1.0)]), "v2", vectorize=vectorize)
+    assert vectors_of(index) == {1: 1.0}
+
+
+def test_search_after_replay(index):
+    index.begin_rebuild()
+    index.track(rows=[row(6, 100.0)])
+    index.replace(*vectorize([row(i, float(i)) for i in range(1, 6)]), "v2", vectorize=vectorize)
+    assert [property_id for property_id, _ in index.search(np.full(N_FEATURES, 99.0), 1)] == [6]
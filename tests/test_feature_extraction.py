@@ -0,0 +1,143 @@
+# ================================
+# tests/test_feature_extraction.py
+# ================================
+"""
+ListingFeatureExtractor (factorize per kolom) terhadap ekstraksi per baris.
+
+Listing disimpan di database SQLite sementara lalu dibaca dengan kolom
+`SOURCE_COLUMNS`, sama seperti bulk scoring di app.core.valuation.
+"""
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.feature_extraction import (
+    FACILITY_FLAGS, NUMERIC_COLUMNS, SOURCE_COLUMNS, ListingFeatureExtractor, extract_features,
+    extract_kabupaten, normalize_facility, normalize_sertifikat, parse_area, parse_poi_distances,
+    split_facilities
+)
+from app.database import Base
+from app.models.property import PropertyModel
+
+LISTINGS = [
+    # Jakarta, POI dengan jarak
+    {"location_text": "Kebayoran Baru, Jakarta Selatan", "facilities": ["Taman", "CCTV", "Kolam Renang"],
+     "land_area": "200 m²", "building_area": "150 m²", "certificate_type": "SHM - Sertifikat Hak Milik",
+     "nearby_points_of_interest_text": "Perbelanjaan: Mall A (1,2 km); Sekolah: SD B (500 m); Transportasi: Stasiun C (3 km)"},
+    # Fasilitas string dengan alias, luas dengan pemisah ribuan, tanpa teks POI
+    {"location_text": "Cengkareng, Jakarta Barat, DKI Jakarta", "facilities": ["Gym; Security; Playground"],
+     "land_area": "1.200 m²", "building_area": "850,5 m²", "certificate_type": "HGB",
+     "nearby_points_of_interest_text": None},
+    # Di luar Jakarta: tidak valid, fitur numerik tetap diekstrak
+    {"location_text": "Beji, Depok, Jawa Barat", "facilities": ["Taman"],
+     "land_area": "120 m²", "building_area": "90 m²", "certificate_type": "SHM",
+     "nearby_points_of_interest_text": "Sekolah: SMA X"},
+    {"location_text": "Bekasi", "facilities": [], "land_area": "100 m²", "building_area": "80 m²",
+     "certificate_type": "", "nearby_points_of_interest_text": None},
+    # Luas tidak terbaca
+    {"location_text": "Menteng, Jakarta Pusat", "facilities": None, "land_area": "-", "building_area": "300 m²",
+     "certificate_type": "Strata Title", "nearby_points_of_interest_text": ""},
+    # Duplikat nilai teks (jalur factorize) dengan POI berbeda
+    {"location_text": "Kebayoran Baru, Jakarta Selatan", "facilities": ["Taman", "CCTV", "Kolam Renang"],
+     "land_area": "200 m²", "building_area": "150 m²", "certificate_type": "Girik",
+     "nearby_points_of_interest_text": "Transportasi: Halte D (250 m), Stasiun E (2 km)"},
+    {"location_text": "Kelapa Gading, Jakarta Utara", "facilities": ["AC", "Water Heater", "Unknown Facility"],
+     "land_area": "75", "building_area": "60 m2", "certificate_type": "PPJB",
+     "nearby_points_of_interest_text": "Perbelanjaan: Pasar F (800 m)"},
+]
+
+
+@pytest.fixture(scope="module")
+def rows(tmp_path_factory):
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('db') / 'listings.db'}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        for i, listing in enumerate(LISTINGS):
+            db.add(PropertyModel(
+                title=f"Listing {i}", description="test", price_display="Rp 1 M", price_numeric=1e9 + i,
+                posted_by="test", source_url=f"https://example.com/listing/{i}", property_type="House",
+                bedrooms=i % 4 + 1, bathrooms=i % 3, number_of_floors=i % 3, electricity_power="2200",
+                property_condition="Baru",
+                **listing
+            ))
+        db.commit()
+        result = db.query(*[getattr(PropertyModel, column) for column in SOURCE_COLUMNS]).order_by(PropertyModel.id).all()
+    engine.dispose()
+    return result
+
+
+def reference_features(row):
+    """Ekstraksi satu baris langsung dengan helper skalar (tanpa factorize)"""
+    numeric = dict.fromkeys(NUMERIC_COLUMNS, 0.0)
+    for name in split_facilities(row.facilities):
+        column = normalize_facility(name)
+        if column:
+            numeric[column] = 1.0
+    numeric["s_jumlah_lantai"] = float(row.number_of_floors or 0)
+    numeric["s_kamar_mandi"] = float(row.bathrooms or 0)
+    numeric["s_kamar_tidur"] = float(row.bedrooms or 0)
+    numeric["s_luas_bangunan"] = parse_area(row.building_area)
+    numeric["s_luas_tanah"] = parse_area(row.land_area)
+    numeric.update(zip(["poi_perbelanjaan", "poi_sekolah", "poi_transportasi"],
+                       parse_poi_distances(row.nearby_points_of_interest_text)))
+    kabupaten = extract_kabupaten(row.location_text)
+    valid = kabupaten is not None and numeric["s_luas_bangunan"] > 0 and numeric["s_luas_tanah"] > 0
+    return [numeric[c] for c in NUMERIC_COLUMNS], kabupaten if valid else "", normalize_sertifikat(row.certificate_type), valid
+
+
+def test_batch_matches_row_by_row(rows):
+    batch = ListingFeatureExtractor().extract(rows)
+    expected = [reference_features(row) for row in rows]
+
+    np.testing.assert_array_equal(batch.numeric, np.array([e[0] for e in expected], dtype=np.float64))
+    assert batch.kabupaten.tolist() == [e[1] for e in expected]
+    assert batch.sertifikat.tolist() == [e[2] for e in expected]
+    assert batch.valid.tolist() == [e[3] for e in expected]
+    assert batch.ids.tolist() == [row.id for row in rows]
+    assert batch.prices.tolist() == [row.price_numeric for row in rows]
+
+
+def test_batch_matches_single_row_extraction(rows):
+    extractor = ListingFeatureExtractor()
+    batch = extractor.extract(rows)
+    for i, row in enumerate(rows):
+        single = extractor.extract([row])
+        np.testing.assert_array_equal(batch.numeric[i], single.numeric[0])
+        assert batch.kabupaten[i] == single.kabupaten[0]
+        assert batch.sertifikat[i] == single.sertifikat[0]
+        assert batch.valid[i] == single.valid[0]
+
+
+def test_expected_values(rows):
+    batch = ListingFeatureExtractor().extract(rows)
+    index = {column: i for i, column in enumerate(NUMERIC_COLUMNS)}
+
+    assert batch.valid.tolist() == [True, True, False, False, False, True, True]
+    assert batch.kabupaten.tolist()[:2] == ["jakarta selatan", "jakarta barat"]
+    assert batch.numeric[1, index["s_luas_tanah"]] == 1200.0
+    assert batch.numeric[1, index["s_luas_bangunan"]] == 850.5
+    assert batch.numeric[1, index["f_tempat_gym"]] == 1.0
+    assert batch.numeric[1, index["f_keamanan_24_jam"]] == 1.0
+    assert batch.numeric[0, index["poi_sekolah"]] == 0.5
+    assert batch.numeric[5, index["poi_transportasi"]] == 0.25
+    # Tanpa teks POI / tanpa jarak: default
+    assert batch.numeric[1, index["poi_sekolah"]] == 1.0
+    assert batch.numeric[2, index["poi_sekolah"]] == 1.0
+    assert batch.sertifikat.tolist()[3:5] == ["lainnya", "strata"]
+    assert batch.numeric[:, :len(FACILITY_FLAGS)].sum(axis=1).tolist()[3:5] == [0.0, 0.0]
+
+
+def test_extract_features_record(rows):
+    record = extract_features(rows[0])
+    assert record["kabupaten"] == "jakarta selatan"
+    assert record["s_sertifikat"] == "shm"
+    assert record["f_kolam_renang"] == 1.0
+    assert extract_features(rows[2]) is None
+
+
+def test_empty_batch():
+    batch = ListingFeatureExtractor().extract([])
+    assert len(batch) == 0
+    assert batch.numeric.shape == (0, len(NUMERIC_COLUMNS))
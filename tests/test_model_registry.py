@@ -0,0 +1,75 @@
+# ================================
+# tests/test_model_registry.py
+# ================================
+"""
+Registry versi model saat hot swap: bundle baru harus tersedia ketika pool
+inferensi di-restart (sebelum diaktifkan), termasuk dengan MODEL_REGISTRY_KEEP=1.
+
+Artifact dan pool proses diganti tiruan; `restart` menjalankan pengecekan yang
+sama dengan worker baru (`model_version_available`) di proses test.
+"""
+import asyncio
+from collections import OrderedDict
+
+import pytest
+
+from app.core import inference
+from app.core.config import settings
+from app.core.ml_models import MLModelManager, ModelBundle
+
+
+def make_bundle(version):
+    return ModelBundle(version=version, source="test", le_kabupaten=None, le_sertifikat=None,
+                       scaler=None, model=None)
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    manager = MLModelManager()
+    saved = (manager.active_bundle, manager._bundles, manager._models_loaded, manager._reload_lock)
+    manager._bundles = OrderedDict()
+    manager._reload_lock = None
+    manager._activate(make_bundle("v1"))
+    yield manager
+    manager.active_bundle, manager._bundles, manager._models_loaded, manager._reload_lock = saved
+
+
+@pytest.fixture
+def restarts(monkeypatch):
+    checked = []
+
+    async def restart(version):
+        checked.append(inference.model_version_available(version))
+
+    monkeypatch.setattr(inference.inference_executor, "restart", restart)
+    return checked
+
+
+def reload(manager, monkeypatch, version):
+    monkeypatch.setattr(manager, "_build_bundle", lambda artifact_dir=None: make_bundle(version))
+    return asyncio.run(manager.reload_models())
+
+
+@pytest.mark.parametrize("keep", [1, 2])
+def test_reload_keeps_new_bundle_until_activated(manager, monkeypatch, restarts, keep):
+    monkeypatch.setattr(settings, "MODEL_REGISTRY_KEEP", keep)
+
+    reload(manager, monkeypatch, "v2")
+    reload(manager, monkeypatch, "v3")
+
+    assert len(restarts) == 2
+    assert manager.model_version == "v3"
+    assert [v["version"] for v in manager.get_versions()] == ["v2", "v3"][-keep:]
+
+
+def test_failed_restart_keeps_previous_version(manager, monkeypatch):
+    async def restart(version):
+        raise RuntimeError("worker failed")
+
+    monkeypatch.setattr(inference.inference_executor, "restart", restart)
+
+    with pytest.raises(RuntimeError):
+        reload(manager, monkeypatch, "v2")
+
+    assert manager.model_version == "v1"
+    assert [v["version"] for v in manager.get_versions()] == ["v1"]
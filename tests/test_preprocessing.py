@@ -0,0 +1,126 @@
+# ================================
+# tests/test_preprocessing.py
+# ================================
+"""
+Parity PreprocessingPlan (jalur NumPy) dengan jalur pandas di MLModelManager.
+
+Encoder dan scaler pengganti di-fit di sini sehingga test tidak bergantung
+pada artifact yang di-deploy; hasil kedua jalur harus identik bit for bit.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+from app.core.ml_models import MLModelManager, ModelBundle
+from app.core.preprocessing import PreprocessingPlan
+
+KABUPATEN = ["jakarta barat", "jakarta pusat", "jakarta selatan", "jakarta timur", "jakarta utara"]
+SERTIFIKAT = ["adat", "girik", "hak pakai", "hak sewa", "hgb", "hgu", "lainnya", "ppjb", "shm", "strata"]
+
+
+@pytest.fixture(scope="module")
+def manager():
+    return MLModelManager()
+
+
+@pytest.fixture(scope="module")
+def bundle(manager):
+    rng = np.random.default_rng(42)
+    n_features = len(manager.feature_columns)
+    train = pd.DataFrame(rng.normal(loc=50, scale=30, size=(500, n_features)), columns=manager.feature_columns)
+    return ModelBundle(
+        version="test",
+        source="test",
+        le_kabupaten=LabelEncoder().fit(KABUPATEN),
+        le_sertifikat=LabelEncoder().fit(SERTIFIKAT),
+        scaler=StandardScaler().fit(train),
+        model=None
+    )
+
+
+@pytest.fixture(scope="module")
+def plan(manager, bundle):
+    return PreprocessingPlan(bundle.le_kabupaten, bundle.le_sertifikat, bundle.scaler, manager.feature_columns)
+
+
+def make_records(manager, kabupaten, sertifikat, seed=0):
+    rng = np.random.default_rng(seed)
+    records = []
+    for i, (kab, sert) in enumerate(zip(kabupaten, sertifikat)):
+        record = {
+            column: int(rng.integers(0, 2)) if column.startswith("f_")
+            else int(rng.integers(0, 6)) if column in ("s_jumlah_lantai", "s_kamar_mandi", "s_kamar_tidur")
+            else float(rng.uniform(0, 1000))
+            for column in manager.feature_columns[:-2]
+        }
+        record["kabupaten"] = kab
+        record["s_sertifikat"] = sert
+        records.append(record)
+    return records
+
+
+def assert_identical(actual, expected):
+    assert actual.dtype == expected.dtype
+    assert actual.shape == expected.shape
+    assert np.array_equal(actual, expected)
+
+
+def columns_of(manager, records):
+    numeric = np.array([[r[c] for c in manager.feature_columns[:-2]] for r in records], dtype=np.float64)
+    return numeric, [r["kabupaten"] for r in records], [r["s_sertifikat"] for r in records]
+
+
+CASES = {
+    "known": (KABUPATEN * 2, SERTIFIKAT),
+    "case_whitespace": (
+        ["  JAKARTA BARAT", "Jakarta Pusat  ", "\tjakarta selatan\n", "JaKaRtA TiMuR", " jakarta utara "],
+        [" SHM", "Hgb ", "HAK PAKAI", "  hak sewa  ", "Strata"]
+    ),
+    "unknown": (
+        ["bandung", "", "jakarta", "jakarta selatan", "depok"],
+        ["sertifikat lain", "", "shm", "hak guna", "x"]
+    ),
+}
+
+
+@pytest.mark.parametrize("case", sorted(CASES))
+def test_build_matrix_matches_pandas(manager, bundle, plan, case):
+    records = make_records(manager, *CASES[case])
+    expected = manager._preprocess_batch_pandas(records, bundle)
+    actual = plan.scale_matrix(plan.build_matrix(records))
+    assert_identical(actual, expected)
+
+
+@pytest.mark.parametrize("case", sorted(CASES))
+def test_build_matrix_columns_matches_pandas(manager, bundle, plan, case):
+    records = make_records(manager, *CASES[case])
+    expected = manager._preprocess_batch_pandas(records, bundle)
+    actual = plan.scale_matrix(plan.build_matrix_columns(*columns_of(manager, records)))
+    assert_identical(actual, expected)
+
+
+def test_build_matrix_accepts_objects(manager, bundle, plan):
+    class Row:
+        def __init__(self, record):
+            self.__dict__.update(record)
+
+    records = make_records(manager, *CASES["case_whitespace"], seed=1)
+    expected = manager._preprocess_batch_pandas(records, bundle)
+    assert_identical(plan.transform([Row(r) for r in records]), expected)
+
+
+def test_single_record_matches_pandas(manager, bundle, plan):
+    record = make_records(manager, ["Jakarta Selatan "], ["SHM"], seed=2)[0]
+    assert_identical(plan.transform(record), manager._preprocess_batch_pandas([record], bundle))
+
+
+def test_unknown_category_uses_first_class(plan):
+    assert plan.encode_kabupaten("bandung") == 0
+    assert plan.encode_sertifikat("unknown") == 0
+    assert plan.encode_kabupaten(" JAKARTA UTARA ") == KABUPATEN.index("jakarta utara")
+
+
+def test_compiled_plan_passes_load_time_check(manager, bundle):
+    # Pengecekan saat load (defence in depth) harus menerima plan untuk artifact yang valid
+    assert manager._compile_preprocessing_plan(bundle) is not None
@@ -0,0 +1,134 @@
+# ================================
+# tests/test_tree_engine.py
+# ================================
+"""
+Parity CompiledTreeEnsemble dengan `predict` scikit-learn untuk setiap
+estimator yang didukung, pada model kecil yang di-fit saat test berjalan.
+"""
+import numpy as np
+import pytest
+from sklearn.dummy import DummyRegressor
+from sklearn.ensemble import (
+    ExtraTreesRegressor, GradientBoostingRegressor, HistGradientBoostingRegressor, RandomForestRegressor
+)
+from sklearn.tree import DecisionTreeRegressor
+
+from app.core.tree_engine import CompiledTreeEnsemble, UnsupportedModelError, compile_and_verify
+
+N_FEATURES = 8
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(600, N_FEATURES))
+    # Beberapa fitur diskrit (flag/jumlah kamar) agar ada threshold di antara nilai yang sama
+    X[:, 0] = rng.integers(0, 2, size=600)
+    X[:, 1] = rng.integers(1, 6, size=600)
+    y = 3 * X[:, 0] + X[:, 1] ** 2 + np.sin(X[:, 2]) * 5 + rng.normal(scale=0.1, size=600)
+    X_test = np.vstack([rng.normal(scale=2.0, size=(300, N_FEATURES)), X[:50]])
+    return X, y, X_test
+
+
+def with_missing(X: np.ndarray, rate: float, seed: int) -> np.ndarray:
+    X = X.copy()
+    X[np.random.default_rng(seed).random(X.shape) < rate] = np.nan
+    return X
+
+
+ESTIMATORS = {
+    "decision_tree": lambda: DecisionTreeRegressor(max_depth=8, random_state=0),
+    "decision_tree_unbounded": lambda: DecisionTreeRegressor(random_state=0),
+    "random_forest": lambda: RandomForestRegressor(n_estimators=15, max_depth=6, random_state=0),
+    "extra_trees": lambda: ExtraTreesRegressor(n_estimators=15, max_depth=6, random_state=0),
+    "gradient_boosting": lambda: GradientBoostingRegressor(n_estimators=30, max_depth=3, random_state=0),
+    "gradient_boosting_init_zero": lambda: GradientBoostingRegressor(
+        n_estimators=30, max_depth=3, init="zero", random_state=0
+    ),
+    "gradient_boosting_init_dummy": lambda: GradientBoostingRegressor(
+        n_estimators=20, max_depth=3, init=DummyRegressor(strategy="median"), random_state=0
+    ),
+}
+
+# Estimator yang menerima NaN saat fit (scikit-learn >= 1.4 / 1.6 untuk splitter random)
+MISSING_VALUE_ESTIMATORS = {
+    "decision_tree": lambda: DecisionTreeRegressor(max_depth=8, random_state=0),
+    "random_forest": lambda: RandomForestRegressor(n_estimators=15, max_depth=6, random_state=0),
+    "extra_trees": lambda: ExtraTreesRegressor(n_estimators=15, max_depth=6, random_state=0),
+}
+
+
+def assert_parity(estimator, X_test):
+    compiled = CompiledTreeEnsemble.from_estimator(estimator)
+    expected = estimator.predict(X_test)
+    actual = compiled.predict(X_test)
+    assert actual.shape == expected.shape
+    assert np.allclose(actual, expected, rtol=1e-10, atol=1e-10)
+
+
+@pytest.mark.parametrize("name", sorted(ESTIMATORS))
+def test_compiled_matches_sklearn(data, name):
+    X, y, X_test = data
+    estimator = ESTIMATORS[name]().fit(X, y)
+    assert_parity(estimator, X_test)
+
+
+@pytest.mark.parametrize("name", sorted(MISSING_VALUE_ESTIMATORS))
+def test_compiled_matches_sklearn_with_missing_values(data, name):
+    X, y, X_test = data
+    try:
+        estimator = MISSING_VALUE_ESTIMATORS[name]().fit(with_missing(X, 0.1, 1), y)
+    except ValueError:
+        pytest.skip(f"{name} does not support missing values in this scikit-learn version")
+    assert_parity(estimator, with_missing(X_test, 0.15, 2))
+
+
+def test_missing_values_at_predict_time(data):
+    # Model tanpa NaN saat fit: NaN saat prediksi mengikuti arah default sklearn
+    X, y, X_test = data
+    estimator = DecisionTreeRegressor(max_depth=6, random_state=0).fit(X, y)
+    assert_parity(estimator, with_missing(X_test, 0.2, 3))
+
+
+@pytest.mark.parametrize("block_size", [1, 7, 4096])
+def test_block_size_does_not_change_predictions(data, block_size):
+    X, y, X_test = data
+    estimator = RandomForestRegressor(n_estimators=10, max_depth=5, random_state=0).fit(X, y)
+    compiled = CompiledTreeEnsemble.from_estimator(estimator)
+    np.testing.assert_array_equal(compiled.predict(X_test, block_size=block_size), compiled.predict(X_test))
+
+
+def test_single_row(data):
+    X, y, X_test = data
+    estimator = GradientBoostingRegressor(n_estimators=10, random_state=0).fit(X, y)
+    assert_parity(estimator, X_test[:1])
+
+
+def test_hist_gradient_boosting_is_rejected(data):
+    X, y, X_test = data
+    estimator = HistGradientBoostingRegressor(max_iter=10).fit(X, y)
+    with pytest.raises(UnsupportedModelError):
+        CompiledTreeEnsemble.from_estimator(estimator)
+    assert compile_and_verify(estimator, X_test) is None
+
+
+def test_multi_output_is_rejected(data):
+    X, y, _ = data
+    estimator = DecisionTreeRegressor(max_depth=3).fit(X, np.column_stack([y, -y]))
+    with pytest.raises(UnsupportedModelError):
+        CompiledTreeEnsemble.from_estimator(estimator)
+
+
+def test_wrong_feature_count_is_rejected(data):
+    X, y, X_test = data
+    compiled = CompiledTreeEnsemble.from_estimator(DecisionTreeRegressor(max_depth=3).fit(X, y))
+    with pytest.raises(ValueError):
+        compiled.predict(X_test[:, :-1])
+
+
+def test_compile_and_verify_returns_compiled_model(data):
+    X, y, X_test = data
+    estimator = ExtraTreesRegressor(n_estimators=5, random_state=0).fit(X, y)
+    compiled = compile_and_verify(estimator, X_test)
+    assert isinstance(compiled, CompiledTreeEnsemble)
+    assert compiled.info()["n_trees"] == 5